@@ -5,4 +5,4 @@ This package contains different WiFi security testing modules for the Melro appl
 Each module implements a specific attack type with consistent UI and functionality.
 """
 
-__all__ = ["utils", "beacon_flooding", "passive_recon"] 
\ No newline at end of file
+__all__ = ["utils", "process_engine", "airodump_csv", "csv_reader", "compact", "dot11", "capture", "packet_ring", "replay", "interfaces", "monitor_mode", "channels", "channel_scheduler", "convergence", "update_queue", "list_view", "network_model", "recon_targets", "client_metrics", "survey_store", "observation_log", "workspace", "supervisor", "thermal_governor", "scanner", "beacon_flooding", "passive_recon"] 
\ No newline at end of file
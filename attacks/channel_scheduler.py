@@ -0,0 +1,359 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+from collections import namedtuple
+
+from .dot11 import channel_to_freq
+
+# Dwell bounds in seconds; an idle channel gets MIN_DWELL, a saturated one MAX_DWELL
+MIN_DWELL = 0.1
+MAX_DWELL = 1.0
+# Frames per second at which a channel gets half of the extra dwell
+HALF_DWELL_FRAME_RATE = 50.0
+# No channel goes unvisited for longer than this
+MAX_REVISIT = 5.0
+# Smoothing of the per-channel rates, weight of the newest visit
+RATE_ALPHA = 0.3
+# A new device is worth this many frames when ranking channels
+FRAMES_PER_DEVICE = 100.0
+# Keeps quiet channels from ranking at exactly zero
+RATE_FLOOR = 0.05
+
+# airodump-ng's default hop: every channel in turn for 250 ms
+FIXED_DWELL = 0.25
+
+# One pass over the channels of a time-sliced plan, shared by weight
+SLICE_CYCLE = 1.0
+
+# One scheduling decision: which channel, for how long and why
+# (first visit, revisit guarantee, activity ranking, fixed order or time slice)
+Decision = namedtuple("Decision", ["time", "channel", "dwell", "reason", "priority"])
+
+
+class ChannelStats:
+    """Smoothed activity of one channel"""
+
+    __slots__ = ("channel", "frame_rate", "new_rate", "visits", "last_visit", "dwell_time", "frames", "found")
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.frame_rate = 0.0
+        self.new_rate = 0.0
+        self.visits = 0
+        self.last_visit = None
+        self.dwell_time = 0.0
+        self.frames = 0
+        self.found = 0
+
+    def record(self, dwell, frames, new, alpha=RATE_ALPHA):
+        frame_rate = frames / dwell if dwell > 0 else 0.0
+        new_rate = new / dwell if dwell > 0 else 0.0
+        if self.visits == 0:
+            self.frame_rate, self.new_rate = frame_rate, new_rate
+        else:
+            self.frame_rate += alpha * (frame_rate - self.frame_rate)
+            self.new_rate += alpha * (new_rate - self.new_rate)
+        self.visits += 1
+        self.dwell_time += dwell
+        self.frames += frames
+        self.found += new
+
+    def to_dict(self):
+        return {"channel": self.channel, "visits": self.visits, "dwell_time": round(self.dwell_time, 3),
+                "frames": self.frames, "found": self.found,
+                "frame_rate": round(self.frame_rate, 2), "new_rate": round(self.new_rate, 3)}
+
+
+class DecisionLog:
+    """JSON lines file with one record per hop: the decision and what the dwell found"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+
+    def write(self, decision, frames, new, stats):
+        record = {"t": round(decision.time, 3), "channel": decision.channel, "dwell": round(decision.dwell, 3),
+                  "reason": decision.reason, "priority": round(decision.priority, 3), "frames": frames, "new": new,
+                  "frame_rate": round(stats.frame_rate, 2), "new_rate": round(stats.new_rate, 3)}
+        self._file.write(json.dumps(record) + "\n")
+
+    def write_summary(self, scheduler):
+        self._file.write(json.dumps({"summary": scheduler.name, "channels": scheduler.summary()}) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ChannelScheduler:
+    """Pick the next channel and its dwell time from the activity seen so far.
+
+    Every channel is visited once first, for min_dwell. After that, a channel
+    that has not been visited for max_revisit seconds goes next, which bounds
+    how stale any channel can get. Otherwise the channel with the highest
+    (new-device rate + frame rate / FRAMES_PER_DEVICE) x seconds since its
+    last visit wins: roughly the discoveries waiting there. Dwell grows with
+    the channel's frame rate, so busy channels are listened to long enough to
+    hear their quieter stations and empty ones cost only min_dwell.
+    """
+
+    name = "adaptive"
+
+    def __init__(self, channels, min_dwell=MIN_DWELL, max_dwell=MAX_DWELL, max_revisit=MAX_REVISIT,
+                 alpha=RATE_ALPHA, log=None, clock=time.monotonic):
+        if not channels:
+            raise ValueError("no channels to schedule")
+        self.channels = list(channels)
+        self.min_dwell = min_dwell
+        self.max_dwell = max_dwell
+        self.max_revisit = max_revisit
+        self.alpha = alpha
+        self.log = log
+        self.clock = clock
+        self.stats = {channel: ChannelStats(channel) for channel in self.channels}
+        self.current = None
+
+    def dwell_for(self, stats):
+        busy = stats.frame_rate / (stats.frame_rate + HALF_DWELL_FRAME_RATE)
+        return self.min_dwell + busy * (self.max_dwell - self.min_dwell)
+
+    def priority(self, stats, now):
+        age = now - stats.last_visit
+        return (stats.new_rate + stats.frame_rate / FRAMES_PER_DEVICE + RATE_FLOOR) * age
+
+    def next(self, now=None):
+        """The Decision for the next hop"""
+        now = self.clock() if now is None else now
+        unvisited = [s for s in self.stats.values() if s.last_visit is None]
+        if unvisited:
+            stats = unvisited[0]
+            decision = Decision(now, stats.channel, self.min_dwell, "first", 0.0)
+        else:
+            overdue = max(self.stats.values(), key=lambda s: now - s.last_visit)
+            if now - overdue.last_visit >= self.max_revisit:
+                decision = Decision(now, overdue.channel, self.dwell_for(overdue), "revisit",
+                                    self.priority(overdue, now))
+            else:
+                stats = max(self.stats.values(), key=lambda s: self.priority(s, now))
+                decision = Decision(now, stats.channel, self.dwell_for(stats), "activity",
+                                    self.priority(stats, now))
+        self.current = decision
+        return decision
+
+    def record(self, decision, frames, new, now=None):
+        """What a dwell produced: frames heard and devices seen for the first time"""
+        now = self.clock() if now is None else now
+        stats = self.stats[decision.channel]
+        stats.record(max(now - decision.time, 1e-3), frames, new, self.alpha)
+        stats.last_visit = now
+        if self.log is not None:
+            self.log.write(decision, frames, new, stats)
+
+    def summary(self):
+        return [self.stats[channel].to_dict() for channel in self.channels]
+
+
+class FixedScheduler(ChannelScheduler):
+    """Round-robin over the channels with a constant dwell, like airodump-ng's own hopping"""
+
+    name = "fixed"
+
+    def __init__(self, channels, dwell=FIXED_DWELL, log=None, clock=time.monotonic):
+        super().__init__(channels, dwell, dwell, float("inf"), log=log, clock=clock)
+        self._index = 0
+
+    def next(self, now=None):
+        now = self.clock() if now is None else now
+        channel = self.channels[self._index % len(self.channels)]
+        self._index += 1
+        self.current = Decision(now, channel, self.min_dwell, "fixed", 0.0)
+        return self.current
+
+
+class SlicedScheduler(ChannelScheduler):
+    """Every channel in turn, each for its share of a fixed cycle.
+
+    A channel's slice is cycle x its weight / the total weight, and never
+    shorter than min_dwell. Recon on several networks weights a channel by
+    the targets on it, so each target is heard once per cycle however the
+    others behave.
+    """
+
+    name = "sliced"
+
+    def __init__(self, channels, weights=None, cycle=SLICE_CYCLE, min_dwell=MIN_DWELL, log=None,
+                 clock=time.monotonic):
+        super().__init__(channels, min_dwell, cycle, float("inf"), log=log, clock=clock)
+        weights = weights or {}
+        total = sum(weights.get(channel, 1) for channel in self.channels)
+        self.slices = {channel: max(min_dwell, cycle * weights.get(channel, 1) / total)
+                       for channel in self.channels}
+        self._index = 0
+
+    def next(self, now=None):
+        now = self.clock() if now is None else now
+        channel = self.channels[self._index % len(self.channels)]
+        self._index += 1
+        self.current = Decision(now, channel, self.slices[channel], "slice", 0.0)
+        return self.current
+
+
+SCHEDULERS = {"adaptive": ChannelScheduler, "fixed": FixedScheduler, "sliced": SlicedScheduler}
+
+
+# linux/netlink.h, linux/genetlink.h and linux/nl80211.h
+NETLINK_GENERIC = 16
+NLM_F_REQUEST = 0x1
+NLM_F_ACK = 0x4
+NLMSG_ERROR = 2
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+NL80211_CMD_SET_WIPHY = 2
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_WIPHY_FREQ = 38
+
+_NLMSG_HEADER = struct.Struct("=IHHII")
+_GENL_HEADER = struct.Struct("=BBH")
+_NLATTR = struct.Struct("=HH")
+
+
+def _attr(kind, payload):
+    data = _NLATTR.pack(_NLATTR.size + len(payload), kind) + payload
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _attrs(data, offset):
+    attrs = {}
+    while offset + _NLATTR.size <= len(data):
+        length, kind = _NLATTR.unpack_from(data, offset)
+        if length < _NLATTR.size:
+            break
+        attrs[kind & 0x3FFF] = data[offset + _NLATTR.size:offset + length]
+        offset += (length + 3) & ~3
+    return attrs
+
+
+class Nl80211:
+    """Just enough of nl80211 over generic netlink to tune an interface.
+
+    Setting the channel this way is one request and its ack on an open socket,
+    instead of a fork/exec of iw for every hop. Needs CAP_NET_ADMIN.
+    """
+
+    def __init__(self):
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+        self._socket.bind((0, 0))
+        self._seq = 0
+        try:
+            reply = self._request(GENL_ID_CTRL, CTRL_CMD_GETFAMILY, _attr(CTRL_ATTR_FAMILY_NAME, b"nl80211\0"), ack=False)
+            family = _attrs(reply, _NLMSG_HEADER.size + _GENL_HEADER.size).get(CTRL_ATTR_FAMILY_ID)
+            if family is None:
+                raise OSError("nl80211 family not found")
+            self.family = struct.unpack("=H", family[:2])[0]
+        except Exception:
+            self.close()
+            raise
+
+    def _request(self, family, command, payload, ack=True):
+        self._seq += 1
+        body = _GENL_HEADER.pack(command, 1, 0) + payload
+        flags = NLM_F_REQUEST | (NLM_F_ACK if ack else 0)
+        self._socket.send(_NLMSG_HEADER.pack(_NLMSG_HEADER.size + len(body), family, flags, self._seq, 0) + body)
+        while True:
+            reply = self._socket.recv(65536)
+            _length, kind, _flags, seq, _pid = _NLMSG_HEADER.unpack_from(reply, 0)
+            if seq != self._seq:
+                continue
+            if kind == NLMSG_ERROR:
+                error = struct.unpack_from("=i", reply, _NLMSG_HEADER.size)[0]
+                if error:
+                    raise OSError(-error, os.strerror(-error))
+            return reply
+
+    def set_channel(self, ifindex, channel):
+        payload = _attr(NL80211_ATTR_IFINDEX, struct.pack("=I", ifindex)) + \
+                  _attr(NL80211_ATTR_WIPHY_FREQ, struct.pack("=I", channel_to_freq(channel)))
+        self._request(self.family, NL80211_CMD_SET_WIPHY, payload)
+
+    def close(self):
+        self._socket.close()
+
+
+class ChannelTuner:
+    """Tune a monitor interface, through nl80211 when possible and iw otherwise"""
+
+    def __init__(self, interface, engine):
+        self.interface = interface
+        self.engine = engine
+        self.nl80211 = None
+        try:
+            self.nl80211 = Nl80211()
+            self.ifindex = socket.if_nametoindex(interface)
+        except (OSError, AttributeError) as e:
+            print(f"nl80211 unavailable for {interface}, tuning with iw: {e}")
+            self.close()
+
+    async def set_channel(self, channel):
+        if self.nl80211 is not None:
+            try:
+                self.nl80211.set_channel(self.ifindex, channel)
+                return
+            except OSError as e:
+                print(f"nl80211 could not tune {self.interface} to {channel}, using iw: {e}")
+                self.close()
+        result = await self.engine.run(["sudo", "iw", "dev", self.interface, "set", "channel", str(channel)],
+                                       timeout=5)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"could not set channel {channel}")
+
+    def close(self):
+        if self.nl80211 is not None:
+            self.nl80211.close()
+            self.nl80211 = None
+
+
+class ChannelHopper:
+    """Drive one adapter through a scheduler, feeding each dwell's capture back to it.
+
+    The reader is a CaptureReader on the adapter; its deltas go to on_delta
+    and its counts to the scheduler. Frames still queued in the capture ring
+    when the channel changes count towards the next channel, which the short
+    ring block timeout keeps small.
+    """
+
+    def __init__(self, scheduler, tuner, reader, on_delta=None):
+        self.scheduler = scheduler
+        self.tuner = tuner
+        self.reader = reader
+        self.on_delta = on_delta
+        self.hops = 0
+        # Stretches every dwell, fewer hops when the CPU has to shed load
+        self.dwell_scale = 1.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                decision = self.scheduler.next()
+                if self.dwell_scale != 1.0:
+                    decision = decision._replace(dwell=decision.dwell * self.dwell_scale)
+                await self.tuner.set_channel(decision.channel)
+                await asyncio.sleep(decision.dwell)
+
+                frames_before = self.reader.source.frames_read
+                delta = await loop.run_in_executor(None, self.reader.poll)
+                frames = self.reader.source.frames_read - frames_before
+                new = 0
+                if delta is not None:
+                    new = len(delta.aps.added) + len(delta.stations.added)
+                    if self.on_delta is not None:
+                        self.on_delta(delta)
+                self.scheduler.record(decision, frames, new)
+                self.hops += 1
+        finally:
+            if self.scheduler.log is not None:
+                self.scheduler.log.write_summary(self.scheduler)
@@ -0,0 +1,44 @@
+# 2.4 GHz channels 1-13 and the 20 MHz 5 GHz channels, by airodump-ng --band letter
+CHANNELS_24GHZ = tuple(range(1, 14))
+CHANNELS_5GHZ = (36, 40, 44, 48, 52, 56, 60, 64, 100, 104, 108, 112, 116, 120, 124, 128, 132, 136, 140,
+                 144, 149, 153, 157, 161, 165)
+BAND_CHANNELS = {"b": CHANNELS_24GHZ, "g": CHANNELS_24GHZ, "a": CHANNELS_5GHZ}
+
+# airodump-ng hops over 2.4 GHz unless told otherwise
+DEFAULT_BANDS = "bg"
+
+# Busiest channels first, so each adapter of a split sweep gets a fair share of them
+PREFERRED_CHANNELS = (1, 6, 11, 36, 149, 44, 157, 3, 9)
+
+
+def band_channels(bands=DEFAULT_BANDS):
+    """Channels of the bands in an airodump-ng style band string such as "abg" """
+    channels = []
+    for band in bands:
+        for channel in BAND_CHANNELS.get(band, ()):
+            if channel not in channels:
+                channels.append(channel)
+    return channels
+
+
+def partition_channels(channels, count):
+    """Split channels into count disjoint hop lists of nearly equal length.
+
+    Channels are dealt round-robin after moving the preferred ones to the
+    front, so the busy 1/6/11 end up on different adapters and no adapter
+    spends its whole dwell budget on empty channels. Each list comes back
+    sorted.
+    """
+    if count <= 0:
+        return []
+    ordered = [c for c in PREFERRED_CHANNELS if c in channels] + \
+              [c for c in channels if c not in PREFERRED_CHANNELS]
+    parts = [[] for _ in range(count)]
+    for i, channel in enumerate(ordered):
+        parts[i % count].append(channel)
+    return [sorted(part) for part in parts]
+
+
+def format_channels(channels):
+    """Channel list as airodump-ng's -c argument"""
+    return ",".join(str(c) for c in channels)
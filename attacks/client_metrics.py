@@ -0,0 +1,241 @@
+import heapq
+import math
+import time
+from collections import namedtuple
+
+from .compact import int_to_mac
+
+# NumPy is optional: with it every update is one vectorized step over all
+# clients, without it the same columns are plain lists
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Ticks of packet counts kept per client; a rate spans the whole window
+METRICS_WINDOW = 10
+# Weight of the newest RSSI sample in the moving average and variance
+RSSI_ALPHA = 0.2
+# Client rows are allocated this many at a time, then doubled
+METRICS_CAPACITY = 256
+# Clients listed in the recon page's most active section
+TOP_CLIENTS = 5
+
+# Live activity of one client: packets per second over the window, smoothed
+# RSSI and its standard deviation (None before any reading), seconds since
+# its record last changed and its cumulative packet count
+ClientActivity = namedtuple("ClientActivity", ["mac_id", "rate", "rssi", "rssi_std", "age", "packets"])
+
+
+def _valid_power(power):
+    # airodump-ng reports -1 when it has no reading
+    return power is not None and power < -1
+
+
+def format_activity(activity):
+    """List text for a ClientActivity"""
+    text = f"{int_to_mac(activity.mac_id)} {activity.rate:.1f} pkt/s"
+    if activity.rssi is not None:
+        text += f", {activity.rssi:.0f}±{activity.rssi_std:.1f} dBm"
+    return text + f", {activity.age:.0f}s ago"
+
+
+class ClientMetrics:
+    """Rolling per-client packet rate, RSSI EWMA/variance and last-seen age.
+
+    Every client owns a row in fixed-width columns. observe() writes the
+    cumulative packet count and folds the RSSI reading into the moving
+    average of the records that changed; tick() copies the packet column into
+    a ring of the last window ticks, so a rate is the difference to the
+    oldest column over the time between the two. Nothing is recomputed from
+    history, and a client that shows up mid-window is measured from its
+    first tick. Clients not seen for stale_after seconds are dropped.
+    """
+
+    def __init__(self, window=METRICS_WINDOW, alpha=RSSI_ALPHA, stale_after=None, capacity=METRICS_CAPACITY,
+                 clock=time.monotonic):
+        self.window = window
+        self.alpha = alpha
+        self.stale_after = stale_after
+        self.clock = clock
+        self.ticks = 0
+        # mac_id -> row, and the rows free for reuse
+        self._slots = {}
+        self._free = []
+        self._capacity = 0
+        if np is not None:
+            self._times = np.full(window, np.nan)
+        else:
+            self._times = [math.nan] * window
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, mac_id):
+        return mac_id in self._slots
+
+    def _grow(self, capacity):
+        old = self._capacity
+        extra = capacity - old
+        if np is not None:
+            def extend(column, dtype=np.float64):
+                return np.concatenate((column, np.zeros(extra, dtype))) if old else np.zeros(capacity, dtype)
+            self._packets = extend(getattr(self, "_packets", None))
+            self._last_seen = extend(getattr(self, "_last_seen", None))
+            self._rssi = extend(getattr(self, "_rssi", None))
+            self._rssi_var = extend(getattr(self, "_rssi_var", None))
+            self._rate = extend(getattr(self, "_rate", None))
+            self._samples = extend(getattr(self, "_samples", None), np.int64)
+            self._first_tick = extend(getattr(self, "_first_tick", None), np.int64)
+            ring = np.zeros((capacity, self.window))
+            if old:
+                ring[:old] = self._ring
+            self._ring = ring
+        else:
+            if not old:
+                self._packets, self._last_seen, self._rssi, self._rssi_var, self._rate = [], [], [], [], []
+                self._samples, self._first_tick, self._ring = [], [], []
+            for column in (self._packets, self._last_seen, self._rssi, self._rssi_var, self._rate,
+                           self._samples, self._first_tick):
+                column.extend([0] * extra)
+            self._ring.extend([0] * self.window for _ in range(extra))
+        # Lowest rows are handed out first
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self._capacity = capacity
+
+    def _slot(self, mac_id):
+        row = self._slots.get(mac_id)
+        if row is not None:
+            return row
+        if not self._free:
+            self._grow(self._capacity * 2)
+        row = self._free.pop()
+        self._slots[mac_id] = row
+        self._packets[row] = 0
+        self._rssi[row] = 0
+        self._rssi_var[row] = 0
+        self._rate[row] = 0
+        self._samples[row] = 0
+        self._first_tick[row] = self.ticks
+        if np is None:
+            self._ring[row] = [0] * self.window
+        return row
+
+    def observe(self, stations, now=None):
+        """Record the current packet count and signal of changed station records"""
+        now = self.clock() if now is None else now
+        rows, packets, powers = [], [], []
+        for station in stations:
+            rows.append(self._slot(station.mac_id))
+            packets.append(station.packets or 0)
+            powers.append(station.power if _valid_power(station.power) else math.nan)
+        if not rows:
+            return
+
+        if np is not None:
+            rows = np.array(rows, dtype=np.intp)
+            self._packets[rows] = packets
+            self._last_seen[rows] = now
+            power = np.array(powers)
+            valid = ~np.isnan(power)
+            rows, power = rows[valid], power[valid]
+            # West's incremental EWMA variance; a first reading starts the average
+            first = self._samples[rows] == 0
+            mean = np.where(first, power, self._rssi[rows])
+            diff = power - mean
+            step = self.alpha * diff
+            self._rssi[rows] = mean + step
+            self._rssi_var[rows] = np.where(first, 0.0, (1 - self.alpha) * (self._rssi_var[rows] + diff * step))
+            self._samples[rows] += 1
+            return
+
+        for row, count, power in zip(rows, packets, powers):
+            self._packets[row] = count
+            self._last_seen[row] = now
+            if math.isnan(power):
+                continue
+            if self._samples[row] == 0:
+                self._rssi[row] = power
+            else:
+                diff = power - self._rssi[row]
+                step = self.alpha * diff
+                self._rssi[row] += step
+                self._rssi_var[row] = (1 - self.alpha) * (self._rssi_var[row] + diff * step)
+            self._samples[row] += 1
+
+    def forget(self, mac_ids):
+        """Drop clients, their rows are reused"""
+        for mac_id in mac_ids:
+            row = self._slots.pop(mac_id, None)
+            if row is not None:
+                self._free.append(row)
+
+    def apply(self, delta, accept=None, now=None):
+        """observe() the stations of a capture delta, only those accept(station) is true for"""
+        changed = list(delta.stations.added.values()) + list(delta.stations.updated.values())
+        self.forget(delta.stations.removed)
+        if accept is not None:
+            self.forget([station.mac_id for station in changed if not accept(station)])
+            changed = [station for station in changed if accept(station)]
+        self.observe(changed, now)
+
+    def tick(self, now=None):
+        """Close one tick: push the packet counts into the ring and update every rate"""
+        now = self.clock() if now is None else now
+        column = self.ticks % self.window
+        self._times[column] = now
+        oldest = max(0, self.ticks - self.window + 1)
+
+        if np is not None:
+            self._ring[:, column] = self._packets
+            base = np.maximum(self._first_tick, oldest) % self.window
+            baseline = self._ring[np.arange(self._capacity), base]
+            span = now - self._times[base]
+            grown = np.maximum(self._packets - baseline, 0.0)
+            self._rate = np.divide(grown, span, out=np.zeros(self._capacity), where=span > 0)
+        else:
+            for row in self._slots.values():
+                self._ring[row][column] = self._packets[row]
+                base = max(self._first_tick[row], oldest) % self.window
+                span = now - self._times[base]
+                grown = max(self._packets[row] - self._ring[row][base], 0)
+                self._rate[row] = grown / span if span > 0 else 0.0
+        self.ticks += 1
+
+        if self.stale_after is not None:
+            cutoff = now - self.stale_after
+            self.forget([mac_id for mac_id, row in self._slots.items() if self._last_seen[row] < cutoff])
+
+    def get(self, mac_id, now=None):
+        """ClientActivity of a client, None when it is not tracked"""
+        row = self._slots.get(mac_id)
+        if row is None:
+            return None
+        return self._activity(mac_id, row, self.clock() if now is None else now)
+
+    def top(self, k=TOP_CLIENTS, now=None):
+        """The k clients with the highest packet rate, busiest first"""
+        now = self.clock() if now is None else now
+        if not self._slots or k <= 0:
+            return []
+        macs = list(self._slots)
+        if np is not None:
+            rows = np.fromiter(self._slots.values(), dtype=np.intp, count=len(macs))
+            rates = self._rate[rows]
+            if len(macs) > k:
+                best = np.argpartition(-rates, k - 1)[:k]
+            else:
+                best = np.arange(len(macs))
+            best = best[np.argsort(-rates[best], kind="stable")]
+            return [self._activity(macs[i], int(rows[i]), now) for i in best]
+        best = heapq.nlargest(k, self._slots.items(), key=lambda item: self._rate[item[1]])
+        return [self._activity(mac_id, row, now) for mac_id, row in best]
+
+    def _activity(self, mac_id, row, now):
+        rssi = rssi_std = None
+        if self._samples[row]:
+            rssi = float(self._rssi[row])
+            rssi_std = math.sqrt(max(float(self._rssi_var[row]), 0.0))
+        return ClientActivity(mac_id, float(self._rate[row]), rssi, rssi_std,
+                              max(0.0, now - float(self._last_seen[row])), int(self._packets[row]))
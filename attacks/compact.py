@@ -0,0 +1,201 @@
+import sys
+from datetime import datetime
+
+from .airodump_csv import AccessPoint, Station
+
+# Station BSSID column values that are not a MAC address
+NOT_ASSOCIATED = -1
+NOT_ASSOCIATED_TEXT = "(not associated)"
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Values that repeat across many records (BSSIDs, timestamps, signal levels,
+# probe lists) are shared through this cache instead of being stored per record
+SHARED_CACHE_SIZE = 65536
+_shared = {}
+
+
+def mac_to_int(mac):
+    """Convert "AA:BB:CC:DD:EE:FF" (or with dashes) to a 48-bit integer, None if invalid"""
+    try:
+        value = int(mac.replace(":", "").replace("-", ""), 16)
+    except (AttributeError, ValueError):
+        return None
+    return value if value < (1 << 48) else None
+
+
+def int_to_mac(value):
+    """Convert a 48-bit integer back to "AA:BB:CC:DD:EE:FF" """
+    text = f"{value:012X}"
+    return ":".join(text[i:i + 2] for i in range(0, 12, 2))
+
+
+def intern_text(value):
+    """Share one copy of repeated strings such as SSIDs, probes and cipher names"""
+    return sys.intern(value) if value else ""
+
+
+def share(value):
+    """Return a shared instance equal to value"""
+    if value is None:
+        return None
+    if len(_shared) >= SHARED_CACHE_SIZE:
+        _shared.clear()
+    return _shared.setdefault(value, value)
+
+
+def parse_time(value):
+    """airodump-ng timestamp to integer epoch seconds, None if blank"""
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def format_time(value):
+    return datetime.fromtimestamp(value).strftime(TIME_FORMAT) if value is not None else ""
+
+
+def _bssid_to_id(bssid):
+    """Station BSSID column to int, None when blank and NOT_ASSOCIATED when not associated"""
+    if not bssid:
+        return None
+    value = mac_to_int(bssid)
+    return NOT_ASSOCIATED if value is None else value
+
+
+class CompactStation:
+    """Station record for long sessions: MACs as ints, times as epoch seconds, interned probes.
+
+    Exposes the same attribute names as airodump_csv.Station, so display code
+    can use either; the string forms are built on access.
+    """
+
+    __slots__ = ("mac_id", "bssid_id", "first_seen_ts", "last_seen_ts", "power", "packets", "probes")
+
+    def __init__(self, mac_id, bssid_id=None, first_seen_ts=None, last_seen_ts=None,
+                 power=None, packets=None, probes=()):
+        self.mac_id = mac_id
+        self.bssid_id = bssid_id
+        self.first_seen_ts = first_seen_ts
+        self.last_seen_ts = last_seen_ts
+        self.power = power
+        self.packets = packets
+        self.probes = probes
+
+    @classmethod
+    def from_record(cls, station):
+        return cls(
+            mac_to_int(station.mac),
+            share(_bssid_to_id(station.bssid)),
+            share(parse_time(station.first_seen)),
+            share(parse_time(station.last_seen)),
+            share(station.power),
+            station.packets,
+            share(tuple(intern_text(p) for p in station.probes or ())),
+        )
+
+    @property
+    def mac(self):
+        return int_to_mac(self.mac_id)
+
+    @property
+    def bssid(self):
+        if self.bssid_id is None:
+            return ""
+        if self.bssid_id == NOT_ASSOCIATED:
+            return NOT_ASSOCIATED_TEXT
+        return int_to_mac(self.bssid_id)
+
+    @property
+    def first_seen(self):
+        return format_time(self.first_seen_ts)
+
+    @property
+    def last_seen(self):
+        return format_time(self.last_seen_ts)
+
+    def to_record(self):
+        """Expand back into an airodump_csv.Station"""
+        return Station(self.mac, self.first_seen, self.last_seen, self.power,
+                       self.packets, self.bssid, self.probes)
+
+    def __repr__(self):
+        return f"CompactStation({self.mac}, bssid={self.bssid!r}, power={self.power}, packets={self.packets})"
+
+
+class CompactAccessPoint:
+    """AccessPoint record with the BSSID as an int, epoch times and interned text fields"""
+
+    __slots__ = ("bssid_id", "first_seen_ts", "last_seen_ts", "channel", "speed", "privacy",
+                 "cipher", "authentication", "power", "beacons", "iv", "lan_ip", "id_length",
+                 "essid", "key")
+
+    def __init__(self, bssid_id, first_seen_ts=None, last_seen_ts=None, channel=None, speed=None,
+                 privacy="", cipher="", authentication="", power=None, beacons=None, iv=None,
+                 lan_ip="", id_length=None, essid="", key=""):
+        self.bssid_id = bssid_id
+        self.first_seen_ts = first_seen_ts
+        self.last_seen_ts = last_seen_ts
+        self.channel = channel
+        self.speed = speed
+        self.privacy = privacy
+        self.cipher = cipher
+        self.authentication = authentication
+        self.power = power
+        self.beacons = beacons
+        self.iv = iv
+        self.lan_ip = lan_ip
+        self.id_length = id_length
+        self.essid = essid
+        self.key = key
+
+    @classmethod
+    def from_record(cls, ap):
+        return cls(
+            mac_to_int(ap.bssid),
+            share(parse_time(ap.first_seen)),
+            share(parse_time(ap.last_seen)),
+            ap.channel,
+            ap.speed,
+            intern_text(ap.privacy),
+            intern_text(ap.cipher),
+            intern_text(ap.authentication),
+            share(ap.power),
+            ap.beacons,
+            ap.iv,
+            intern_text(ap.lan_ip),
+            ap.id_length,
+            intern_text(ap.essid),
+            intern_text(ap.key),
+        )
+
+    @property
+    def bssid(self):
+        return int_to_mac(self.bssid_id)
+
+    @property
+    def first_seen(self):
+        return format_time(self.first_seen_ts)
+
+    @property
+    def last_seen(self):
+        return format_time(self.last_seen_ts)
+
+    def to_record(self):
+        """Expand back into an airodump_csv.AccessPoint"""
+        return AccessPoint(self.bssid, self.first_seen, self.last_seen, self.channel, self.speed,
+                           self.privacy, self.cipher, self.authentication, self.power, self.beacons,
+                           self.iv, self.lan_ip, self.id_length, self.essid, self.key)
+
+    def __repr__(self):
+        return f"CompactAccessPoint({self.bssid}, essid={self.essid!r}, channel={self.channel}, power={self.power})"
+
+
+def compact_record(record):
+    """Convert a parsed AccessPoint or Station into its compact form, None if the MAC is invalid"""
+    if isinstance(record, Station):
+        compact = CompactStation.from_record(record)
+        return compact if compact.mac_id is not None else None
+    compact = CompactAccessPoint.from_record(record)
+    return compact if compact.bssid_id is not None else None
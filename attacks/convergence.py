@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import namedtuple
+
+from .csv_reader import IncrementalCsvReader
+
+# Summary of one scan: how long it took, how many BSSIDs it found and the
+# discovery curve as (seconds since start, BSSIDs known) points
+ScanReport = namedtuple("ScanReport", ["duration", "total", "curve", "converged", "time_saved"])
+
+# Defaults used by the scan pages
+SCAN_MAX_TIME = 30.0
+SCAN_CONFIDENCE = 0.95
+# What a scan took before it stopped on convergence, time_saved is measured against it
+FIXED_SCAN_TIME = 5.0
+
+
+class DiscoveryTracker:
+    """Watch the rate at which new BSSIDs show up and decide when a scan has converged.
+
+    The scan is considered stable once the BSSIDs discovered during the last
+    window make up no more than (1 - confidence) of everything found so far.
+    The first full window is the earliest that can happen, so a quiet site is
+    done after max(min_time, window) seconds. Nothing seen yet is never
+    stable: a capture that has not written a row runs until max_time.
+    """
+
+    def __init__(self, max_time=SCAN_MAX_TIME, confidence=SCAN_CONFIDENCE, min_time=2.0, window=3.0):
+        self.max_time = max_time
+        self.confidence = confidence
+        self.min_time = min_time
+        self.window = window
+        self.start()
+
+    def start(self, now=None):
+        """Reset the tracker and start the clock"""
+        self.started_at = now if now is not None else time.monotonic()
+        self.seen = set()
+        # (elapsed, total) each time the total grows
+        self.curve = [(0.0, 0)]
+
+    def elapsed(self, now=None):
+        """Seconds since start()"""
+        return (now if now is not None else time.monotonic()) - self.started_at
+
+    def observe(self, bssids, now=None):
+        """Record BSSIDs seen in the latest read, returns how many were new"""
+        before = len(self.seen)
+        self.seen.update(bssids)
+        new = len(self.seen) - before
+        if new:
+            self.curve.append((round(self.elapsed(now), 2), len(self.seen)))
+        return new
+
+    def recent_discoveries(self, now=None):
+        """Number of BSSIDs first seen during the last window"""
+        cutoff = self.elapsed(now) - self.window
+        baseline = 0
+        for elapsed, total in self.curve:
+            if elapsed > cutoff:
+                break
+            baseline = total
+        return len(self.seen) - baseline
+
+    def converged(self, now=None):
+        """True once the AP set has stopped growing faster than the confidence target allows"""
+        if not self.seen or self.elapsed(now) < max(self.min_time, self.window):
+            return False
+        return self.recent_discoveries(now) <= (1 - self.confidence) * max(len(self.seen), 1)
+
+    def done(self, now=None):
+        """True when the scan should stop, either converged or out of time"""
+        return self.converged(now) or self.elapsed(now) >= self.max_time
+
+    def report(self, now=None):
+        """Build a ScanReport for the scan so far"""
+        duration = self.elapsed(now)
+        return ScanReport(
+            duration=duration,
+            total=len(self.seen),
+            curve=list(self.curve),
+            converged=self.converged(now),
+            time_saved=max(0.0, FIXED_SCAN_TIME - duration),
+        )
+
+
+def format_report(report):
+    """Short human readable summary of a ScanReport for the status line"""
+    state = "stable" if report.converged else "time limit"
+    return f"{report.duration:.1f}s, {state}, {report.time_saved:.1f}s saved"
+
+
+async def wait_for_csv_convergence(csv_path, tracker, interval=0.5):
+    """Follow a growing airodump-ng CSV until the tracker is done, returns a ScanReport"""
+    loop = asyncio.get_running_loop()
+    reader = IncrementalCsvReader(csv_path)
+    tracker.start()
+    while not tracker.done():
+        await asyncio.sleep(interval)
+        # Reading and diffing the file happens off the loop
+        delta = await loop.run_in_executor(None, reader.poll)
+        if delta is not None:
+            tracker.observe(delta.aps.added)
+    return tracker.report()
@@ -0,0 +1,178 @@
+import os
+from collections import namedtuple
+
+from .airodump_csv import SectionParser
+from .compact import compact_record, mac_to_int
+
+# Changes between two reads of one section of the airodump-ng CSV.
+# added/updated map row key -> parsed record, removed is a list of keys.
+TableDelta = namedtuple("TableDelta", ["added", "updated", "removed"])
+
+# Changes for both sections of the CSV file
+CsvDelta = namedtuple("CsvDelta", ["aps", "stations"])
+
+AP_HEADER = b"BSSID"
+STATION_HEADER = b"Station MAC"
+
+
+def _common_prefix_len(old, new):
+    """Return the number of leading bytes shared by old and new"""
+    limit = min(len(old), len(new))
+    if old[:limit] == new[:limit]:
+        return limit
+
+    # Binary search on slice equality, which runs in C and avoids a Python loop per byte
+    low, high = 0, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[:mid] == new[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class IncrementalCsvReader:
+    """Incrementally read an airodump-ng CSV file and report row-level changes.
+
+    airodump-ng rewrites its CSV in place every few seconds. The reader keeps the
+    file signature, the previous contents and a hash for every row so that a poll
+    on an unchanged file costs a single stat() and only rows that actually changed
+    are parsed again.
+
+    With compact=True rows are keyed by the MAC as an int and records are
+    CompactAccessPoint/CompactStation, which keeps long sessions small.
+    """
+
+    def __init__(self, path, compact=False):
+        self.path = path
+        self.compact = compact
+        self.reset()
+
+    def reset(self):
+        """Forget everything seen so far so the next poll reports a full resync"""
+        self._signature = None
+        self._content = b""
+        # Byte offset where the station section starts in the last good read
+        self._station_offset = None
+        # key -> (row hash, parsed record) for each section
+        self._aps = {}
+        self._stations = {}
+
+    @property
+    def access_points(self):
+        """Current AccessPoint records keyed by BSSID"""
+        return {key: record for key, (_, record) in self._aps.items()}
+
+    @property
+    def stations(self):
+        """Current Station records keyed by station MAC"""
+        return {key: record for key, (_, record) in self._stations.items()}
+
+    def close(self):
+        """Nothing is held open between polls; here for the CaptureReader interface"""
+
+    def poll(self):
+        """Check the file and return a CsvDelta, or None when nothing changed"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if signature == self._signature:
+            return None
+
+        # A new inode or a shorter file means airodump-ng started over
+        if self._signature and (st.st_ino != self._signature[0] or st.st_size < len(self._content)):
+            self._content = b""
+            self._station_offset = None
+
+        with open(self.path, "rb") as f:
+            content = f.read()
+
+        # airodump-ng may be halfway through rewriting the file; wait for a complete copy
+        station_offset = content.find(STATION_HEADER)
+        if station_offset < 0 or not content.endswith(b"\n"):
+            return None
+
+        # Rows that sit entirely inside the unchanged prefix of the AP section keep their hashes
+        prefix = _common_prefix_len(self._content, content)
+        if self._station_offset != station_offset:
+            prefix = min(prefix, station_offset)
+
+        ap_delta = self._diff_section(
+            content, 0, station_offset, AP_HEADER, self._aps, prefix
+        )
+        station_delta = self._diff_section(
+            content, station_offset, len(content), STATION_HEADER, self._stations, prefix
+        )
+
+        self._signature = signature
+        self._content = content
+        self._station_offset = station_offset
+
+        if not any(ap_delta) and not any(station_delta):
+            return None
+        return CsvDelta(ap_delta, station_delta)
+
+    def _diff_section(self, content, start, end, header, table, unchanged_until):
+        """Compare one section with the stored rows and update the table in place"""
+        added = {}
+        updated = {}
+        seen = set()
+        parser = None
+
+        offset = start
+        while offset < end:
+            line_end = content.find(b"\n", offset, end)
+            if line_end < 0:
+                line_end = end
+            line = content[offset:line_end].rstrip(b"\r")
+            offset = line_end + 1
+
+            if not line.strip():
+                continue
+            if line.startswith(header):
+                # Columns are mapped from the header, so the parser follows airodump-ng's layout
+                parser = SectionParser(line.decode("utf-8", "ignore"))
+                continue
+            if parser is None:
+                continue
+
+            key = line[:line.find(b",")].strip() if b"," in line else b""
+            if not key:
+                continue
+            key = key.decode("ascii", "ignore")
+            if self.compact:
+                key = mac_to_int(key)
+                if key is None:
+                    continue
+            seen.add(key)
+
+            # Lines whose newline is inside the shared prefix are byte-identical to the last read
+            if line_end < unchanged_until and key in table:
+                continue
+
+            row_hash = hash(line)
+            previous = table.get(key)
+            if previous is not None and previous[0] == row_hash:
+                continue
+
+            record = parser.parse(line.decode("utf-8", "ignore"))
+            if record is not None and self.compact:
+                record = compact_record(record)
+            if record is None:
+                seen.discard(key)
+                continue
+            table[key] = (row_hash, record)
+            if previous is None:
+                added[key] = record
+            else:
+                updated[key] = record
+
+        removed = [key for key in table if key not in seen]
+        for key in removed:
+            del table[key]
+
+        return TableDelta(added, updated, removed)
@@ -0,0 +1,234 @@
+import struct
+from collections import namedtuple
+
+# pcap link types this module understands
+LINKTYPE_IEEE802_11 = 105
+LINKTYPE_IEEE802_11_RADIOTAP = 127
+
+# 802.11 frame types and the management subtypes that matter for recon
+TYPE_MGMT = 0
+TYPE_CTRL = 1
+TYPE_DATA = 2
+SUBTYPE_PROBE_REQ = 4
+SUBTYPE_PROBE_RESP = 5
+SUBTYPE_BEACON = 8
+
+# Information elements
+IE_SSID = 0
+IE_DS_PARAMS = 3
+
+BROADCAST = 0xFFFFFFFFFFFF
+
+# One decoded frame. MACs are 48-bit ints (see attacks.compact), source and
+# destination are the transmitter and receiver, signal is dBm and channel comes
+# from the DS parameter set or the radiotap frequency.
+Frame = namedtuple(
+    "Frame",
+    ["ts", "type", "subtype", "bssid", "source", "destination", "ssid", "channel", "signal", "length"],
+    defaults=[None] * 10,
+)
+
+# Radiotap fields before dBm antenna signal (bit 5): (alignment, size)
+_RADIOTAP_FIELDS = [
+    (8, 8),  # 0 TSFT
+    (1, 1),  # 1 Flags
+    (1, 1),  # 2 Rate
+    (2, 4),  # 3 Channel: frequency, flags
+    (1, 2),  # 4 FHSS
+    (1, 1),  # 5 dBm antenna signal
+]
+_RADIOTAP_FLAG_FCS = 0x10
+
+_u16 = struct.Struct("<H")
+_u32 = struct.Struct("<I")
+
+
+def freq_to_channel(freq):
+    """Centre frequency in MHz to a channel number, None if unknown"""
+    if freq == 2484:
+        return 14
+    if 2412 <= freq < 2484:
+        return (freq - 2407) // 5
+    if 5000 <= freq < 5925:
+        return (freq - 5000) // 5
+    if 5950 <= freq <= 7115:
+        return (freq - 5950) // 5
+    return None
+
+
+def mac_at(buf, offset):
+    """Read a MAC address from a buffer as a 48-bit int"""
+    return int.from_bytes(buf[offset:offset + 6], "big")
+
+
+def parse_radiotap(buf):
+    """Parse a radiotap header, returns (header length, channel, dBm signal, has FCS)"""
+    if len(buf) < 8:
+        return None
+    length = _u16.unpack_from(buf, 2)[0]
+    if length > len(buf):
+        return None
+
+    present = _u32.unpack_from(buf, 4)[0]
+    # Skip extended presence bitmaps; fields start after the last one
+    offset = 8
+    word = present
+    while word & 0x80000000 and offset + 4 <= length:
+        word = _u32.unpack_from(buf, offset)[0]
+        offset += 4
+
+    channel = signal = None
+    flags = 0
+    for bit, (align, size) in enumerate(_RADIOTAP_FIELDS):
+        if not present & (1 << bit):
+            continue
+        offset = (offset + align - 1) & ~(align - 1)
+        if offset + size > length:
+            break
+        if bit == 1:
+            flags = buf[offset]
+        elif bit == 3:
+            channel = freq_to_channel(_u16.unpack_from(buf, offset)[0])
+        elif bit == 5:
+            signal = struct.unpack_from("b", buf, offset)[0]
+        offset += size
+
+    return length, channel, signal, bool(flags & _RADIOTAP_FLAG_FCS)
+
+
+def iter_elements(buf, offset):
+    """Yield (id, memoryview) for each information element from offset on"""
+    end = len(buf)
+    while offset + 2 <= end:
+        element_id = buf[offset]
+        size = buf[offset + 1]
+        start = offset + 2
+        if start + size > end:
+            return
+        yield element_id, buf[start:start + size]
+        offset = start + size
+
+
+def parse_dot11(buf, ts=None, channel=None, signal=None):
+    """Decode the 802.11 header of a frame held in a memoryview, None if it is not useful"""
+    if len(buf) < 10:
+        return None
+    fc = buf[0]
+    frame_type = (fc >> 2) & 0x3
+    subtype = fc >> 4
+    flags = buf[1]
+
+    if frame_type == TYPE_MGMT:
+        if len(buf) < 24:
+            return None
+        destination = mac_at(buf, 4)
+        source = mac_at(buf, 10)
+        bssid = mac_at(buf, 16)
+
+        ssid = None
+        if subtype in (SUBTYPE_BEACON, SUBTYPE_PROBE_RESP, SUBTYPE_PROBE_REQ):
+            # Beacons and probe responses carry timestamp, interval and capabilities first
+            body = 24 if subtype == SUBTYPE_PROBE_REQ else 36
+            for element_id, value in iter_elements(buf, body):
+                if element_id == IE_SSID:
+                    # Hidden networks send a zero-filled or empty SSID
+                    ssid = bytes(value).rstrip(b"\0").decode("utf-8", "replace")
+                elif element_id == IE_DS_PARAMS and len(value) == 1:
+                    channel = value[0]
+        return Frame(ts, frame_type, subtype, bssid, source, destination, ssid, channel, signal, len(buf))
+
+    if frame_type == TYPE_DATA:
+        if len(buf) < 24:
+            return None
+        to_ds = flags & 0x1
+        from_ds = flags & 0x2
+        addr1 = mac_at(buf, 4)
+        addr2 = mac_at(buf, 10)
+        addr3 = mac_at(buf, 16)
+        if to_ds and from_ds:
+            # WDS frames between APs are not client traffic
+            return None
+        if to_ds:
+            bssid = addr1
+        elif from_ds:
+            bssid = addr2
+        else:
+            bssid = addr3
+        # source/destination are the transmitter and receiver on the air
+        return Frame(ts, frame_type, subtype, bssid, addr2, addr1, None, channel, signal, len(buf))
+
+    return None
+
+
+def parse_packet(buf, linktype, ts=None):
+    """Decode one captured packet for a pcap link type, None if unsupported or not useful"""
+    channel = signal = None
+    if linktype == LINKTYPE_IEEE802_11_RADIOTAP:
+        radiotap = parse_radiotap(buf)
+        if radiotap is None:
+            return None
+        length, channel, signal, has_fcs = radiotap
+        buf = buf[length:len(buf) - 4] if has_fcs else buf[length:]
+    elif linktype != LINKTYPE_IEEE802_11:
+        return None
+    return parse_dot11(buf, ts, channel, signal)
+
+
+# --- Encoding, for synthetic captures and tests of the parser ---
+
+def channel_to_freq(channel):
+    if channel == 14:
+        return 2484
+    if 1 <= channel < 14:
+        return 2407 + channel * 5
+    return 5000 + channel * 5
+
+
+def build_radiotap(channel=None, signal=None):
+    """Minimal radiotap header with flags, channel and dBm signal"""
+    present = 0x1 << 1
+    fields = b"\x00"
+    if channel is not None:
+        present |= 1 << 3
+        # Flags is one byte at offset 8, the channel needs 2-byte alignment
+        fields += b"\x00" + struct.pack("<HH", channel_to_freq(channel), 0)
+    if signal is not None:
+        present |= 1 << 5
+        fields += struct.pack("b", signal)
+    return struct.pack("<BBHI", 0, 0, 8 + len(fields), present) + fields
+
+
+def _mac_bytes(mac):
+    return mac.to_bytes(6, "big")
+
+
+def _mgmt_header(subtype, destination, source, bssid):
+    return bytes([subtype << 4, 0]) + b"\x00\x00" + _mac_bytes(destination) + \
+        _mac_bytes(source) + _mac_bytes(bssid) + b"\x00\x00"
+
+
+def _element(element_id, value):
+    return bytes([element_id, len(value)]) + value
+
+
+def build_beacon(bssid, ssid, channel, subtype=SUBTYPE_BEACON, destination=BROADCAST):
+    """Beacon (or probe response) frame with SSID and DS parameter set"""
+    fixed = b"\x00" * 8 + struct.pack("<HH", 100, 0x0431)
+    return _mgmt_header(subtype, destination, bssid, bssid) + fixed + \
+        _element(IE_SSID, ssid.encode("utf-8")) + _element(IE_DS_PARAMS, bytes([channel]))
+
+
+def build_probe_request(source, ssid=""):
+    return _mgmt_header(SUBTYPE_PROBE_REQ, BROADCAST, source, BROADCAST) + \
+        _element(IE_SSID, ssid.encode("utf-8"))
+
+
+def build_data(bssid, station, from_ap=False, payload=b""):
+    """Data frame between a station and its AP, to-DS unless from_ap"""
+    if from_ap:
+        header = bytes([TYPE_DATA << 2, 0x2]) + b"\x00\x00" + _mac_bytes(station) + \
+            _mac_bytes(bssid) + _mac_bytes(bssid)
+    else:
+        header = bytes([TYPE_DATA << 2, 0x1]) + b"\x00\x00" + _mac_bytes(bssid) + \
+            _mac_bytes(station) + _mac_bytes(bssid)
+    return header + b"\x00\x00" + payload
@@ -0,0 +1,335 @@
+import asyncio
+import errno
+import os
+import select
+import socket
+import struct
+import threading
+from collections import namedtuple
+
+from .packet_ring import ARPHRD_IEEE80211, ARPHRD_IEEE80211_RADIOTAP
+
+# Where the kernel lists network interfaces; MELRO_SYSFS_NET points the
+# registry at another tree, such as the fake toolchain's
+SYSFS_NET = "/sys/class/net"
+SYSFS_ENV = "MELRO_SYSFS_NET"
+
+# linux/if_arp.h: hardware types a monitor-mode interface reports
+ARPHRD_IEEE80211_PRISM = 802
+MONITOR_TYPES = (ARPHRD_IEEE80211, ARPHRD_IEEE80211_PRISM, ARPHRD_IEEE80211_RADIOTAP)
+
+# linux/rtnetlink.h
+RTMGRP_LINK = 1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+IFLA_IFNAME = 3
+NLMSG_ERROR = 2
+NLMSG_OVERRUN = 4
+
+# struct nlmsghdr: len, type, flags, seq, pid; struct ifinfomsg: family, type, index, flags, change
+_NLMSG_HEADER = struct.Struct("=IHHII")
+_IFINFO = struct.Struct("=BxHiII")
+_RTATTR = struct.Struct("=HH")
+
+# Rescan interval for sysfs trees the kernel does not send events for
+POLL_INTERVAL = 0.1
+
+# One network interface as sysfs shows it
+Interface = namedtuple("Interface", ["name", "index", "type", "phy", "operstate"])
+
+
+def is_monitor(interface):
+    return interface is not None and interface.type in MONITOR_TYPES
+
+
+def is_wireless(interface):
+    return interface is not None and interface.phy is not None
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_int(path):
+    value = _read(path)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def read_interface(name, sysfs_root=SYSFS_NET):
+    """Interface record for name from sysfs, None when it does not exist"""
+    path = os.path.join(sysfs_root, name)
+    if not os.path.isdir(path):
+        return None
+    phy = _read(os.path.join(path, "phy80211", "name"))
+    if phy is None and os.path.isdir(os.path.join(path, "phy80211")):
+        phy = os.path.basename(os.path.realpath(os.path.join(path, "phy80211")))
+    return Interface(name, _read_int(os.path.join(path, "ifindex")), _read_int(os.path.join(path, "type")),
+                     phy, _read(os.path.join(path, "operstate")) or "unknown")
+
+
+def read_interfaces(sysfs_root=SYSFS_NET):
+    """{name: Interface} for every interface under sysfs_root"""
+    try:
+        names = os.listdir(sysfs_root)
+    except OSError:
+        return {}
+    interfaces = {}
+    for name in names:
+        interface = read_interface(name, sysfs_root)
+        if interface is not None:
+            interfaces[name] = interface
+    return interfaces
+
+
+def parse_link_messages(data):
+    """(message type, ifindex, name) for each RTM_NEWLINK/RTM_DELLINK in a netlink datagram.
+
+    Yields (NLMSG_OVERRUN, None, None) for errors and overruns, after which the
+    caller should rescan everything.
+    """
+    offset = 0
+    while offset + _NLMSG_HEADER.size <= len(data):
+        length, kind, _flags, _seq, _pid = _NLMSG_HEADER.unpack_from(data, offset)
+        if length < _NLMSG_HEADER.size:
+            break
+        end = min(offset + length, len(data))
+        if kind in (NLMSG_ERROR, NLMSG_OVERRUN):
+            yield NLMSG_OVERRUN, None, None
+        elif kind in (RTM_NEWLINK, RTM_DELLINK):
+            body = offset + _NLMSG_HEADER.size
+            _family, _type, index, _flags, _change = _IFINFO.unpack_from(data, body)
+            name = None
+            attr = body + _IFINFO.size
+            while attr + _RTATTR.size <= end:
+                attr_len, attr_type = _RTATTR.unpack_from(data, attr)
+                if attr_len < _RTATTR.size:
+                    break
+                if attr_type == IFLA_IFNAME:
+                    name = bytes(data[attr + _RTATTR.size:attr + attr_len]).split(b"\0", 1)[0].decode(errors="ignore")
+                    break
+                attr += (attr_len + 3) & ~3
+            yield kind, index, name
+        offset += (length + 3) & ~3
+
+
+class InterfaceRegistry:
+    """Live view of the network interfaces, kept current by kernel link events.
+
+    The table is read from sysfs once; after that an rtnetlink socket
+    subscribed to RTMGRP_LINK reports every interface that appears, changes
+    or goes away, and only that interface is re-read. Checking the
+    monitor-mode state is then a dict lookup instead of an ip/iwconfig fork.
+
+    When netlink is unavailable, or sysfs_root is not the kernel's tree (a fake
+    one for tests), the thread rescans sysfs every poll_interval instead.
+    Listeners are called on the registry thread as listener(name, old, new),
+    with None for a missing side.
+    """
+
+    def __init__(self, sysfs_root=None, netlink=None, poll_interval=POLL_INTERVAL):
+        self.sysfs_root = sysfs_root or os.environ.get(SYSFS_ENV) or SYSFS_NET
+        if netlink is None:
+            netlink = self.sysfs_root == SYSFS_NET
+        self.netlink = netlink and hasattr(socket, "AF_NETLINK")
+        self.poll_interval = poll_interval
+        self.events = 0
+        self._interfaces = read_interfaces(self.sysfs_root)
+        self._listeners = []
+        self._lock = threading.Lock()
+        # Notified after every change, for wait_for()
+        self._changed = threading.Condition()
+        self._thread = None
+        self._socket = None
+        self._wake_r = self._wake_w = None
+        self._stop = threading.Event()
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def get(self, name):
+        with self._lock:
+            return self._interfaces.get(name)
+
+    def interfaces(self):
+        with self._lock:
+            return list(self._interfaces.values())
+
+    def names(self):
+        with self._lock:
+            return sorted(self._interfaces)
+
+    def wireless(self):
+        """Interfaces backed by an 802.11 phy, by name"""
+        return sorted((i for i in self.interfaces() if is_wireless(i)), key=lambda i: i.name)
+
+    def monitor_interfaces(self):
+        """Interfaces in monitor mode, by name"""
+        return sorted((i for i in self.interfaces() if is_monitor(i)), key=lambda i: i.name)
+
+    def exists(self, name):
+        return name in self
+
+    def is_monitor(self, name):
+        return is_monitor(self.get(name))
+
+    def is_up(self, name):
+        interface = self.get(name)
+        return interface is not None and interface.operstate in ("up", "unknown")
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def event_driven(self):
+        """True when kernel events keep the table current, False when it is polled"""
+        return self._socket is not None
+
+    def wait_for(self, predicate, timeout=None):
+        """Block until predicate() is truthy after some change, returns its last value.
+
+        predicate is evaluated right away and after each change, so there is no
+        polling delay between the kernel event and the return.
+        """
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+    async def wait_for_async(self, predicate, timeout=None):
+        """wait_for() from a coroutine, on an executor thread"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.wait_for, predicate, timeout)
+
+    def start(self):
+        """Start following link changes, returns self"""
+        if self.running:
+            return self
+        self._stop.clear()
+        if self.netlink:
+            try:
+                self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+                self._socket.bind((0, RTMGRP_LINK))
+            except OSError as e:
+                print(f"Netlink unavailable, polling {self.sysfs_root}: {e}")
+                self._close_socket()
+        if self._socket is not None:
+            self._wake_r, self._wake_w = os.pipe()
+        # Catch up on anything that changed before the subscription
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="interface-registry", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"\0")
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._close_socket()
+
+    def refresh(self, name=None):
+        """Re-read one interface, or all of them, from sysfs and notify listeners of changes"""
+        if name is None:
+            current = read_interfaces(self.sysfs_root)
+            with self._lock:
+                previous = self._interfaces
+                self._interfaces = current
+            names = set(previous) | set(current)
+        else:
+            interface = read_interface(name, self.sysfs_root)
+            with self._lock:
+                previous = {name: self._interfaces.get(name)}
+                if interface is None:
+                    self._interfaces.pop(name, None)
+                else:
+                    self._interfaces[name] = interface
+                current = {name: interface}
+            names = [name]
+        for changed in sorted(names):
+            old, new = previous.get(changed), current.get(changed)
+            if old != new:
+                self._notify(changed, old, new)
+
+    def _notify(self, name, old, new):
+        self.events += 1
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(name, old, new)
+            except Exception as e:
+                print(f"Error in interface listener: {e}")
+        with self._changed:
+            self._changed.notify_all()
+
+    def _run(self):
+        if self._socket is None:
+            while not self._stop.wait(self.poll_interval):
+                self.refresh()
+            return
+
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._socket, self._wake_r], [], [])
+            if self._wake_r in readable:
+                break
+            try:
+                data = self._socket.recv(65536)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # Events were dropped, start over from sysfs
+                    self.refresh()
+                    continue
+                print(f"Netlink error: {e}")
+                break
+            self._handle(data)
+
+    def _handle(self, data):
+        for kind, index, name in parse_link_messages(data):
+            if kind == NLMSG_OVERRUN:
+                self.refresh()
+                return
+            # A rename arrives as a new link with a known index; drop the old name
+            with self._lock:
+                renamed = [n for n, i in self._interfaces.items() if i.index == index and n != name]
+            for old_name in renamed:
+                self.refresh(old_name)
+            if name:
+                self.refresh(name)
+
+    def _close_socket(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the shared InterfaceRegistry, starting it on first use"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = InterfaceRegistry().start()
+        return _default_registry
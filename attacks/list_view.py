@@ -0,0 +1,244 @@
+import tkinter as tk
+from tkinter import font as tkfont
+from difflib import SequenceMatcher
+
+# Above this many rows only the visible window is kept in the Listbox
+VIRTUAL_THRESHOLD = 1000
+
+
+class ListView:
+    """Keep a Tk Listbox in sync with a list of (key, text) rows.
+
+    Updates are applied as row-level diffs, so unchanged rows cost no Tk calls
+    and the scroll position and selection survive a refresh. Long lists switch
+    to a virtual mode where the Listbox only holds the rows that fit on screen
+    and the scrollbar is driven by the view; the selection is then kept by key
+    in the model, so rows scrolled out of the window stay selected. Handlers
+    of <<ListboxSelect>> are bound with add="+" so the model is updated first.
+    """
+
+    def __init__(self, listbox, scrollbar=None, virtual_threshold=VIRTUAL_THRESHOLD):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.virtual_threshold = virtual_threshold
+
+        # Full model of the list, and the part of it currently in the Listbox
+        self._keys = []
+        self._texts = []
+        self._shown_keys = []
+        self._shown_texts = []
+
+        self.virtual = False
+        self.offset = 0
+        self._auto_key = 0
+        # Selected keys in virtual mode, where the Listbox only knows the visible ones
+        self._selected = set()
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self._on_wheel, add="+")
+        self.listbox.bind("<<ListboxSelect>>", self._on_select, add="+")
+
+    # --- Model access ---
+
+    def __len__(self):
+        return len(self._keys)
+
+    def key_at(self, index):
+        """Key of the row at a Listbox index (as returned by curselection)"""
+        index += self.offset if self.virtual else 0
+        if 0 <= index < len(self._keys):
+            return self._keys[index]
+        return None
+
+    def text_at(self, index):
+        """Text of the row at a Listbox index"""
+        index += self.offset if self.virtual else 0
+        if 0 <= index < len(self._texts):
+            return self._texts[index]
+        return None
+
+    def index_of(self, key):
+        """Row number of a key in the full list, or None"""
+        try:
+            return self._keys.index(key)
+        except ValueError:
+            return None
+
+    def selected_keys(self):
+        """Keys of the selected rows, in list order"""
+        if self.virtual:
+            return [key for key in self._keys if key in self._selected]
+        return [self.key_at(i) for i in self.listbox.curselection()]
+
+    # --- Updates ---
+
+    def set_rows(self, rows):
+        """Replace the list with rows of (key, text), applying only the differences"""
+        keys = [row[0] for row in rows]
+        texts = [row[1] for row in rows]
+
+        # Remember what the user is looking at in terms of keys, not indexes
+        selected = set(self.selected_keys())
+        top_key = self.key_at(self._top_index()) if self._shown_keys else None
+
+        self._keys = keys
+        self._texts = texts
+        self._render(selected, top_key)
+
+    def set_texts(self, texts):
+        """Replace the list with plain strings, duplicates are keyed by occurrence"""
+        counts = {}
+        rows = []
+        for text in texts:
+            counts[text] = counts.get(text, 0) + 1
+            rows.append(((text, counts[text]), text))
+        self.set_rows(rows)
+
+    def append(self, text, key=None):
+        """Add one row at the end"""
+        if key is None:
+            self._auto_key += 1
+            key = ("row", self._auto_key)
+        self.set_rows(list(zip(self._keys, self._texts)) + [(key, text)])
+        return key
+
+    def update(self, key, text):
+        """Change the text of one row, returns False if the key is unknown"""
+        index = self.index_of(key)
+        if index is None:
+            return False
+        if self._texts[index] != text:
+            texts = list(self._texts)
+            texts[index] = text
+            self.set_rows(list(zip(self._keys, texts)))
+        return True
+
+    def clear(self):
+        """Remove every row"""
+        self._keys = []
+        self._texts = []
+        self._shown_keys = []
+        self._shown_texts = []
+        self.offset = 0
+        self._selected = set()
+        self.listbox.delete(0, tk.END)
+        self._set_virtual(False)
+
+    # --- Rendering ---
+
+    def _render(self, selected=(), top_key=None):
+        self._set_virtual(len(self._keys) > self.virtual_threshold)
+
+        if self.virtual:
+            if top_key is not None and self.index_of(top_key) is not None:
+                self.offset = self.index_of(top_key)
+            self.offset = max(0, min(self.offset, len(self._keys) - self._window_size()))
+            end = self.offset + self._window_size()
+            self._apply(self._keys[self.offset:end], self._texts[self.offset:end])
+            self._update_scrollbar()
+        else:
+            self._apply(self._keys, self._texts)
+            if top_key is not None and top_key in self._keys:
+                self.listbox.yview(self._keys.index(top_key))
+
+        # Restore the selection by key, keeping only keys that are still in the list
+        self._selected = set(selected).intersection(self._keys)
+        self.listbox.selection_clear(0, tk.END)
+        for index, key in enumerate(self._shown_keys):
+            if key in selected:
+                self.listbox.selection_set(index)
+
+    def _apply(self, keys, texts):
+        """Turn the Listbox contents into keys/texts with as few Tk calls as possible"""
+        old_keys, old_texts = self._shown_keys, self._shown_texts
+
+        if old_keys == keys:
+            opcodes = [("equal", 0, len(keys), 0, len(keys))]
+        else:
+            opcodes = SequenceMatcher(None, old_keys, keys, autojunk=False).get_opcodes()
+
+        # Work backwards so earlier Listbox indexes stay valid
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == "equal":
+                for offset in range(i2 - i1):
+                    if old_texts[i1 + offset] != texts[j1 + offset]:
+                        self.listbox.delete(i1 + offset)
+                        self.listbox.insert(i1 + offset, texts[j1 + offset])
+                continue
+            if tag in ("delete", "replace"):
+                self.listbox.delete(i1, i2 - 1)
+            if tag in ("insert", "replace"):
+                self.listbox.insert(i1, *texts[j1:j2])
+
+        self._shown_keys = list(keys)
+        self._shown_texts = list(texts)
+
+    # --- Virtual mode ---
+
+    def _set_virtual(self, enabled):
+        """Switch between a normal Listbox and a windowed one"""
+        if enabled == self.virtual:
+            return
+        self.virtual = enabled
+        if self.scrollbar is None:
+            return
+        if enabled:
+            self.listbox.config(yscrollcommand="")
+            self.scrollbar.config(command=self._on_scrollbar)
+        else:
+            self.offset = 0
+            self.listbox.config(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.config(command=self.listbox.yview)
+
+    def _window_size(self):
+        """Number of rows that fit in the Listbox"""
+        height = self.listbox.winfo_height()
+        if height <= 1:
+            return int(self.listbox.cget("height")) or 10
+        line = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace")
+        return max(1, height // max(1, line))
+
+    def _top_index(self):
+        return self.listbox.nearest(0)
+
+    def _update_scrollbar(self):
+        if self.scrollbar is None or not self._keys:
+            return
+        total = len(self._keys)
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self._window_size()) / total))
+
+    def _scroll_to(self, offset):
+        self.offset = offset
+        self._render(set(self.selected_keys()))
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command in virtual mode"""
+        window = self._window_size()
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self._keys)))
+        elif action == "scroll":
+            step = window if unit == "pages" else 1
+            self._scroll_to(self.offset + int(amount) * step)
+
+    def _on_select(self, event):
+        """Fold a selection change in the visible window into the model"""
+        if not self.virtual:
+            return
+        current = {self._shown_keys[i] for i in self.listbox.curselection() if i < len(self._shown_keys)}
+        if self.listbox.cget("selectmode") in (tk.SINGLE, tk.BROWSE):
+            # Picking a row replaces the selection, wherever the old one was
+            if current:
+                self._selected = current
+            return
+        self._selected.difference_update(self._shown_keys)
+        self._selected.update(current)
+
+    def _on_wheel(self, event):
+        """Mouse wheel scrolling in virtual mode"""
+        if not self.virtual:
+            return None
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.offset - 3)
+        else:
+            self._scroll_to(self.offset + 3)
+        return "break"
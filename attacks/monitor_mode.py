@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import namedtuple
+
+from .interfaces import get_registry, is_monitor, is_wireless
+
+# The Pi's onboard adapter carries the management link and is never switched
+EXCLUDED_ADAPTERS = ("wlan0",)
+
+# How long the kernel gets to report the new interface once airmon-ng returns
+MONITOR_TOGGLE_TIMEOUT = 5.0
+AIRMON_TIMEOUT = 30
+
+# Outcome of switching one adapter. interface is the monitor interface after
+# enabling and the managed one after disabling; rolled_back tells whether a
+# failed switch left the adapter as it was
+ToggleResult = namedtuple("ToggleResult", ["adapter", "interface", "enabled", "ok", "rolled_back", "duration", "error"])
+
+
+def format_result(result):
+    if result.ok:
+        return f"{result.adapter} -> {result.interface} in {result.duration:.2f}s"
+    state = "rolled back" if result.rolled_back else "left as is"
+    return f"{result.adapter}: {result.error} ({state})"
+
+
+class MonitorMode:
+    """Switch adapters in and out of monitor mode with airmon-ng.
+
+    Completion is taken from the InterfaceRegistry: a switch returns as soon
+    as the kernel reports a monitor interface on the adapter's phy (or its
+    removal), with no fixed sleep and no ip link polling. Adapters are told
+    apart by phy, so airmon-ng may rename the interface or switch it in place.
+    A switch that does not show up within the timeout is rolled back.
+    """
+
+    def __init__(self, engine, registry=None, excluded=EXCLUDED_ADAPTERS, timeout=MONITOR_TOGGLE_TIMEOUT):
+        self.engine = engine
+        self.registry = registry or get_registry()
+        self.excluded = tuple(excluded)
+        self.timeout = timeout
+
+    def _excluded_phys(self):
+        phys = set()
+        for name in self.excluded:
+            interface = self.registry.get(name)
+            if interface is not None and interface.phy is not None:
+                phys.add(interface.phy)
+        return phys
+
+    def _on_phy(self, phy):
+        return sorted((i for i in self.registry.interfaces() if i.phy == phy), key=lambda i: i.name)
+
+    def _monitor_on(self, phy):
+        """Name of a monitor interface on phy, or None"""
+        return next((i.name for i in self._on_phy(phy) if is_monitor(i)), None)
+
+    def _managed_on(self, phy):
+        return next((i.name for i in self._on_phy(phy) if not is_monitor(i)), None)
+
+    def adapters(self):
+        """Wireless interfaces that may be switched, one per phy, by name"""
+        excluded = self._excluded_phys()
+        chosen = {}
+        for interface in self.registry.wireless():
+            if interface.phy in excluded or interface.name in self.excluded:
+                continue
+            # Prefer the monitor interface of a phy that has both
+            current = chosen.get(interface.phy)
+            if current is None or (is_monitor(interface) and not is_monitor(current)):
+                chosen[interface.phy] = interface
+        return sorted(chosen.values(), key=lambda i: i.name)
+
+    def monitor_interfaces(self):
+        """Names of the monitor interfaces of switchable adapters"""
+        return [i.name for i in self.adapters() if is_monitor(i)]
+
+    def managed_interfaces(self):
+        """Names of switchable adapters that are not in monitor mode"""
+        return [i.name for i in self.adapters() if not is_monitor(i)]
+
+    @property
+    def active(self):
+        return bool(self.monitor_interfaces())
+
+    async def _wait(self, predicate, timeout=None):
+        """Wait for the registry to satisfy predicate, reading sysfs again first when it is polled"""
+        if not self.registry.event_driven:
+            self.registry.refresh()
+        return await self.registry.wait_for_async(predicate, self.timeout if timeout is None else timeout)
+
+    async def _airmon(self, command, name):
+        result = await self.engine.run(["sudo", "airmon-ng", command, name], timeout=AIRMON_TIMEOUT)
+        if result.timed_out:
+            return "airmon-ng timed out"
+        if result.returncode != 0:
+            lines = (result.stderr or result.stdout).strip().splitlines()
+            return lines[-1] if lines else f"airmon-ng exited {result.returncode}"
+        return None
+
+    async def enable(self, name):
+        """Put the adapter behind name in monitor mode, returns a ToggleResult"""
+        started = time.monotonic()
+        interface = self.registry.get(name)
+        if not is_wireless(interface):
+            return ToggleResult(name, None, True, False, False, 0.0, "not a wireless interface")
+        phy = interface.phy
+
+        # A failed airmon-ng gets no grace period, only what already happened counts
+        error = await self._airmon("start", name)
+        monitor = await self._wait(lambda: self._monitor_on(phy), 0 if error else None)
+        if monitor:
+            return ToggleResult(name, monitor, True, True, False, time.monotonic() - started, None)
+
+        error = error or f"no monitor interface after {self.timeout:.0f}s"
+        rolled_back = await self._rollback(phy, name, monitor_mode=False)
+        return ToggleResult(name, None, True, False, rolled_back, time.monotonic() - started, error)
+
+    async def disable(self, name):
+        """Take the monitor interface name out of monitor mode, returns a ToggleResult"""
+        started = time.monotonic()
+        interface = self.registry.get(name)
+        if not is_monitor(interface):
+            return ToggleResult(name, name, False, interface is not None, False, 0.0,
+                                None if interface is not None else "no such interface")
+        phy = interface.phy
+
+        error = await self._airmon("stop", name)
+        managed = await self._wait(lambda: not self._monitor_on(phy) and self._managed_on(phy), 0 if error else None)
+        if managed:
+            return ToggleResult(name, managed, False, True, False, time.monotonic() - started, None)
+
+        error = error or f"adapter did not leave monitor mode after {self.timeout:.0f}s"
+        rolled_back = await self._rollback(phy, name, monitor_mode=True)
+        return ToggleResult(name, None, False, False, rolled_back, time.monotonic() - started, error)
+
+    async def _rollback(self, phy, name, monitor_mode):
+        """Bring phy back to one interface in its previous mode, returns True when it is"""
+        if monitor_mode:
+            if self._monitor_on(phy):
+                return True
+            managed = self._managed_on(phy)
+            if managed:
+                await self._airmon("start", managed)
+            else:
+                await self._add_interface(phy, name, "monitor")
+            return bool(await self._wait(lambda: self._monitor_on(phy)))
+
+        # A monitor interface may have turned up late, or half of a rename happened
+        monitor = self._monitor_on(phy)
+        if monitor:
+            await self._airmon("stop", monitor)
+        elif not self._on_phy(phy):
+            await self._add_interface(phy, name, "managed")
+        return bool(await self._wait(lambda: not self._monitor_on(phy) and self._managed_on(phy)))
+
+    async def _add_interface(self, phy, name, kind):
+        await self.engine.run(["sudo", "iw", "phy", phy, "interface", "add", name, "type", kind], timeout=5)
+        await self.engine.run(["sudo", "ip", "link", "set", name, "up"], timeout=5)
+
+    async def enable_all(self):
+        """Enable every switchable adapter that is not in monitor mode yet, concurrently"""
+        return list(await asyncio.gather(*(self.enable(name) for name in self.managed_interfaces())))
+
+    async def disable_all(self):
+        """Disable every monitor interface of the switchable adapters, concurrently"""
+        return list(await asyncio.gather(*(self.disable(name) for name in self.monitor_interfaces())))
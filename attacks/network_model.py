@@ -0,0 +1,217 @@
+import time
+from collections import Counter, OrderedDict
+
+# Defaults for StationTable
+STATION_TABLE_MAX_SIZE = 500
+STATION_STALE_AFTER = 300.0
+
+
+class NetworkTable:
+    """In-memory table of AP or station records with stable keys.
+
+    Views hold keys (or indexes into the current order) instead of display
+    strings, so selection and lookups are dictionary or list accesses and the
+    same data can feed other views without parsing anything back.
+    """
+
+    def __init__(self, key_field="bssid", sort_field=None, reverse=False):
+        self.key_field = key_field
+        self.sort_field = sort_field
+        self.reverse = reverse
+
+        self._records = {}
+        self._order = []
+        # key -> position in _order, rebuilt lazily after changes
+        self._positions = None
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        """Records in display order"""
+        return (self._records[key] for key in self._order)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def key_of(self, record):
+        return getattr(record, self.key_field)
+
+    # --- Lookups ---
+
+    def get(self, key, default=None):
+        """Record for a key"""
+        return self._records.get(key, default)
+
+    def at(self, index):
+        """Record at a position in the display order"""
+        return self._records[self._order[index]]
+
+    def key_at(self, index):
+        """Key at a position in the display order"""
+        return self._order[index]
+
+    def index_of(self, key):
+        """Position of a key in the display order, or None"""
+        if self._positions is None:
+            self._positions = {k: i for i, k in enumerate(self._order)}
+        return self._positions.get(key)
+
+    def keys(self):
+        return list(self._order)
+
+    def records(self):
+        return [self._records[key] for key in self._order]
+
+    # --- Changes ---
+
+    def load(self, records):
+        """Replace the whole table"""
+        self._records = {}
+        self._order = []
+        self.update(records)
+
+    def update(self, records):
+        """Insert or replace records; new keys go to the end unless the table is sorted"""
+        for record in records:
+            key = self.key_of(record)
+            if key not in self._records:
+                self._order.append(key)
+            self._records[key] = record
+        self._changed()
+
+    def remove(self, keys):
+        """Drop records by key"""
+        gone = [key for key in keys if self._records.pop(key, None) is not None]
+        if gone:
+            gone = set(gone)
+            self._order = [key for key in self._order if key not in gone]
+            self._changed()
+
+    def clear(self):
+        self._records = {}
+        self._order = []
+        self._positions = None
+
+    def sort(self, field=None, reverse=None):
+        """Keep the table ordered by a record field, None restores insertion order"""
+        self.sort_field = field
+        if reverse is not None:
+            self.reverse = reverse
+        self._changed()
+
+    def _changed(self):
+        if self.sort_field:
+            field = self.sort_field
+
+            # Missing values (None) always sort last, in either direction
+            def sort_key(key):
+                value = getattr(self._records[key], field)
+                if value is None:
+                    return (not self.reverse, 0)
+                return (self.reverse, value)
+
+            self._order.sort(key=sort_key, reverse=self.reverse)
+        self._positions = None
+
+    # --- Views ---
+
+    def rows(self, formatter):
+        """(key, text) rows for a ListView"""
+        return [(key, formatter(self._records[key])) for key in self._order]
+
+
+class StationTable(NetworkTable):
+    """NetworkTable with a size limit and a stale-after window for long sessions.
+
+    Entries are kept in least-recently-updated order. Anything not updated for
+    stale_after seconds, and the oldest entries beyond max_size, are evicted and
+    only counted, so memory and render time stay flat however long a capture runs.
+    """
+
+    def __init__(self, key_field="mac", sort_field=None, reverse=False,
+                 max_size=STATION_TABLE_MAX_SIZE, stale_after=STATION_STALE_AFTER, clock=time.monotonic):
+        super().__init__(key_field, sort_field, reverse)
+        self.max_size = max_size
+        self.stale_after = stale_after
+        self.clock = clock
+
+        # key -> last update time, oldest first
+        self._touched = OrderedDict()
+        self.evicted_stale = 0
+        self.evicted_capacity = 0
+        # Evictions per BSSID, when records have one
+        self.evicted_by_bssid = Counter()
+
+    @property
+    def evicted(self):
+        return self.evicted_stale + self.evicted_capacity
+
+    def update(self, records):
+        now = self.clock()
+        records = list(records)
+        for record in records:
+            key = self.key_of(record)
+            self._touched[key] = now
+            self._touched.move_to_end(key)
+        super().update(records)
+        self.expire(now)
+
+    def remove(self, keys):
+        keys = list(keys)
+        for key in keys:
+            self._touched.pop(key, None)
+        super().remove(keys)
+
+    def clear(self):
+        super().clear()
+        self._touched.clear()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.evicted_stale = 0
+        self.evicted_capacity = 0
+        self.evicted_by_bssid.clear()
+
+    def expire(self, now=None):
+        """Evict stale and over-limit entries, returns the evicted keys"""
+        now = self.clock() if now is None else now
+        evicted = []
+
+        if self.stale_after is not None:
+            cutoff = now - self.stale_after
+            while self._touched:
+                key, touched = next(iter(self._touched.items()))
+                if touched > cutoff:
+                    break
+                self._evict(key)
+                self.evicted_stale += 1
+                evicted.append(key)
+
+        if self.max_size is not None:
+            while len(self._touched) > self.max_size:
+                key = next(iter(self._touched))
+                self._evict(key)
+                self.evicted_capacity += 1
+                evicted.append(key)
+
+        if evicted:
+            super().remove(evicted)
+        return evicted
+
+    def summary(self, label="entries"):
+        """One line describing the evicted entries, or None if nothing was evicted"""
+        if not self.evicted:
+            return None
+        return f"{self.evicted} inactive {label} hidden ({self.evicted_stale} stale, {self.evicted_capacity} over limit)"
+
+    def _evict(self, key):
+        del self._touched[key]
+        bssid = getattr(self._records.get(key), "bssid", None)
+        if bssid:
+            self.evicted_by_bssid[bssid] += 1
+
+
+def format_network(ap):
+    """List text for an AccessPoint"""
+    return f"{ap.essid} ({ap.bssid}) - Ch:{ap.channel}"
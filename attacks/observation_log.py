@@ -0,0 +1,318 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from .compact import NOT_ASSOCIATED
+
+# NumPy is optional: with it a query is a slice of a structured array over the
+# mapped segment, without it the records are unpacked into tuples
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Where the log is kept across sessions; MELRO_OBSERVATION_LOG points it elsewhere
+OBSERVATION_LOG_DIR = os.path.join(os.path.expanduser("~"), ".melro", "observations")
+OBSERVATION_LOG_ENV = "MELRO_OBSERVATION_LOG"
+
+# Segment file: magic, version, record size, start time, then fixed-width records
+SEGMENT_MAGIC = b"MOBS"
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct("<4sHHd")
+SEGMENT_SUFFIX = ".seg"
+# time, MAC (or BSSID) as int, channel, RSSI in dBm, one pad byte, packets since the previous record
+RECORD = struct.Struct("<dQHbxI")
+# 1M records (24 MB) per segment, and the oldest segments go beyond 512 MB in total
+SEGMENT_RECORDS = 1 << 20
+MAX_LOG_BYTES = 512 * 1024 * 1024
+
+# No reading: airodump-ng's -1, or nothing at all
+RSSI_NONE = 0
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([("time", "<f8"), ("mac", "<u8"), ("channel", "<u2"), ("rssi", "i1"),
+                             ("pad", "V1"), ("packets", "<u4")])
+else:
+    RECORD_DTYPE = None
+
+# One record as a tuple, when NumPy is not there
+ObservationRecord = namedtuple("ObservationRecord", ["time", "mac", "channel", "rssi", "packets"])
+
+
+def _rssi(power):
+    if power is None or power == -1:
+        return RSSI_NONE
+    return max(-128, min(127, int(power)))
+
+
+class Segment:
+    """One segment file mapped read-only, up to its last complete record"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            header = self._file.read(SEGMENT_HEADER.size)
+            if len(header) < SEGMENT_HEADER.size:
+                raise ValueError(f"{path}: truncated header")
+            magic, version, record_size, self.start = SEGMENT_HEADER.unpack(header)
+            if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION or record_size != RECORD.size:
+                raise ValueError(f"{path}: not a version {SEGMENT_VERSION} observation segment")
+            self.count = (size - SEGMENT_HEADER.size) // RECORD.size
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+        except Exception:
+            self._file.close()
+            raise
+
+    def _time_at(self, index):
+        return struct.unpack_from("<d", self._map, SEGMENT_HEADER.size + index * RECORD.size)[0]
+
+    def bounds(self, since=None, until=None):
+        """(first, end) record indexes of the records between since and until, by binary search"""
+        lo, hi = 0, self.count
+        if since is not None:
+            first, last = 0, self.count
+            while first < last:
+                middle = (first + last) // 2
+                if self._time_at(middle) < since:
+                    first = middle + 1
+                else:
+                    last = middle
+            lo = first
+        if until is not None:
+            first, last = lo, self.count
+            while first < last:
+                middle = (first + last) // 2
+                if self._time_at(middle) <= until:
+                    first = middle + 1
+                else:
+                    last = middle
+            hi = first
+        return lo, hi
+
+    def array(self, lo=0, hi=None):
+        """Records lo to hi as a structured array backed by the mapping"""
+        hi = self.count if hi is None else hi
+        if hi <= lo:
+            return np.zeros(0, RECORD_DTYPE)
+        return np.frombuffer(self._map, RECORD_DTYPE, hi - lo, SEGMENT_HEADER.size + lo * RECORD.size)
+
+    def records(self, lo=0, hi=None, mac=None):
+        """Records lo to hi as ObservationRecord tuples, only those of mac when given"""
+        hi = self.count if hi is None else hi
+        if hi <= lo:
+            return []
+        with memoryview(self._map) as view:
+            rows = RECORD.iter_unpack(view[SEGMENT_HEADER.size + lo * RECORD.size:SEGMENT_HEADER.size + hi * RECORD.size])
+            if mac is not None:
+                return [ObservationRecord(*row) for row in rows if row[1] == mac]
+            return [ObservationRecord(*row) for row in rows]
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Arrays still point into the mapping; it goes with the last of them
+                pass
+            self._map = None
+        self._file.close()
+
+
+class ObservationLog:
+    """Append-only binary log of per-device RSSI and activity, in fixed-width records.
+
+    Every record is RECORD.size bytes: time, MAC as int, channel, RSSI and the
+    packets counted since the device's previous record. record() packs a
+    capture delta into a buffer and flush() appends the buffer to the current
+    segment with one write, so a tick costs a struct pack per device and a
+    single sequential write. Segments roll over after segment_records and the
+    oldest are deleted past max_bytes.
+
+    Records within and across segments are in time order, so reads map the
+    segments and slice them by time with a binary search; with NumPy the
+    slice is a structured array over the mapping and the per-device and
+    per-channel selections are vectorized.
+    """
+
+    def __init__(self, directory=None, segment_records=SEGMENT_RECORDS, max_bytes=MAX_LOG_BYTES,
+                 clock=time.time):
+        self.directory = directory or os.environ.get(OBSERVATION_LOG_ENV) or OBSERVATION_LOG_DIR
+        self.segment_records = segment_records
+        self.max_bytes = max_bytes
+        self.clock = clock
+        os.makedirs(self.directory, exist_ok=True)
+        self.records_written = 0
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._file = None
+        self._segment_count = 0
+        self._lock = threading.Lock()
+        # Last cumulative packet count per device and channel per BSSID, for the deltas
+        self._packets = {}
+        self._channels = {}
+
+    # --- Writes ---
+
+    def append(self, when, mac, channel, rssi, packets):
+        """Buffer one record"""
+        with self._lock:
+            self._buffer += RECORD.pack(when, mac, channel or 0, _rssi(rssi), max(0, packets or 0))
+            self._buffered += 1
+
+    def record(self, delta, now=None):
+        """Buffer a record for every AP and station a capture delta added or updated"""
+        now = self.clock() if now is None else now
+        pack = RECORD.pack
+        chunk = bytearray()
+        count = 0
+        for ap in list(delta.aps.added.values()) + list(delta.aps.updated.values()):
+            if ap.channel:
+                self._channels[ap.bssid_id] = ap.channel
+            chunk += pack(now, ap.bssid_id, ap.channel or 0, _rssi(ap.power), self._packet_delta(ap.bssid_id, ap.beacons))
+            count += 1
+        for station in list(delta.stations.added.values()) + list(delta.stations.updated.values()):
+            bssid = station.bssid_id
+            channel = self._channels.get(bssid, 0) if bssid not in (None, NOT_ASSOCIATED) else 0
+            chunk += pack(now, station.mac_id, channel, _rssi(station.power),
+                          self._packet_delta(station.mac_id, station.packets))
+            count += 1
+        for key in delta.stations.removed:
+            self._packets.pop(key, None)
+        with self._lock:
+            self._buffer += chunk
+            self._buffered += count
+
+    def _packet_delta(self, key, packets):
+        packets = packets or 0
+        previous = self._packets.get(key, 0)
+        self._packets[key] = packets
+        # A counter that went back means a new capture, its count starts over
+        return packets - previous if packets >= previous else packets
+
+    def flush(self):
+        """Append the buffered records to the log, once per tick"""
+        with self._lock:
+            buffer, count = self._buffer, self._buffered
+            self._buffer, self._buffered = bytearray(), 0
+            offset = 0
+            while count:
+                if self._file is None or self._segment_count >= self.segment_records:
+                    self._roll(struct.unpack_from("<d", buffer, offset)[0])
+                take = min(count, self.segment_records - self._segment_count)
+                end = offset + take * RECORD.size
+                self._file.write(buffer[offset:end])
+                self._segment_count += take
+                self.records_written += take
+                count -= take
+                offset = end
+            if self._file is not None:
+                self._file.flush()
+
+    def _roll(self, start):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"{int(start * 1000):015d}{SEGMENT_SUFFIX}")
+        # Two segments in the same millisecond only happen with tiny segments
+        while os.path.exists(path):
+            start += 0.001
+            path = os.path.join(self.directory, f"{int(start * 1000):015d}{SEGMENT_SUFFIX}")
+        self._file = open(path, "wb")
+        self._file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, RECORD.size, start))
+        self._segment_count = 0
+        self._trim()
+
+    def _trim(self):
+        if self.max_bytes is None:
+            return
+        paths = self.segment_paths()
+        sizes = [os.path.getsize(path) for path in paths]
+        total = sum(sizes)
+        # The segment being written is never deleted
+        for path, size in zip(paths[:-1], sizes):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # --- Reads ---
+
+    def segment_paths(self):
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith(SEGMENT_SUFFIX))
+
+    def segments(self, since=None, until=None):
+        """Mapped Segments that may hold records between since and until, oldest first"""
+        paths = self.segment_paths()
+        starts = [int(os.path.basename(path)[:-len(SEGMENT_SUFFIX)]) / 1000 for path in paths]
+        segments = []
+        for i, path in enumerate(paths):
+            # A segment ends where the next one starts
+            if until is not None and starts[i] > until:
+                break
+            if since is not None and i + 1 < len(starts) and starts[i + 1] < since:
+                continue
+            try:
+                segments.append(Segment(path))
+            except (OSError, ValueError) as e:
+                print(f"Error reading observation segment: {e}")
+        return segments
+
+    def read(self, since=None, until=None, mac=None):
+        """Records between since and until, of one device when mac is given.
+
+        A structured array with NumPy, else a list of ObservationRecords.
+        """
+        parts = []
+        for segment in self.segments(since, until):
+            lo, hi = segment.bounds(since, until)
+            if np is not None:
+                data = segment.array(lo, hi)
+                # Copied out of the mapping, which closes with the segment
+                parts.append(data[data["mac"] == mac] if mac is not None else data.copy())
+            else:
+                parts.append(segment.records(lo, hi, mac))
+            segment.close()
+        if np is not None:
+            return np.concatenate(parts) if parts else np.zeros(0, RECORD_DTYPE)
+        return [record for part in parts for record in part]
+
+    def series(self, mac, since=None, until=None):
+        """One device's records between since and until, in time order"""
+        return self.read(since, until, mac)
+
+    def channel_activity(self, since=None, until=None):
+        """{channel: packets} between since and until, devices on an unknown channel left out"""
+        data = self.read(since, until)
+        if np is not None:
+            totals = np.bincount(data["channel"], weights=data["packets"])
+            return {channel: int(total) for channel, total in enumerate(totals) if channel and total}
+        totals = {}
+        for record in data:
+            if record.channel:
+                totals[record.channel] = totals.get(record.channel, 0) + record.packets
+        return totals
+
+
+_default_log = None
+_default_lock = threading.Lock()
+
+
+def get_observation_log():
+    """Return the shared ObservationLog, opening it on first use"""
+    global _default_log
+    with _default_lock:
+        if _default_log is None:
+            _default_log = ObservationLog()
+        return _default_log
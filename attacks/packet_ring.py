@@ -0,0 +1,241 @@
+import mmap
+import os
+import socket
+import struct
+
+from .capture import CaptureSource, read_pcap
+from .dot11 import LINKTYPE_IEEE802_11, LINKTYPE_IEEE802_11_RADIOTAP, parse_packet
+
+# linux/if_packet.h
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+ETH_P_ALL = 0x0003
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+
+# linux/if_arp.h hardware types of monitor-mode interfaces
+ARPHRD_IEEE80211 = 801
+ARPHRD_IEEE80211_RADIOTAP = 803
+ARPHRD_LINKTYPES = {
+    ARPHRD_IEEE80211: LINKTYPE_IEEE802_11,
+    ARPHRD_IEEE80211_RADIOTAP: LINKTYPE_IEEE802_11_RADIOTAP,
+}
+
+# Ring geometry: 8 blocks of 256 KiB, handed over after 100 ms even when not full
+RING_BLOCK_SIZE = 1 << 18
+RING_BLOCK_COUNT = 8
+RING_FRAME_SIZE = 1 << 11
+RING_BLOCK_TIMEOUT_MS = 100
+
+# struct tpacket_block_desc: version, offset_to_priv, then tpacket_hdr_v1
+# (block_status, num_pkts, offset_to_first_pkt, blk_len, seq_num, ts_first, ts_last)
+_BLOCK_HEADER = struct.Struct("<IIIIIIQIIII")
+BLOCK_HEADER_LEN = _BLOCK_HEADER.size
+_BLOCK_STATUS = struct.Struct("<I")
+_BLOCK_STATUS_OFFSET = 8
+
+# struct tpacket3_hdr up to tp_mac: next_offset, sec, nsec, snaplen, len, status, mac, net
+_PACKET_HEADER = struct.Struct("<IIIIIIHH")
+PACKET_HEADER_LEN = 48
+
+
+def interface_linktype(interface, sysfs_root="/sys/class/net"):
+    """pcap link type of a network interface from its ARPHRD type, None if not 802.11"""
+    try:
+        with open(os.path.join(sysfs_root, interface, "type")) as f:
+            return ARPHRD_LINKTYPES.get(int(f.read().strip()))
+    except (OSError, ValueError):
+        return None
+
+
+class PacketRingSource(CaptureSource):
+    """Capture frames in-process from a monitor interface through a TPACKET_V3 ring.
+
+    The kernel fills whole blocks of the memory-mapped ring and hands them over
+    at once, so reading costs no syscall per packet: read() walks every block
+    the kernel has released, decodes the frames in place and gives the blocks
+    back. Needs Linux and CAP_NET_RAW (the app already runs as root).
+
+    max_frames is honoured at block granularity, since a block can only be
+    returned to the kernel as a whole.
+    """
+
+    def __init__(self, interface="wlan1mon", block_size=RING_BLOCK_SIZE, block_count=RING_BLOCK_COUNT,
+                 frame_size=RING_FRAME_SIZE, block_timeout_ms=RING_BLOCK_TIMEOUT_MS):
+        self.interface = interface
+        self.block_size = block_size
+        self.block_count = block_count
+        self.frame_size = frame_size
+        self.block_timeout_ms = block_timeout_ms
+
+        self.linktype = None
+        self.frames_read = 0
+        self.packets_read = 0
+        self.blocks_read = 0
+        self._socket = None
+        self._ring = None
+        self._block = 0
+
+    def open(self):
+        """Create the socket and map its ring; called by the first read()"""
+        if not hasattr(socket, "AF_PACKET"):
+            raise OSError("AF_PACKET capture is only available on Linux")
+
+        self.linktype = interface_linktype(self.interface)
+        if self.linktype is None:
+            raise OSError(f"{self.interface} is not an 802.11 monitor interface")
+
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            frame_count = self.block_size // self.frame_size * self.block_count
+            request = struct.pack("<IIIIIII", self.block_size, self.block_count, self.frame_size,
+                                  frame_count, self.block_timeout_ms, 0, 0)
+            sock.setsockopt(SOL_PACKET, PACKET_RX_RING, request)
+            sock.bind((self.interface, ETH_P_ALL))
+            self._ring = mmap.mmap(sock.fileno(), self.block_size * self.block_count,
+                                   mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except OSError:
+            sock.close()
+            raise
+        self._socket = sock
+        self._block = 0
+
+    def fileno(self):
+        """Socket descriptor, readable when a block is ready, for select/poll"""
+        return self._socket.fileno() if self._socket else -1
+
+    def read(self, max_frames=None):
+        if self._ring is None:
+            self.open()
+        return self._read_blocks(max_frames)
+
+    def close(self):
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _read_blocks(self, max_frames=None):
+        """Decode every block the kernel has handed over, then give them back"""
+        frames = []
+        ring = self._ring
+        with memoryview(ring) as view:
+            for _ in range(self.block_count):
+                base = self._block * self.block_size
+                header = _BLOCK_HEADER.unpack_from(view, base)
+                if not header[2] & TP_STATUS_USER:
+                    break
+
+                count, offset = header[3], header[4]
+                for _ in range(count):
+                    packet = base + offset
+                    next_offset, sec, nsec, snaplen, _, _, mac, _ = _PACKET_HEADER.unpack_from(view, packet)
+                    start = packet + mac
+                    frame = parse_packet(view[start:start + snaplen], self.linktype, sec + nsec * 1e-9)
+                    if frame is not None:
+                        frames.append(frame)
+                    if not next_offset:
+                        break
+                    offset += next_offset
+
+                self.packets_read += count
+                self.blocks_read += 1
+                _BLOCK_STATUS.pack_into(ring, base + _BLOCK_STATUS_OFFSET, TP_STATUS_KERNEL)
+                self._block = (self._block + 1) % self.block_count
+                if max_frames and len(frames) >= max_frames:
+                    break
+
+        self.frames_read += len(frames)
+        return frames
+
+
+class RingReplaySource(PacketRingSource):
+    """Stand-in for PacketRingSource that replays a pcap through an in-memory ring.
+
+    Blocks are laid out exactly as the kernel writes them, so the block walk of
+    PacketRingSource runs unchanged without a radio or root. Each read() fills
+    the free blocks with the next packets (packets_per_block at most) first.
+    """
+
+    def __init__(self, path=None, packets=None, linktype=LINKTYPE_IEEE802_11_RADIOTAP,
+                 block_size=RING_BLOCK_SIZE, block_count=RING_BLOCK_COUNT, packets_per_block=None):
+        super().__init__("replay", block_size, block_count)
+        if path is not None:
+            linktype, packets = read_pcap(path)
+        self.replay_linktype = linktype
+        self.packets_per_block = packets_per_block
+        self._pending = iter(packets or [])
+        self._next = None
+        self._fill_block = 0
+        self._seq = 0
+
+    @property
+    def exhausted(self):
+        """True once every packet has been handed to the ring"""
+        if self._next is None:
+            self._next = next(self._pending, None)
+        return self._next is None
+
+    def open(self):
+        self.linktype = self.replay_linktype
+        self._ring = bytearray(self.block_size * self.block_count)
+        self._block = 0
+        self._fill_block = 0
+
+    def read(self, max_frames=None):
+        if self._ring is None:
+            self.open()
+        self._fill()
+        return self._read_blocks(max_frames)
+
+    def close(self):
+        self._ring = None
+
+    def _fill(self):
+        """Play the kernel: write pending packets into blocks the reader has released"""
+        for _ in range(self.block_count):
+            base = self._fill_block * self.block_size
+            if _BLOCK_STATUS.unpack_from(self._ring, base + _BLOCK_STATUS_OFFSET)[0] & TP_STATUS_USER:
+                return
+            if self.exhausted:
+                return
+
+            offset = BLOCK_HEADER_LEN
+            count = 0
+            previous = None
+            first_ts = last_ts = 0.0
+            while not self.exhausted:
+                ts, packet = self._next
+                size = (PACKET_HEADER_LEN + len(packet) + 15) & ~15
+                if offset + size > self.block_size:
+                    break
+                if self.packets_per_block and count >= self.packets_per_block:
+                    break
+                if previous is not None:
+                    struct.pack_into("<I", self._ring, base + previous, offset - previous)
+                sec = int(ts)
+                _PACKET_HEADER.pack_into(self._ring, base + offset, 0, sec, int((ts - sec) * 1e9),
+                                         len(packet), len(packet), TP_STATUS_USER, PACKET_HEADER_LEN, 0)
+                self._ring[base + offset + PACKET_HEADER_LEN:base + offset + PACKET_HEADER_LEN + len(packet)] = packet
+                if not count:
+                    first_ts = ts
+                last_ts = ts
+                previous = offset
+                offset += size
+                count += 1
+                self._next = None
+
+            if not count:
+                # A packet larger than a block can never be delivered
+                self._next = None
+                continue
+
+            self._seq += 1
+            _BLOCK_HEADER.pack_into(self._ring, base, 1, 0, TP_STATUS_USER, count, BLOCK_HEADER_LEN, offset,
+                                    self._seq, int(first_ts), 0, int(last_ts), 0)
+            self._fill_block = (self._fill_block + 1) % self.block_count
@@ -1,26 +1,90 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import subprocess
-import threading
-import time
+import asyncio
 import os
-import tempfile
-import re
 
 # Change to relative import for better module resolution
 from .utils import DARK_BG, PANEL_BG, TEXT_COLOR, ACCENT_GOLD, WARNING_COLOR, STATUS_GREEN, BTN_BG, BTN_TEXT, HoverButton
+from .airodump_csv import iter_access_points
+from .convergence import DiscoveryTracker, SCAN_MAX_TIME, SCAN_CONFIDENCE, format_report, wait_for_csv_convergence
+from .csv_reader import IncrementalCsvReader
+from .capture import CaptureReader, PcapFileSource
+from .packet_ring import PacketRingSource
+from .replay import replay_source
+from .channels import format_channels
+from .channel_scheduler import ChannelHopper, ChannelTuner, SlicedScheduler
+from .scanner import HOPPING_BLOCK_TIMEOUT_MS
+from .process_engine import get_engine
+from .interfaces import get_registry
+from .list_view import ListView
+from .network_model import NetworkTable, format_network, STATION_TABLE_MAX_SIZE, STATION_STALE_AFTER
+from .recon_targets import ReconTargets, target_channels
+from .client_metrics import ClientMetrics, TOP_CLIENTS, format_activity
+from .update_queue import CoalescingQueue, UiUpdater
+from .workspace import get_workspace
+from .supervisor import Supervisor, ROLE_CAPTURE
 
 class PassiveRecon:
-    def __init__(self, root=None, return_callback=None):
+    def __init__(self, root=None, return_callback=None, scanner=None, engine=None, replay=None, survey_store=None,
+                 observation_log=None, workspace=None, supervisor=None, interface=None):
         self.root = root
         self.return_callback = return_callback
+        # Returns the monitor interface the app switched to, when None the registry's first one is used
+        self.get_interface = interface
+        self.interface = None
+        # External tools are started and torn down on the ProcessEngine loop
+        self.engine = engine or get_engine()
+        # Starts the captures with their scheduling policy and restarts one that crashes
+        self.supervisor = supervisor or Supervisor(self.engine)
+        # Capture output and handoff files live in the session workspace on tmpfs
+        self.workspace = workspace or get_workspace()
+        # Shared BackgroundScanner, when None every scan runs its own capture
+        self.scanner = scanner
+        self.scanner_paused = False
+        
+        # Scan results, the listbox only holds keys into this table
+        self.networks = NetworkTable("bssid", sort_field="power", reverse=True)
+        
+        # Adaptive scans stop once no new BSSIDs show up instead of after a fixed 5 seconds
+        self.adaptive_scan = True
+        self.scan_max_time = SCAN_MAX_TIME
+        self.scan_confidence = SCAN_CONFIDENCE
         self.scanning = False
         self.attacking = False
-        self.selected_network = None
-        self.selected_channel = None
+        # Every network picked in the list; one capture watches all of them
+        self.selected_networks = []
         self.attack_process = None
         self.temp_file_path = None
         
+        # Recon results are parsed on a worker; the UI renders only the newest snapshot
+        self.base_parse_interval = 0.5
+        self.parse_interval = self.base_parse_interval
+        # Stretches the channel dwell of a multi-target capture, raised by the thermal governor
+        self.dwell_scale = 1.0
+        # "pcap" follows airodump-ng's capture file frame by frame, "csv" reads the
+        # CSV it only rewrites every few seconds, "ring" captures in-process from
+        # the monitor interface through a packet ring without airodump-ng
+        self.recon_source = "pcap"
+        # Tunes the monitor interface through the targets' channels when they are on several
+        self.hopper = None
+        # ReplayConfig that stands in for the radio, see attacks.replay
+        self.replay = replay
+        # SurveyStore that keeps every recon after it stops, None to keep nothing
+        self.survey_store = survey_store
+        self.survey_id = None
+        # run_attack() on the engine loop, awaited by teardown before the survey is ended
+        self.recon_task = None
+        # ObservationLog for the RSSI and activity history of every device, None to keep nothing
+        self.observation_log = observation_log
+        self.recon_updates = CoalescingQueue()
+        self.ui_updater = UiUpdater(root, self.recon_updates, self.render_recon_rows, max_rate=2.0)
+        
+        # Clients idle for longer than this, or beyond the limit, are only counted
+        self.max_stations = STATION_TABLE_MAX_SIZE
+        self.station_stale_after = STATION_STALE_AFTER
+        # Busiest clients by rolling packet rate, listed above the per-network tables
+        self.top_clients = TOP_CLIENTS
+        
     def setup_ui(self, parent_frame):
         """Setup the UI components for Passive Recon page."""
         # The page template from main.py already adds the time, CPU temp, and back button
@@ -97,7 +161,9 @@ class PassiveRecon:
             font=("Arial", 12),
             bd=0,
             highlightthickness=0,
-            activestyle="none"
+            activestyle="none",
+            # Tapping rows toggles them, so several networks can be watched at once
+            selectmode=tk.MULTIPLE
         )
         self.network_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -105,6 +171,9 @@ class PassiveRecon:
         scrollbar.config(command=self.network_listbox.yview)
         self.network_listbox.config(yscrollcommand=scrollbar.set)
         
+        # Row-level diff rendering on top of the listbox
+        self.list_view = ListView(self.network_listbox, scrollbar)
+        
         # Attack button
         self.attack_btn = HoverButton(
             parent_frame,
@@ -121,7 +190,7 @@ class PassiveRecon:
         self.attack_btn.place(x=20, y=435, width=400, height=60)
         
         # Bind selection event
-        self.network_listbox.bind("<<ListboxSelect>>", self.on_selection)
+        self.network_listbox.bind("<<ListboxSelect>>", self.on_selection, add="+")
         
     def start_scan(self):
         """Start scanning for networks"""
@@ -130,71 +199,91 @@ class PassiveRecon:
             
         self.scanning = True
         self.scan_btn.config(state=tk.DISABLED)
-        self.network_listbox.delete(0, tk.END)
+        self.list_view.clear()
         self.status_label.config(text="Scanning for networks...")
         self.network_label.config(text="Available Networks:")
         
         # Reset selection
-        self.selected_network = None
-        self.selected_channel = None
+        self.selected_networks = []
         self.choose_btn.config(state=tk.DISABLED)
         self.attack_btn.config(state=tk.DISABLED)
         
-        # Start scan in background thread
-        threading.Thread(target=self.run_scan, daemon=True).start()
+        # Run the scan on the process engine loop
+        self.engine.submit(self.run_scan())
         
-    def run_scan(self):
+    async def run_scan(self):
         """Run the network scan using airodump-ng"""
+        process = None
+        scan_prefix = None
         try:
-            # Run airodump-ng to scan for networks
-            process = subprocess.Popen(
-                ["sudo", "airodump-ng", "wlan1mon", "--output-format", "csv", "-w", "temp_scan"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            # Read the live table instead of starting another capture
+            if self.scanner is not None:
+                await self.read_shared_scan()
+                return
             
-            # Wait for 5 seconds to collect data
-            time.sleep(5)
-            process.terminate()
+            # Run airodump-ng to scan for networks, its curses output is discarded
+            interface = self.monitor_interface()
+            if interface is None:
+                raise RuntimeError("no monitor interface, enable Monitor Mode first")
+            scan_prefix = self.workspace.capture_prefix("scan")
+            scan_file = f"{scan_prefix}-01.csv"
+            process = await self.supervisor.spawn(
+                ["sudo", "airodump-ng", interface, "--output-format", "csv",
+                 "--write-interval", "1", "-w", scan_prefix], ROLE_CAPTURE
+            )
+            if not await process.wait_for_file(scan_file, timeout=10):
+                raise RuntimeError("airodump-ng did not start capturing")
             
-            # Read the CSV file
-            with open("temp_scan-01.csv", "r") as f:
-                lines = f.readlines()
+            report = None
+            if self.adaptive_scan:
+                # Collect data until the set of BSSIDs stops growing
+                tracker = DiscoveryTracker(self.scan_max_time, self.scan_confidence)
+                report = await wait_for_csv_convergence(scan_file, tracker)
+            else:
+                # Wait for 5 seconds to collect data
+                await asyncio.sleep(5)
+            await self.supervisor.terminate(process)
             
-            # Parse network data
-            networks = []
-            for line in lines:
-                if "," in line and "BSSID" not in line and "Station" not in line:
-                    parts = line.strip().split(",")
-                    if len(parts) >= 14:
-                        bssid = parts[0].strip()
-                        channel = parts[3].strip()
-                        signal = parts[8].strip()
-                        ssid = parts[13].strip()
-                        if bssid and ssid:
-                            networks.append((ssid, bssid, channel, signal))
+            # Parse network data from the CSV file
+            networks = [ap for ap in iter_access_points(scan_file) if ap.essid]
             
             # Update UI with found networks
-            self.root.after(0, self.update_network_list, networks)
+            self.root.after(0, self.update_network_list, networks, report)
             
         except Exception as e:
             self.root.after(0, self.handle_scan_error, str(e))
         finally:
             # Clean up
-            try:
-                os.remove("temp_scan-01.csv")
-            except:
-                pass
+            await self.supervisor.terminate(process)
+            if scan_prefix is not None:
+                self.workspace.remove(os.path.dirname(scan_prefix))
             self.scanning = False
             self.root.after(0, self.scan_btn.config, {"state": tk.NORMAL})
             
-    def update_network_list(self, networks):
-        """Update the network list with found networks"""
-        self.network_listbox.delete(0, tk.END)
-        for network in networks:
-            self.network_listbox.insert(tk.END, f"{network[0]} ({network[1]}) - Ch:{network[2]}")
-        self.status_label.config(text=f"Found {len(networks)} networks")
+    async def read_shared_scan(self):
+        """Read the networks from the shared background scanner"""
+        # Only the first scan after monitor mode comes up waits for airodump-ng's first write
+        await self.scanner.start_async()
+        if not await self.scanner.wait_for_data(timeout=5):
+            raise RuntimeError("no data from scanner yet, try again")
+        
+        report = None
+        if self.adaptive_scan:
+            report = await self.scanner.wait_for_convergence(self.scan_max_time, self.scan_confidence)
+        
+        # Update UI with found networks
+        self.root.after(0, self.update_network_list, self.scanner.networks(), report)
+            
+    def update_network_list(self, networks, report=None):
+        """Update the network list with found AccessPoint records"""
+        self.networks.load(networks)
+        self.list_view.set_rows(self.networks.rows(format_network))
+        
+        if report is None:
+            self.status_label.config(text=f"Found {len(networks)} networks")
+        else:
+            self.status_label.config(text=f"Found {len(networks)} networks ({format_report(report)})")
+            print(f"Scan finished in {report.duration:.1f}s with {report.total} BSSIDs, discovery curve: {report.curve}")
         
     def handle_scan_error(self, error):
         """Handle scan errors"""
@@ -202,40 +291,48 @@ class PassiveRecon:
         
     def on_selection(self, event):
         """Handle selection in the list window"""
-        selection = self.network_listbox.curselection()
-        if not selection:
-            return
-            
         # If we're in attack mode, don't do anything with the selection
         if self.attacking:
             return
             
-        selected_text = self.network_listbox.get(selection[0])
-        # Extract BSSID and channel from the selected text
-        bssid = selected_text[selected_text.find("(")+1:selected_text.find(")")]
-        channel = selected_text[selected_text.find("Ch:")+3:].strip()
-        
-        self.selected_network = bssid
-        self.selected_channel = channel
+        # The selected keys point into the network table, rows scrolled out of a long list included
+        networks = [self.networks.get(key) for key in self.list_view.selected_keys()]
+        self.selected_networks = [ap for ap in networks if ap is not None]
+        if not self.selected_networks:
+            self.choose_btn.config(state=tk.DISABLED)
+            return
         
-        self.status_label.config(text=f"Selected network: {selected_text}")
+        if len(self.selected_networks) == 1:
+            self.status_label.config(text=f"Selected network: {format_network(self.selected_networks[0])}")
+        else:
+            self.status_label.config(text=f"Selected {len(self.selected_networks)} networks on channels "
+                                          f"{self.format_target_channels()}")
         self.choose_btn.config(state=tk.NORMAL)
         
+    def format_target_channels(self):
+        """Channels of the selected networks, as shown in the status line"""
+        return format_channels(sorted(target_channels(self.selected_networks)))
+        
     def choose_network(self):
         """Export the selected network info to a temp file"""
-        if not self.selected_network or not self.selected_channel:
+        if not target_channels(self.selected_networks):
             messagebox.showwarning("Selection Required", "Please select a network first")
             return
         
         try:
-            # Create a temp file to store the selected network info
-            self.network_info_file = tempfile.mktemp(prefix="network_info_")
-            with open(self.network_info_file, "w") as f:
-                f.write(f"BSSID: {self.selected_network}\n")
-                f.write(f"Channel: {self.selected_channel}\n")
+            # Create a temp file to store the selected network info, one BSSID/Channel pair per target
+            self.workspace.remove(getattr(self, 'network_info_file', None))
+            self.network_info_file = self.workspace.file(
+                "network_info", "".join(f"BSSID: {ap.bssid}\nChannel: {ap.channel}\n" for ap in self.selected_networks)
+            )
             
             # Update status and enable attack button
-            self.status_label.config(text=f"Network selected: {self.selected_network} on channel {self.selected_channel}")
+            if len(self.selected_networks) == 1:
+                ap = self.selected_networks[0]
+                self.status_label.config(text=f"Network selected: {ap.bssid} on channel {ap.channel}")
+            else:
+                self.status_label.config(text=f"{len(self.selected_networks)} networks selected on channels "
+                                              f"{self.format_target_channels()}")
             self.attack_btn.config(state=tk.NORMAL)
             
         except Exception as e:
@@ -260,172 +357,262 @@ class PassiveRecon:
             # Update the network label
             self.network_label.config(text="Reconnaissance Results:")
             
-            # Start attack in background thread
-            threading.Thread(target=self.run_attack, daemon=True).start()
+            # Start the capture on the process engine loop
+            self.engine.submit(self.run_attack())
         else:
             # Stop the attack
             self.stop_attack()
         
-    def run_attack(self):
+    async def run_attack(self):
         """Run the passive reconnaissance using airodump-ng"""
+        self.recon_task = asyncio.current_task()
         try:
-            # Create a unique output file for results
-            self.output_file = tempfile.mktemp(prefix="recon_")
+            # airodump-ng writes <prefix>-01.* into a fresh directory of the workspace
+            self.output_file = self.workspace.capture_prefix("recon")
             
             # Clear the listbox to display new results
-            self.root.after(0, self.network_listbox.delete, 0, tk.END)
-            self.root.after(0, lambda: self.network_listbox.insert(tk.END, f"Starting monitoring on {self.selected_network} (Ch:{self.selected_channel})..."))
+            channels = self.format_target_channels()
+            if len(self.selected_networks) == 1:
+                starting = f"Starting monitoring on {self.selected_networks[0].bssid} (Ch:{channels})..."
+                status = f"Monitoring network on channel {channels}..."
+            else:
+                starting = f"Starting monitoring on {len(self.selected_networks)} networks (Ch:{channels})..."
+                status = f"Monitoring {len(self.selected_networks)} networks on channels {channels}..."
+            self.root.after(0, self.list_view.clear)
+            self.root.after(0, lambda: self.list_view.append(starting))
             
             # Update UI with status
-            self.root.after(0, self.status_label.config, 
-                           {"text": f"Monitoring network on channel {self.selected_channel}..."})
+            self.root.after(0, self.status_label.config, {"text": status})
+            
+            # The shared scanner hops channels, so it has to let go of the interface
+            if self.scanner is not None and not self.scanner_paused:
+                self.scanner_paused = True
+                await self.scanner.pause_async()
             
-            # Run airodump-ng with specific BSSID and channel
-            self.attack_process = subprocess.Popen(
-                ["sudo", "airodump-ng", "--bssid", self.selected_network, 
-                 "-c", self.selected_channel, "--output-format", "csv",
-                 "-w", self.output_file, "wlan1mon"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+            if self.replay is not None:
+                await self.start_replay_capture()
+                return
+            
+            self.interface = self.monitor_interface()
+            if self.interface is None:
+                raise RuntimeError("no monitor interface, enable Monitor Mode first")
+            if self.recon_source == "ring":
+                await self.start_ring_capture()
+                return
+            
+            # One airodump-ng for every target, hopping between their channels when there are several
+            output_format = "pcap" if self.recon_source == "pcap" else "csv"
+            # A crashed airodump-ng is started again on an empty prefix, the readers follow the new file
+            output_file = self.output_file
+            self.attack_process = await self.supervisor.supervise(
+                self.recon_command(output_format), before_restart=lambda: self.workspace.remove_capture(output_file)
             )
             
-            # Wait a moment for the CSV file to be created
-            time.sleep(2)
+            # Recon may have been stopped while the capture was starting
+            if not self.attacking:
+                await self.supervisor.terminate(self.attack_process)
+                return
+            
+            self.reset_recon_state()
+            
+            # Both readers produce compact records keyed by MAC ints, which matters over a long session
+            if output_format == "pcap":
+                self.capture_path = f"{self.output_file}-01.cap"
+                self.capture_reader = CaptureReader(PcapFileSource(self.capture_path))
+            else:
+                self.capture_path = f"{self.output_file}-01.csv"
+                self.capture_reader = IncrementalCsvReader(self.capture_path, compact=True)
             
-            # Set the path to the CSV file
-            self.csv_file_path = f"{self.output_file}-01.csv"
+            # Wait for the capture file to be created
+            if not await self.attack_process.wait_for_file(self.capture_path, timeout=10):
+                raise RuntimeError("airodump-ng did not create its output file")
             
-            # Start reading data periodically
-            self.read_csv_data()
+            # Parse on the engine loop and let the Tk thread render the latest snapshot
+            self.root.after(0, self.ui_updater.start)
+            await self.read_csv_data()
             
         except Exception as e:
             self.root.after(0, self.handle_attack_error, str(e))
             
-    def read_csv_data(self):
-        """Read reconnaissance data from the CSV file"""
-        if not self.attacking:
-            return
-            
+    def monitor_interface(self):
+        """Name of the monitor interface to capture on, None when there is none"""
+        name = self.get_interface() if self.get_interface is not None else None
+        if name is None:
+            monitors = get_registry().monitor_interfaces()
+            name = monitors[0].name if monitors else None
+        return name
+        
+    def recon_command(self, output_format):
+        """airodump-ng command line for the selected targets"""
+        command = ["sudo", "airodump-ng"]
+        if len(self.selected_networks) == 1:
+            # airodump-ng filters on a single BSSID only, several are told apart by ReconTargets
+            command += ["--bssid", self.selected_networks[0].bssid]
+        return command + ["-c", format_channels(target_channels(self.selected_networks)),
+                          "--output-format", output_format, "-w", self.output_file, self.interface]
+    
+    async def start_ring_capture(self):
+        """Capture on the monitor interface in-process, with no airodump-ng or files in between"""
+        channels = target_channels(self.selected_networks)
+        tuner = ChannelTuner(self.interface, self.engine)
         try:
-            if os.path.exists(self.csv_file_path):
-                try:
-                    with open(self.csv_file_path, "r", errors="ignore") as f:
-                        content = f.read()
-                    
-                    # Clear the listbox and add the new data
-                    self.network_listbox.delete(0, tk.END)
-                    
-                    # Parse the CSV content to show meaningful data
-                    sections = content.split("\n\n")
-                    stations = []
-                    network_essid = None
-
-                    # Find our target network first
-                    if len(sections) >= 1:
-                        network_section = sections[0].split("\n")
-                        for line in network_section:
-                            if self.selected_network in line and "," in line:
-                                parts = line.split(',')
-                                if len(parts) >= 14:
-                                    essid = parts[13].strip()
-                                    network_essid = essid if essid else "Hidden Network"
-                    
-                    # Find connected clients in stations section
-                    if len(sections) >= 2:
-                        station_section = sections[1].split("\n")
-                        inside_station_data = False
-                        
-                        for line in station_section:
-                            # Find the start of station data
-                            if "Station MAC" in line:
-                                inside_station_data = True
-                                continue
-                                
-                            # Process each station entry
-                            if inside_station_data and line.strip() and "," in line:
-                                parts = line.split(',')
-                                if len(parts) >= 5:
-                                    mac = parts[0].strip()
-                                    # Check if this client is connected to our target network
-                                    connected_to = parts[5].strip() if len(parts) > 5 else ""
-                                    
-                                    # Include clients with no BSSID (they might be connected)
-                                    if mac and (not connected_to or self.selected_network in connected_to):
-                                        power = parts[3].strip()
-                                        packets = parts[4].strip()
-                                        
-                                        # Display just the MAC and signal info without "Client:" prefix
-                                        client_info = f"{mac} (Signal: {power}, Packets: {packets})"
-                                        stations.append(client_info)
-                                        
-                                        # Add probe requests if available
-                                        if len(parts) > 6:
-                                            probes = [p.strip() for p in parts[6:] if p.strip()]
-                                            if probes:
-                                                probe_str = ", ".join(probes)
-                                                stations.append(f"  Probes: {probe_str}")
-                    
-                    # Add just the network ESSID at the top
-                    if network_essid:
-                        self.network_listbox.insert(tk.END, f"Network: {network_essid}")
-                        self.network_listbox.insert(tk.END, "")
-                        self.network_listbox.insert(tk.END, "--- Connected Clients ---")
-                        self.network_listbox.insert(tk.END, "")
-                    
-                    # Debug info - print the raw stations section to console
-                    if len(sections) >= 2:
-                        print(f"Station section found with {len(sections[1].split(self.selected_network))-1} mentions of target network")
+            if len(channels) == 1:
+                # Nothing hops channels for us, so lock the interface to the target's channel
+                await tuner.set_channel(next(iter(channels)))
+                source = PacketRingSource(self.interface)
+            else:
+                source = PacketRingSource(self.interface, block_timeout_ms=HOPPING_BLOCK_TIMEOUT_MS)
+            # Open the ring here so a missing interface or permission shows up as a recon error
+            source.open()
+        except Exception:
+            tuner.close()
+            raise
+        self.reset_recon_state()
+        self.capture_reader = CaptureReader(source)
+        
+        if len(channels) > 1:
+            # Time-sliced plan: every target channel in turn, longer on the ones with more targets
+            scheduler = SlicedScheduler(list(channels), channels)
+            self.hopper = ChannelHopper(scheduler, tuner, self.capture_reader, self.handle_recon_delta)
+            self.hopper.dwell_scale = self.dwell_scale
+        else:
+            tuner.close()
+        
+        self.root.after(0, self.ui_updater.start)
+        await self.read_csv_data()
+    
+    async def start_replay_capture(self):
+        """Feed recorded or synthetic frames through the normal recon path"""
+        loop = asyncio.get_running_loop()
+        source = await loop.run_in_executor(None, replay_source, self.replay)
+        self.reset_recon_state()
+        self.capture_reader = CaptureReader(source)
+        
+        self.root.after(0, self.ui_updater.start)
+        await self.read_csv_data()
+    
+    def reset_recon_state(self):
+        """Fresh recon tables for a new capture"""
+        # One station table per target BSSID, all fed from the same capture
+        self.recon_targets = ReconTargets(
+            self.selected_networks, max_stations=self.max_stations, stale_after=self.station_stale_after
+        )
+        # Packet rate, RSSI average and age of the listed clients, updated every parse tick
+        self.client_metrics = ClientMetrics(stale_after=self.station_stale_after)
+        self.recon_changed = False
+        self.hopper = None
+        
+        # Everything this capture sees is also written to the survey database
+        if self.survey_store is not None:
+            self.survey_id = self.survey_store.begin_survey(", ".join(ap.bssid for ap in self.selected_networks))
+    
+    async def read_csv_data(self):
+        """Read reconnaissance data from the capture on a worker and queue snapshots for the UI"""
+        loop = asyncio.get_running_loop()
+        reader = self.capture_reader
+        hopper_task = None
+        if self.hopper is not None:
+            # The hopper polls the reader after every slice; this loop only expires clients and ticks the metrics
+            hopper_task = asyncio.ensure_future(self.hopper.run())
+        try:
+            while self.attacking:
+                if hopper_task is not None and hopper_task.done():
+                    # A tuning failure ends the recon instead of leaving the adapter on one channel
+                    hopper_task.result()
                     
-                    # Add stations information
-                    if stations:
-                        for station in stations:
-                            self.network_listbox.insert(tk.END, station)
-                    else:
-                        # Try a more aggressive approach to find clients
-                        found_any = False
-                        for line in content.split('\n'):
-                            if self.selected_network in line and "Station MAC" not in line and "BSSID" not in line:
-                                parts = line.split(',')
-                                if len(parts) >= 1 and parts[0].strip():
-                                    # This might be a client MAC address
-                                    mac = parts[0].strip()
-                                    if re.match(r'([0-9A-F]{2}[:-]){5}([0-9A-F]{2})', mac, re.I):
-                                        found_any = True
-                                        power = parts[3].strip() if len(parts) > 3 else "N/A"
-                                        # Display just the MAC without "Client:" prefix
-                                        self.network_listbox.insert(tk.END, f"{mac} (Signal: {power})")
+                try:
+                    # File I/O and parsing stay off the Tk thread; only changed rows are parsed again
+                    delta = None
+                    if hopper_task is None:
+                        delta = await loop.run_in_executor(None, reader.poll)
+                    if isinstance(getattr(reader, "source", None), PcapFileSource):
+                        # The capture file would fill the tmpfs over a long session, what was read goes back
+                        await loop.run_in_executor(None, self.workspace.rotate, self.capture_path,
+                                                   reader.source.offset)
+                    if delta is not None:
+                        self.handle_recon_delta(delta)
+                    # Clients may have gone stale even with nothing new in the file
+                    if self.recon_targets.expire():
+                        self.recon_changed = True
+                    # Rates move every tick, so the most active clients are redrawn without new data too
+                    self.client_metrics.tick()
+                    if self.observation_log is not None:
+                        # One sequential append per tick
+                        self.observation_log.flush()
+                    if self.attacking and (self.recon_changed or self.client_metrics):
+                        self.recon_changed = False
+                        self.recon_updates.put(self.build_recon_rows())
                         
-                        if not found_any:
-                            self.network_listbox.insert(tk.END, "No clients currently connected")
-                    
-                    # Ensure UI is updated immediately
-                    self.network_listbox.update_idletasks()
-                    self.network_listbox.see(0)  # Scroll to top
-                    
                 except Exception as e:
                     print(f"Error parsing CSV data: {e}")
                     import traceback
                     traceback.print_exc()
-            else:
-                # File doesn't exist yet, just wait
-                print(f"Waiting for CSV file: {self.csv_file_path}")
-            
-            # Schedule next read if still attacking
-            if self.attacking:
-                self.root.after(1000, self.read_csv_data)  # Check more frequently
                 
-        except Exception as e:
-            print(f"Error reading CSV data: {e}")
-            if self.attacking:
-                self.root.after(2000, self.read_csv_data)
+                await asyncio.sleep(self.parse_interval)
+        finally:
+            if hopper_task is not None:
+                hopper_task.cancel()
+                self.hopper.tuner.close()
+            reader.close()
+    
+    def handle_recon_delta(self, delta):
+        """Apply a capture delta to the recon results, on the engine loop; the next tick renders it"""
+        if not self.attacking:
+            return
+        self.recon_targets.apply(delta)
+        self.client_metrics.apply(delta, self.is_target_client)
+        if self.survey_store is not None:
+            self.survey_store.record(delta, self.survey_id)
+        if self.observation_log is not None:
+            self.observation_log.record(delta)
+        self.recon_changed = True
+    
+    def is_target_client(self, station):
+        """Check if a station record belongs to one of the target networks"""
+        return self.recon_targets.owner_of(station) is not None
+    
+    def build_recon_rows(self):
+        """Build the (key, text) list rows for the current recon results"""
+        rows = []
+        active = self.client_metrics.top(self.top_clients)
+        if active:
+            rows.append(("active_header", "--- Most Active Clients ---"))
+            rows += [(("active", rank), format_activity(activity)) for rank, activity in enumerate(active)]
+            rows.append(("spacer_active", ""))
+        return rows + self.recon_targets.rows()
+    
+    def render_recon_rows(self, rows):
+        """Show the latest recon snapshot, runs on the Tk thread"""
+        if not self.attacking:
+            return
+        # Only changed rows are touched, scroll position and selection are kept
+        self.list_view.set_rows(rows)
+    
+    def set_max_ui_rate(self, rate):
+        """Limit how many times per second the recon list is redrawn"""
+        self.ui_updater.set_max_rate(rate)
+    
+    def set_load_scale(self, parse_scale, dwell_scale):
+        """Parse less often and hop channels less, e.g. while the CPU runs hot"""
+        self.parse_interval = self.base_parse_interval * parse_scale
+        self.dwell_scale = dwell_scale
+        hopper = self.hopper
+        if hopper is not None:
+            hopper.dwell_scale = dwell_scale
             
     def stop_attack(self):
         """Stop the passive reconnaissance"""
-        if self.attack_process:
-            self.attack_process.terminate()
-            self.attack_process = None
-            
+        # The read loop stops taking deltas from here on
         self.attacking = False
+        
+        # Tear down the capture's process group, close the survey once the read loop is done (the results
+        # stay in the survey database after the temp files go), then hand the interface back to the shared scanner
+        self.engine.submit(self.teardown(self.attack_process, self.scanner_paused, self.recon_task, self.survey_id))
+        self.attack_process = None
+        self.scanner_paused = False
+        self.recon_task = None
+        
+        self.ui_updater.stop()
         self.attack_btn.config(text="Start Recon", command=self.start_attack)
         self.scan_btn.config(state=tk.NORMAL)
         self.choose_btn.config(state=tk.DISABLED)  # Disable Choose until new selection
@@ -434,24 +621,36 @@ class PassiveRecon:
         self.status_label.config(text="Reconnaissance stopped")
         
         # Clear the listbox
-        self.network_listbox.delete(0, tk.END)
+        self.list_view.clear()
         
-        # Clean up temporary files
+        # Clean up temporary files, the capture directory goes with everything airodump-ng wrote into it
         try:
-            if hasattr(self, 'csv_file_path') and os.path.exists(self.csv_file_path):
-                os.remove(self.csv_file_path)
-                delattr(self, 'csv_file_path')
+            if hasattr(self, 'capture_path'):
+                delattr(self, 'capture_path')
                 
-            if hasattr(self, 'output_file') and os.path.exists(f"{self.output_file}-01.csv"):
-                os.remove(f"{self.output_file}-01.csv")
+            if hasattr(self, 'output_file'):
+                self.workspace.remove(os.path.dirname(self.output_file))
                 delattr(self, 'output_file')
                 
-            if hasattr(self, 'network_info_file') and os.path.exists(self.network_info_file):
-                os.remove(self.network_info_file)
+            if hasattr(self, 'network_info_file'):
+                self.workspace.remove(self.network_info_file)
                 delattr(self, 'network_info_file')
         except Exception as e:
             print(f"Error cleaning up temp files: {e}")
         
+    async def teardown(self, process, resume_scanner, recon_task=None, survey_id=None):
+        """Terminate the recon capture's process group, end its survey and resume the shared scanner afterwards"""
+        await self.supervisor.terminate(process)
+        if recon_task is not None and recon_task is not asyncio.current_task():
+            # The read loop leaves within a tick of attacking going False; nothing is recorded after the end
+            await asyncio.gather(recon_task, return_exceptions=True)
+        if self.survey_store is not None and survey_id is not None:
+            self.survey_store.end_survey(survey_id)
+            if self.survey_id == survey_id:
+                self.survey_id = None
+        if resume_scanner:
+            await self.scanner.resume_async()
+        
     def handle_attack_error(self, error):
         """Handle attack errors"""
         self.status_label.config(text=f"Recon error: {error}")
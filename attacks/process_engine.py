@@ -0,0 +1,254 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+from collections import deque, namedtuple
+
+# Result of ProcessEngine.run(), mirrors the fields of subprocess.CompletedProcess
+CommandResult = namedtuple("CommandResult", ["args", "returncode", "stdout", "stderr", "timed_out"])
+
+# How output of a spawned process is handled
+OUTPUT_DISCARD = "discard"
+OUTPUT_DRAIN = "drain"
+
+
+def group_exists(pgid, proc="/proc"):
+    """True while some process is in process group pgid, False when none is or /proc cannot tell.
+
+    A process group id is not handed out again while a member is left, so a
+    group found here is still the one the engine started.
+    """
+    try:
+        pids = [entry for entry in os.listdir(proc) if entry.isdigit()]
+    except OSError:
+        return False
+    for pid in pids:
+        try:
+            with open(os.path.join(proc, pid, "stat"), "rb") as f:
+                data = f.read()
+            # The command name may hold spaces and parentheses, the fields start after the last ")"
+            if int(data[data.rindex(b")") + 2:].split()[2]) == pgid:
+                return True
+        except (OSError, ValueError, IndexError):
+            # Exited between listdir and open
+            continue
+    return False
+
+
+class ManagedProcess:
+    """A child process started by the engine in its own process group"""
+
+    def __init__(self, argv, process, tail_lines=200):
+        self.argv = argv
+        self.process = process
+        self.pid = process.pid
+        self.started_at = time.monotonic()
+        # Last lines of output, kept for error messages
+        self.output_tail = deque(maxlen=tail_lines)
+        self._drain_tasks = []
+
+    @property
+    def returncode(self):
+        return self.process.returncode
+
+    @property
+    def running(self):
+        return self.process.returncode is None
+
+    async def wait(self):
+        """Wait for the process to exit and return its exit code"""
+        code = await self.process.wait()
+        for task in self._drain_tasks:
+            await task
+        return code
+
+    async def wait_for_file(self, path, timeout=10.0, interval=0.1):
+        """Wait until path exists, returns False on timeout or if the process died first"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.path.exists(path):
+                return True
+            if not self.running:
+                return False
+            await asyncio.sleep(interval)
+        return os.path.exists(path)
+
+    async def _drain(self, stream):
+        """Read a pipe to the end so the child can never block on a full pipe"""
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            self.output_tail.append(line.decode(errors="ignore").rstrip())
+
+
+class ProcessEngine:
+    """asyncio loop on a background thread that starts and tears down external tools.
+
+    The Tk main loop keeps the main thread; everything that waits on a child
+    process runs as a coroutine here, so no thread sits blocked in sleep().
+    """
+
+    def __init__(self):
+        self.loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._processes = set()
+
+    def start(self):
+        """Start the event loop thread if it is not running yet"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="process-engine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def stop(self, timeout=5.0):
+        """Tear down every child that is still running and stop the loop"""
+        if not self.loop or not self.loop.is_running():
+            return
+        try:
+            self.submit(self.terminate_all()).result(timeout)
+        except Exception as e:
+            print(f"Error stopping processes: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop from any thread, returns a Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def submit_to_tk(self, root, coro, callback=None, on_error=None):
+        """Run a coroutine and hand its result to callback on the Tk thread"""
+        future = self.submit(coro)
+
+        def done(fut):
+            try:
+                result = fut.result()
+            except Exception as e:
+                if on_error:
+                    root.after(0, on_error, e)
+                else:
+                    print(f"Error in background task: {e}")
+                return
+            if callback:
+                root.after(0, callback, result)
+
+        future.add_done_callback(done)
+        return future
+
+    async def wait_until(self, predicate, timeout=1.0, interval=0.05):
+        """Poll predicate on the loop until it is true, returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+        return True
+
+    async def spawn(self, argv, output=OUTPUT_DISCARD):
+        """Start argv in a new process group and return a ManagedProcess"""
+        pipe = asyncio.subprocess.PIPE if output == OUTPUT_DRAIN else asyncio.subprocess.DEVNULL
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=pipe,
+            stderr=pipe,
+            start_new_session=os.name == "posix",
+        )
+        managed = ManagedProcess(argv, process)
+        if output == OUTPUT_DRAIN:
+            managed._drain_tasks = [
+                asyncio.ensure_future(managed._drain(process.stdout)),
+                asyncio.ensure_future(managed._drain(process.stderr)),
+            ]
+        self._processes.add(managed)
+        asyncio.ensure_future(self._reap(managed))
+        return managed
+
+    async def _reap(self, managed):
+        """Forget a process once it has exited"""
+        await managed.process.wait()
+        self._processes.discard(managed)
+
+    async def run(self, argv, timeout=None):
+        """Run argv to completion and capture its output, killing it on timeout"""
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=os.name == "posix",
+        )
+        managed = ManagedProcess(argv, process)
+        self._processes.add(managed)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            timed_out = False
+        except asyncio.TimeoutError:
+            await self.terminate(managed)
+            stdout, stderr = b"", b""
+            timed_out = True
+        finally:
+            self._processes.discard(managed)
+        return CommandResult(argv, process.returncode, stdout.decode(errors="ignore"),
+                             stderr.decode(errors="ignore"), timed_out)
+
+    def _signal_group(self, managed, sig):
+        """Send sig to the whole process group of a child"""
+        try:
+            if os.name == "posix":
+                os.killpg(managed.pid, sig)
+            else:
+                managed.process.terminate()
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            # Not root: signal the sudo wrapper, which relays to its command
+            if managed.running:
+                managed.process.send_signal(sig)
+
+    async def terminate(self, managed, timeout=2.0):
+        """SIGTERM the process group, then SIGKILL it if it does not exit in time"""
+        if managed is None:
+            return None
+        if managed.running:
+            self._signal_group(managed, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(managed.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                self._signal_group(managed, getattr(signal, "SIGKILL", signal.SIGTERM))
+                await managed.process.wait()
+        # Children of the group may outlive the leader, make sure they are gone too. Once the group
+        # is empty its id may belong to someone else, so it is only signalled while members are left
+        if os.name == "posix" and group_exists(managed.pid):
+            self._signal_group(managed, signal.SIGKILL)
+        self._processes.discard(managed)
+        return managed.returncode
+
+    async def terminate_all(self, timeout=2.0):
+        """Terminate every process the engine still tracks"""
+        await asyncio.gather(*(self.terminate(p, timeout) for p in list(self._processes)),
+                             return_exceptions=True)
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the shared ProcessEngine, starting it on first use"""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = ProcessEngine().start()
+        return _default_engine
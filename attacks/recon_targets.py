@@ -0,0 +1,134 @@
+from .compact import mac_to_int
+from .network_model import STATION_STALE_AFTER, STATION_TABLE_MAX_SIZE, StationTable
+
+
+def target_channels(networks):
+    """{channel: number of targets on it} for the selected networks, in selection order"""
+    channels = {}
+    for ap in networks:
+        if isinstance(ap.channel, int) and ap.channel > 0:
+            channels[ap.channel] = channels.get(ap.channel, 0) + 1
+    return channels
+
+
+class ReconTarget:
+    """One watched network and the clients seen on it"""
+
+    def __init__(self, bssid, channel, max_stations=STATION_TABLE_MAX_SIZE, stale_after=STATION_STALE_AFTER):
+        self.bssid = bssid
+        self.bssid_id = mac_to_int(bssid)
+        self.channel = channel
+        # Filled in from the capture's AP records
+        self.essid = None
+        self.stations = StationTable("mac_id", max_size=max_stations, stale_after=stale_after)
+
+
+class ReconTargets:
+    """Demultiplex the stations of one capture into a StationTable per target BSSID.
+
+    A station is listed under the target it is associated with and moves when
+    it roams from one target to another; clients of other networks are
+    dropped. With a single target, stations with no BSSID are listed under it
+    too, as the --bssid capture always did; with several there is no telling
+    whose they are.
+    """
+
+    def __init__(self, networks, max_stations=STATION_TABLE_MAX_SIZE, stale_after=STATION_STALE_AFTER):
+        self.targets = {}
+        for ap in networks:
+            target = ReconTarget(ap.bssid, ap.channel, max_stations, stale_after)
+            self.targets.setdefault(target.bssid_id, target)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __iter__(self):
+        return iter(self.targets.values())
+
+    def get(self, bssid_id):
+        return self.targets.get(bssid_id)
+
+    @property
+    def station_count(self):
+        return sum(len(target.stations) for target in self)
+
+    def owner_of(self, station):
+        """bssid_id of the target a station record belongs to, or None"""
+        if station.bssid_id is None and len(self.targets) == 1:
+            return next(iter(self.targets))
+        return station.bssid_id if station.bssid_id in self.targets else None
+
+    def apply(self, delta):
+        """Apply a capture delta to the per-target tables"""
+        # Target ESSIDs from the AP section
+        for bssid, ap in list(delta.aps.added.items()) + list(delta.aps.updated.items()):
+            target = self.targets.get(bssid)
+            if target is not None:
+                target.essid = ap.essid if ap.essid else "Hidden Network"
+
+        changed = list(delta.stations.added.values()) + list(delta.stations.updated.values())
+        updates = {bssid_id: [] for bssid_id in self.targets}
+        for station in changed:
+            owner = self.owner_of(station)
+            if owner is not None:
+                updates[owner].append(station)
+
+        for bssid_id, target in self.targets.items():
+            # Stations that are gone, roamed to another target or left for another network
+            gone = list(delta.stations.removed)
+            gone += [station.mac_id for station in changed
+                     if station.mac_id in target.stations and self.owner_of(station) != bssid_id]
+            target.stations.remove(gone)
+            if updates[bssid_id]:
+                target.stations.update(updates[bssid_id])
+
+    def expire(self):
+        """Evict stale clients from every table, returns True when any went"""
+        expired = False
+        for target in self:
+            expired = bool(target.stations.expire()) or expired
+        return expired
+
+    def rows(self):
+        """(key, text) list rows: each target's network line followed by its clients"""
+        if len(self.targets) == 1:
+            return self._station_rows(next(iter(self)), single=True)
+        rows = []
+        for target in self:
+            if rows:
+                rows.append((("spacer", target.bssid_id), ""))
+            rows += self._station_rows(target, single=False)
+        return rows
+
+    def _station_rows(self, target, single):
+        rows = []
+        if single:
+            # Add just the network ESSID at the top
+            if target.essid:
+                rows += [
+                    ("network", f"Network: {target.essid}"),
+                    ("spacer_top", ""),
+                    ("clients_header", "--- Connected Clients ---"),
+                    ("spacer_clients", ""),
+                ]
+        else:
+            name = target.essid or target.bssid
+            rows.append((("network", target.bssid_id),
+                         f"{name} (Ch:{target.channel}) - {len(target.stations)} clients"))
+
+        if target.stations:
+            for station in target.stations:
+                # Display just the MAC and signal info without "Client:" prefix
+                rows.append((station.mac_id, f"{station.mac} (Signal: {station.power}, Packets: {station.packets})"))
+
+                # Add probe requests if available
+                if station.probes:
+                    rows.append((("probes", station.mac_id), f"  Probes: {', '.join(station.probes)}"))
+        elif single:
+            rows.append(("no_clients", "No clients currently connected"))
+
+        # Evicted clients are summarized instead of listed
+        summary = target.stations.summary("clients")
+        if summary:
+            rows.append(("evicted_summary", summary) if single else (("evicted_summary", target.bssid_id), summary))
+        return rows
@@ -0,0 +1,340 @@
+import asyncio
+import bisect
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+
+from .airodump_csv import AccessPoint, Station, iter_file, write_csv
+from .capture import CaptureSource, FrameModel, read_pcap, write_pcap_header, write_pcap_record
+from .compact import NOT_ASSOCIATED_TEXT, format_time, int_to_mac, mac_to_int, parse_time
+from .dot11 import (
+    LINKTYPE_IEEE802_11_RADIOTAP, build_beacon, build_data, build_probe_request, build_radiotap,
+    parse_packet,
+)
+
+# Replay speeds by name; None replays as fast as the consumer keeps up
+SPEEDS = {"1x": 1.0, "10x": 10.0, "max": None}
+
+# What to replay and how fast, see replay_config()
+ReplayConfig = namedtuple("ReplayConfig", ["source", "speed"])
+
+PCAP_SUFFIXES = (".cap", ".pcap")
+
+
+def parse_speed(value):
+    """"1x", "10x", "max" or a number to a speed factor, None meaning maximum"""
+    if value is None:
+        return 1.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip().lower()
+    if value in SPEEDS:
+        return SPEEDS[value]
+    return float(value.rstrip("x"))
+
+
+def replay_config(environ=os.environ):
+    """Replay settings from MELRO_REPLAY and MELRO_REPLAY_SPEED, None when replay is off.
+
+    MELRO_REPLAY is a recorded airodump-ng CSV, a pcap, or
+    "synthetic[:APS[:STATIONS[:SEED]]]" for a generated survey.
+    """
+    source = environ.get("MELRO_REPLAY")
+    if not source:
+        return None
+    return ReplayConfig(source, parse_speed(environ.get("MELRO_REPLAY_SPEED", "1x")))
+
+
+def _sleep_for(seconds, speed):
+    """Wall time for seconds of capture time at a speed"""
+    return seconds / speed if speed else 0
+
+
+class Survey:
+    """AP and station records on a discovery timeline.
+
+    Records are ordered by first-seen time, so what a capture would show after
+    some seconds is a prefix of each list. Surveys come from a recorded CSV or
+    pcap, or from synthetic_survey().
+    """
+
+    def __init__(self, access_points, stations):
+        self.access_points = sorted(access_points, key=lambda r: r.first_seen or "")
+        self.stations = sorted(stations, key=lambda r: r.first_seen or "")
+
+        times = [parse_time(r.first_seen) for r in self.access_points + self.stations]
+        times = [t for t in times if t is not None]
+        self.start = min(times) if times else 0
+        self.duration = (max(times) - self.start) if times else 0
+
+        self._ap_offsets = [self._offset(r) for r in self.access_points]
+        self._station_offsets = [self._offset(r) for r in self.stations]
+
+    @classmethod
+    def from_csv(cls, path):
+        records = list(iter_file(path))
+        return cls([r for r in records if isinstance(r, AccessPoint)],
+                   [r for r in records if isinstance(r, Station)])
+
+    @classmethod
+    def from_pcap(cls, path):
+        linktype, packets = read_pcap(path)
+        model = FrameModel()
+        model.apply(f for f in (parse_packet(memoryview(p), linktype, ts) for ts, p in packets) if f)
+        return cls([ap.to_record() for ap in model.aps.values()],
+                   [station.to_record() for station in model.stations.values()])
+
+    def _offset(self, record):
+        seen = parse_time(record.first_seen)
+        return (seen - self.start) if seen is not None else 0
+
+    def visible(self, offset=None):
+        """(access points, stations) discovered within offset seconds of the start"""
+        if offset is None:
+            return self.access_points, self.stations
+        aps = bisect.bisect_right(self._ap_offsets, offset)
+        stations = bisect.bisect_right(self._station_offsets, offset)
+        return self.access_points[:aps], self.stations[:stations]
+
+    def write_csv(self, path, offset=None):
+        write_csv(path, *self.visible(offset))
+
+    def packets(self, frames_per_device=3, seed=1):
+        """Deterministic radiotap packets that reproduce the survey, as [(timestamp, bytes)]"""
+        rng = random.Random(seed)
+        channels = {}
+        events = []
+        end = self.start + max(self.duration, 1)
+
+        for ap in self.access_points:
+            bssid = mac_to_int(ap.bssid)
+            if bssid is None:
+                continue
+            channels[bssid] = ap.channel or 1
+            first = parse_time(ap.first_seen) or self.start
+            for i in range(frames_per_device):
+                ts = first + (rng.uniform(0, end - first) if i else 0.0)
+                packet = build_radiotap(channels[bssid], ap.power) + build_beacon(bssid, ap.essid or "", channels[bssid])
+                events.append((ts, packet))
+
+        for station in self.stations:
+            mac = mac_to_int(station.mac)
+            if mac is None:
+                continue
+            bssid = mac_to_int(station.bssid) if station.bssid else None
+            first = parse_time(station.first_seen) or self.start
+            probes = station.probes or ("",)
+            for i in range(frames_per_device):
+                ts = first + (rng.uniform(0, end - first) if i else 0.0)
+                if bssid is not None and i % 2 == 0:
+                    radiotap = build_radiotap(channels.get(bssid, 1), station.power)
+                    events.append((ts, radiotap + build_data(bssid, mac, payload=b"\0" * 32)))
+                else:
+                    radiotap = build_radiotap(1, station.power)
+                    events.append((ts, radiotap + build_probe_request(mac, probes[i % len(probes)])))
+
+        events.sort(key=lambda e: e[0])
+        return events
+
+    def write_pcap(self, path, frames_per_device=3, seed=1):
+        with open(path, "wb") as f:
+            write_pcap_header(f, LINKTYPE_IEEE802_11_RADIOTAP)
+            for ts, packet in self.packets(frames_per_device, seed):
+                write_pcap_record(f, ts, packet)
+
+
+def synthetic_survey(ap_count=100, station_count=400, seed=1, duration=60.0, start=1750000000, essids=None):
+    """Seeded survey of ap_count APs and station_count stations.
+
+    Most devices are discovered early and a tail shows up later, like a real
+    scan. One ESSID in ten contains a comma and a third of the stations are not
+    associated, to exercise the parsers.
+    """
+    rng = random.Random(seed)
+    used = set()
+
+    def new_mac():
+        while True:
+            # Unicast, globally administered
+            mac = rng.getrandbits(48) & ~(0x03 << 40)
+            if mac not in used:
+                used.add(mac)
+                return int_to_mac(mac)
+
+    def discovered():
+        return start + int(duration * rng.random() ** 3)
+
+    last = format_time(start + int(duration))
+    aps = []
+    for i in range(ap_count):
+        if essids:
+            essid = rng.choice(essids)
+        else:
+            essid = f"Net_{i}, Guest" if i % 10 == 0 else f"Net_{i}"
+        aps.append(AccessPoint(
+            new_mac(), format_time(discovered()), last, rng.randint(1, 13), 130, "WPA2", "CCMP", "PSK",
+            rng.randint(-90, -30), rng.randint(1, 5000), 0, "0.  0.  0.  0", len(essid), essid, "",
+        ))
+
+    stations = []
+    for i in range(station_count):
+        bssid = rng.choice(aps).bssid if aps and i % 3 else NOT_ASSOCIATED_TEXT
+        probes = tuple(f"Probe_{rng.randint(0, 99)}" for _ in range(rng.randint(0, 3)))
+        stations.append(Station(
+            new_mac(), format_time(discovered()), last, rng.randint(-90, -30), rng.randint(1, 900), bssid, probes,
+        ))
+
+    return Survey(aps, stations)
+
+
+def load_survey(source):
+    """Survey for a replay source: a CSV, a pcap, or "synthetic[:APS[:STATIONS[:SEED]]]" """
+    if source.startswith("synthetic"):
+        numbers = [int(part) for part in source.split(":")[1:]]
+        defaults = [1000, 4000, 1]
+        ap_count, station_count, seed = numbers + defaults[len(numbers):]
+        return synthetic_survey(ap_count, station_count, seed)
+    if source.endswith(PCAP_SUFFIXES):
+        return Survey.from_pcap(source)
+    return Survey.from_csv(source)
+
+
+class CsvReplay:
+    """Rewrite a CSV file on airodump-ng's write schedule from a survey.
+
+    Every write interval of capture time the file is rewritten with the records
+    discovered so far; speed scales capture time to wall time (None: no waits).
+    """
+
+    def __init__(self, survey, path, speed=1.0, write_interval=1.0):
+        self.survey = survey
+        self.path = path
+        self.speed = speed
+        self.write_interval = write_interval
+        self.writes = 0
+        # time.monotonic() of the last completed write, for latency measurements
+        self.last_write = None
+        self.finished = False
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        offset = 0.0
+        while True:
+            await loop.run_in_executor(None, self.survey.write_csv, self.path, offset)
+            self.writes += 1
+            self.last_write = time.monotonic()
+            if offset >= self.survey.duration:
+                break
+            offset += self.write_interval
+            await asyncio.sleep(_sleep_for(self.write_interval, self.speed))
+        self.finished = True
+
+
+class PcapReplay:
+    """Append packets to a pcap file at their capture pace, like a live airodump-ng -w"""
+
+    def __init__(self, packets, path, linktype=LINKTYPE_IEEE802_11_RADIOTAP, speed=1.0):
+        self.packets = packets
+        self.path = path
+        self.linktype = linktype
+        self.speed = speed
+        self.written = 0
+        self.finished = False
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_pcap(cls, source, path, speed=1.0):
+        linktype, packets = read_pcap(source)
+        return cls(packets, path, linktype, speed)
+
+    async def run(self):
+        """Write on an executor thread so pacing does not hold up the loop"""
+        await asyncio.get_running_loop().run_in_executor(None, self._run)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        started = time.monotonic()
+        first = self.packets[0][0] if self.packets else 0
+        with open(self.path, "wb") as f:
+            write_pcap_header(f, self.linktype)
+            f.flush()
+            for ts, packet in self.packets:
+                if self._stop.is_set():
+                    break
+                wait = _sleep_for(ts - first, self.speed) - (time.monotonic() - started)
+                if wait > 0:
+                    f.flush()
+                    if self._stop.wait(wait):
+                        break
+                write_pcap_record(f, ts, packet)
+                self.written += 1
+        self.finished = True
+
+
+class ReplaySource(CaptureSource):
+    """CaptureSource that hands out recorded or synthetic packets at their capture pace"""
+
+    def __init__(self, packets, linktype=LINKTYPE_IEEE802_11_RADIOTAP, speed=1.0, clock=time.monotonic):
+        self.packets = packets
+        self.linktype = linktype
+        self.speed = speed
+        self.clock = clock
+        self.frames_read = 0
+        self._index = 0
+        self._started = None
+
+    @classmethod
+    def from_pcap(cls, path, speed=1.0):
+        linktype, packets = read_pcap(path)
+        return cls(packets, linktype, speed)
+
+    @classmethod
+    def from_survey(cls, survey, speed=1.0, frames_per_device=3):
+        return cls(survey.packets(frames_per_device), LINKTYPE_IEEE802_11_RADIOTAP, speed)
+
+    @property
+    def exhausted(self):
+        return self._index >= len(self.packets)
+
+    def read(self, max_frames=None):
+        if self.exhausted:
+            return []
+        if self._started is None:
+            self._started = self.clock()
+
+        first = self.packets[0][0]
+        if self.speed:
+            due = first + (self.clock() - self._started) * self.speed
+        else:
+            due = float("inf")
+
+        frames = []
+        while self._index < len(self.packets):
+            ts, packet = self.packets[self._index]
+            if ts > due:
+                break
+            self._index += 1
+            frame = parse_packet(memoryview(packet), self.linktype, ts)
+            if frame is not None:
+                frames.append(frame)
+                if max_frames and len(frames) >= max_frames:
+                    break
+
+        self.frames_read += len(frames)
+        return frames
+
+
+def replay_source(config):
+    """ReplaySource for a ReplayConfig; pcaps replay their own packets"""
+    if config.source.endswith(PCAP_SUFFIXES):
+        return ReplaySource.from_pcap(config.source, config.speed)
+    return ReplaySource.from_survey(load_survey(config.source), config.speed)
+
+
+def csv_replay(config, path):
+    """CsvReplay of a ReplayConfig into path"""
+    return CsvReplay(load_survey(config.source), path, config.speed)
@@ -0,0 +1,400 @@
+import asyncio
+import os
+import threading
+import time
+from collections import namedtuple
+
+from .capture import CaptureReader
+from .channel_scheduler import SCHEDULERS, ChannelHopper, ChannelTuner, DecisionLog
+from .channels import DEFAULT_BANDS, band_channels, format_channels, partition_channels
+from .convergence import DiscoveryTracker, FIXED_SCAN_TIME, SCAN_MAX_TIME, SCAN_CONFIDENCE
+from .csv_reader import IncrementalCsvReader
+from .packet_ring import PacketRingSource
+from .process_engine import get_engine
+from .replay import csv_replay
+from .workspace import get_workspace
+from .supervisor import Supervisor
+
+# "airodump" lets airodump-ng hop; "adaptive" and "fixed" capture in-process
+# through a packet ring while a ChannelScheduler tunes the adapter
+SCAN_HOPPING = "airodump"
+# Short ring block timeout for scheduled hopping, so frames are counted on the channel they came from
+HOPPING_BLOCK_TIMEOUT_MS = 20
+
+# What one adapter of a sweep contributes: its hop list, the BSSIDs it has
+# seen, how many of those no other adapter saw, and when it last delivered data
+AdapterCoverage = namedtuple("AdapterCoverage", ["interface", "channels", "aps", "unique", "last_update"])
+
+
+def format_coverage(coverage):
+    """One line per adapter for the log"""
+    return [f"{c.interface}: channels {format_channels(c.channels) or 'all'}, {c.aps} BSSIDs, {c.unique} only here"
+            for c in coverage]
+
+
+def _rank(record):
+    return (record.last_seen_ts or 0, record.power if record.power is not None else -1000)
+
+
+def _better(record, other):
+    """The more useful of two sightings of one BSSID: the fresher one, then the stronger one"""
+    if other is None:
+        return record
+    if _rank(record) >= _rank(other):
+        return record
+    return other
+
+
+class AdapterCapture:
+    """Capture on one monitor interface over its share of the channels.
+
+    Either airodump-ng writing a CSV, or a packet ring read in-process while a
+    ChannelHopper tunes the adapter (hopper is set).
+    """
+
+    def __init__(self, interface, channels, prefix, reader=None):
+        self.interface = interface
+        self.channels = channels
+        self.prefix = prefix
+        self.reader = reader or IncrementalCsvReader(f"{prefix}-01.csv", compact=True)
+        self.process = None
+        self.hopper = None
+        self.poll_task = None
+        # CompactAccessPoint records from this adapter alone
+        self.aps = {}
+        self.last_update = None
+
+    @property
+    def running(self):
+        if self.hopper is not None:
+            return self.poll_task is not None and not self.poll_task.done()
+        return self.process is not None and self.process.running
+
+    def command(self, bands):
+        argv = ["sudo", "airodump-ng", self.interface, "--output-format", "csv", "--write-interval", "1",
+                "-w", self.prefix]
+        if self.channels:
+            argv[3:3] = ["-c", format_channels(self.channels)]
+        elif bands != DEFAULT_BANDS:
+            argv[3:3] = ["--band", bands]
+        return argv
+
+
+class BackgroundScanner:
+    """Long-running airodump-ng captures that keep a live table of access points.
+
+    One scanner is owned by the application and shared by every page, so a scan
+    request only has to read the current table instead of starting a capture.
+    The capture and its CSV polling run as coroutines on the ProcessEngine loop;
+    the *_async methods must be awaited there, the plain ones can be called from
+    any thread and return a Future.
+
+    With several monitor interfaces the channels of the scanned bands are split
+    between them and each runs its own airodump-ng on its share, so every
+    channel gets N times the dwell time; their sightings are merged into one
+    table with a BSSID kept once.
+
+    With hopping "adaptive" (or "fixed") there is no airodump-ng: frames come
+    from a packet ring and a ChannelScheduler decides where each adapter
+    listens and for how long.
+
+    With a ReplayConfig the CSV is written by a CsvReplay instead of airodump-ng,
+    so the whole scan path runs without a monitor-mode adapter.
+    """
+
+    def __init__(self, interface="wlan1mon", poll_interval=1.0, engine=None, replay=None, bands=DEFAULT_BANDS,
+                 hopping=SCAN_HOPPING, decision_log_dir=None, workspace=None,
+                 supervisor=None):
+        # A single name or a list of monitor interfaces
+        self.interfaces = [interface] if isinstance(interface, str) else list(interface)
+        self.poll_interval = self.base_poll_interval = poll_interval
+        # Stretches the channel dwell of scheduled hopping, raised by the thermal governor
+        self.dwell_scale = 1.0
+        self.engine = engine or get_engine()
+        # airodump-ng runs supervised: pinned off the UI core and restarted when it crashes
+        self.supervisor = supervisor or Supervisor(self.engine)
+        self.replay = replay
+        self.bands = bands
+        self.hopping = hopping
+        # Where scheduled hopping writes hops_<interface>.jsonl, None for no log
+        self.decision_log_dir = decision_log_dir
+        # Each capture's CSV goes to a fresh directory of the session workspace on tmpfs
+        self.workspace = workspace or get_workspace()
+
+        self.captures = []
+        self.output_dir = None
+        self.started_at = None
+        self.last_update = None
+
+        # Live CompactAccessPoint table keyed by the BSSID as an int, guarded by the lock
+        self._lock = threading.Lock()
+        self._aps = {}
+        self._has_data = threading.Event()
+
+        # Discovery rate since the capture started, used by adaptive scans
+        self.tracker = DiscoveryTracker()
+
+        # The capture should run unless an attack needs the interface
+        self._wanted = False
+        self._pause_count = 0
+        self._replay_task = None
+
+    @property
+    def interface(self):
+        """The first monitor interface"""
+        return self.interfaces[0] if self.interfaces else None
+
+    @interface.setter
+    def interface(self, name):
+        self.interfaces = [name]
+
+    @property
+    def is_running(self):
+        """True while an airodump-ng capture process is alive, or a replay is loaded"""
+        if self._replay_task is not None:
+            return True
+        return any(capture.running for capture in self.captures)
+
+    def channel_plan(self):
+        """{interface: channels} for a capture, empty channels meaning airodump-ng's own hopping"""
+        if len(self.interfaces) < 2:
+            channels = band_channels(self.bands) if self.hopping != "airodump" else []
+            return {name: channels for name in self.interfaces}
+        parts = partition_channels(band_channels(self.bands), len(self.interfaces))
+        return dict(zip(self.interfaces, parts))
+
+    def coverage(self):
+        """AdapterCoverage for each adapter of the current capture"""
+        with self._lock:
+            counts = {}
+            for capture in self.captures:
+                for bssid in capture.aps:
+                    counts[bssid] = counts.get(bssid, 0) + 1
+            return [AdapterCoverage(c.interface, c.channels, len(c.aps),
+                                    sum(1 for bssid in c.aps if counts[bssid] == 1), c.last_update)
+                    for c in self.captures]
+
+    def start(self):
+        """Start the capture if it is not already running"""
+        return self.engine.submit(self.start_async())
+
+    def stop(self):
+        """Stop the capture and forget the AP table"""
+        return self.engine.submit(self.stop_async())
+
+    def pause(self):
+        """Release the interface for an attack, keeping the current table"""
+        return self.engine.submit(self.pause_async())
+
+    def resume(self):
+        """Undo one pause() and restart the capture once nobody needs the interface"""
+        return self.engine.submit(self.resume_async())
+
+    def set_load_scale(self, poll_scale, dwell_scale):
+        """Poll the CSV less often and hop channels less, e.g. while the CPU runs hot.
+
+        airodump-ng's own hopping is not changed, only the in-process hoppers.
+        """
+        self.poll_interval = self.base_poll_interval * poll_scale
+        self.dwell_scale = dwell_scale
+        for capture in list(self.captures):
+            if capture.hopper is not None:
+                capture.hopper.dwell_scale = dwell_scale
+
+    async def start_async(self):
+        self._wanted = True
+        if not self._pause_count:
+            await self._start_capture()
+
+    async def stop_async(self):
+        self._wanted = False
+        await self._stop_capture()
+        with self._lock:
+            self._aps = {}
+            self._has_data.clear()
+
+    async def pause_async(self):
+        self._pause_count += 1
+        if self._pause_count == 1:
+            await self._stop_capture()
+
+    async def resume_async(self):
+        self._pause_count = max(0, self._pause_count - 1)
+        if self._pause_count == 0 and self._wanted:
+            await self._start_capture()
+
+    def snapshot(self):
+        """Return a copy of the current AccessPoint records"""
+        with self._lock:
+            return list(self._aps.values())
+
+    def networks(self):
+        """Return the AccessPoint records of named networks in the table"""
+        return [ap for ap in self.snapshot() if ap.essid]
+
+    async def wait_for_data(self, timeout=None):
+        """Wait until the first CSV write has been read, returns False on timeout"""
+        deadline = time.monotonic() + (timeout if timeout is not None else float("inf"))
+        while not self._has_data.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        return self._has_data.is_set()
+
+    async def wait_for_convergence(self, max_time=SCAN_MAX_TIME, confidence=SCAN_CONFIDENCE):
+        """Wait until the AP set is stable or max_time passes, returns a ScanReport"""
+        requested = time.monotonic()
+        self.tracker.confidence = confidence
+        while not self.tracker.converged():
+            remaining = max_time - (time.monotonic() - requested)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(self.poll_interval, remaining))
+        report = self.tracker.report()
+
+        # A warm capture is usually already stable, so report the time this request waited
+        # against the fixed scan it replaces
+        duration = time.monotonic() - requested
+        return report._replace(duration=duration, time_saved=max(0.0, FIXED_SCAN_TIME - duration))
+
+    async def _start_capture(self):
+        """Spawn airodump-ng per adapter and the tasks that follow their CSV output"""
+        if self.is_running:
+            return
+
+        # APs kept over a pause count as already discovered
+        with self._lock:
+            self.tracker.start()
+            self.tracker.observe(self._aps)
+
+        self.output_dir = self.workspace.directory("background_scan")
+        if self.replay is not None:
+            capture = AdapterCapture("replay", [], os.path.join(self.output_dir, "scan"))
+            self.captures = [capture]
+            self._replay_task = asyncio.ensure_future(csv_replay(self.replay, capture.reader.path).run())
+        elif self.hopping != "airodump":
+            self.captures = []
+            try:
+                for name, channels in self.channel_plan().items():
+                    self.captures.append(self._hopping_capture(name, channels))
+            except Exception:
+                # No ring (no root or no interface): release the adapters opened so far
+                for capture in self.captures:
+                    capture.hopper.tuner.close()
+                    capture.reader.close()
+                self.captures = []
+                raise
+            self.started_at = time.time()
+            for capture in self.captures:
+                capture.poll_task = asyncio.ensure_future(capture.hopper.run())
+            return
+        else:
+            self.captures = [AdapterCapture(name, channels, os.path.join(self.output_dir, f"scan_{name}"))
+                             for name, channels in self.channel_plan().items()]
+            try:
+                for capture in self.captures:
+                    # airodump-ng draws a curses UI on stdout, which nobody reads. After a crash it is
+                    # started again on an emptied prefix and the CSV reader picks up the new file
+                    capture.process = await self.supervisor.supervise(
+                        capture.command(self.bands), name=f"airodump-ng {capture.interface}",
+                        before_restart=lambda prefix=capture.prefix: self.workspace.remove_capture(prefix)
+                    )
+            except Exception:
+                # A later adapter failed: stop the captures already running, they would never be followed
+                for capture in self.captures:
+                    if capture.process is not None:
+                        await self.supervisor.terminate(capture.process)
+                    capture.reader.close()
+                self.captures = []
+                self.workspace.remove(self.output_dir)
+                self.output_dir = None
+                raise
+        self.started_at = time.time()
+        for capture in self.captures:
+            capture.poll_task = asyncio.ensure_future(self._poll_loop(capture))
+
+    def _hopping_capture(self, interface, channels):
+        """AdapterCapture on a packet ring, with a scheduler driving the channel"""
+        source = PacketRingSource(interface, block_timeout_ms=HOPPING_BLOCK_TIMEOUT_MS)
+        source.open()
+        capture = AdapterCapture(interface, channels, None, CaptureReader(source))
+        log = None
+        if self.decision_log_dir:
+            log = DecisionLog(os.path.join(self.decision_log_dir, f"hops_{interface}.jsonl"))
+        scheduler = SCHEDULERS[self.hopping](channels, log=log)
+        capture.hopper = ChannelHopper(scheduler, ChannelTuner(interface, self.engine), capture.reader,
+                                       lambda delta: self._apply(capture, delta))
+        capture.hopper.dwell_scale = self.dwell_scale
+        return capture
+
+    async def _stop_capture(self):
+        """Terminate every airodump-ng and clean up the output directory"""
+        for capture in self.captures:
+            if capture.poll_task:
+                capture.poll_task.cancel()
+                capture.poll_task = None
+        if self._replay_task:
+            self._replay_task.cancel()
+            self._replay_task = None
+
+        for capture in self.captures:
+            if capture.process:
+                try:
+                    await self.supervisor.terminate(capture.process)
+                except Exception as e:
+                    print(f"Error stopping scanner: {e}")
+                capture.process = None
+            if capture.hopper is not None:
+                capture.hopper.tuner.close()
+                if capture.hopper.scheduler.log is not None:
+                    capture.hopper.scheduler.log.close()
+                capture.reader.close()
+
+        if self.output_dir:
+            self.workspace.remove(self.output_dir)
+            self.output_dir = None
+
+    def _merge(self, capture, delta):
+        """Apply one adapter's delta and refresh the merged entries it touches, under the lock"""
+        for bssid in delta.aps.removed:
+            capture.aps.pop(bssid, None)
+        capture.aps.update(delta.aps.added)
+        capture.aps.update(delta.aps.updated)
+
+        if len(self.captures) == 1:
+            for bssid in delta.aps.removed:
+                self._aps.pop(bssid, None)
+            self._aps.update(delta.aps.added)
+            self._aps.update(delta.aps.updated)
+            return
+
+        for bssid in (*delta.aps.removed, *delta.aps.added, *delta.aps.updated):
+            best = None
+            for other in self.captures:
+                record = other.aps.get(bssid)
+                if record is not None:
+                    best = _better(record, best)
+            if best is None:
+                self._aps.pop(bssid, None)
+            else:
+                self._aps[bssid] = best
+
+    def _apply(self, capture, delta):
+        """Merge one adapter's delta into the table, on the engine loop"""
+        with self._lock:
+            self._merge(capture, delta)
+        # The tracker counts a BSSID once, whichever adapter found it
+        self.tracker.observe(delta.aps.added)
+        capture.last_update = self.last_update = time.time()
+        self._has_data.set()
+
+    async def _poll_loop(self, capture):
+        """Apply one adapter's CSV deltas to the AP table until the capture stops"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Reading and diffing the file happens off the loop
+                delta = await loop.run_in_executor(None, capture.reader.poll)
+                if delta is not None:
+                    self._apply(capture, delta)
+            except Exception as e:
+                print(f"Error reading scanner data: {e}")
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,318 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+
+from .process_engine import OUTPUT_DISCARD
+
+# The core the Tk main loop keeps to itself; captures and attacks run on the others.
+# MELRO_UI_CPU picks another one
+UI_CPU = int(os.environ.get("MELRO_UI_CPU", "0"))
+
+# What a child is, which decides how it is scheduled
+ROLE_CAPTURE = "capture"
+ROLE_ATTACK = "attack"
+ROLE_CONTROL = "control"
+
+# ionice classes
+IO_BEST_EFFORT = 2
+IO_IDLE = 3
+
+# Crashed captures are restarted after 1 s, doubling up to 30 s; a run that
+# lasted STABLE_AFTER seconds starts the backoff over
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 30.0
+STABLE_AFTER = 60.0
+
+# nice value, ionice class and level, and CPUs (None for any) a child runs with
+ProcessPolicy = namedtuple("ProcessPolicy", ["nice", "io_class", "io_level", "cpus"])
+
+# Usage of one child's whole process group: the sudo wrapper and the tool it started
+ChildStats = namedtuple("ChildStats", ["name", "pid", "processes", "cpu_percent", "rss", "restarts"])
+
+
+def worker_cpus(ui_cpu=UI_CPU):
+    """CPUs children may use: every allowed one but the UI core, None when that leaves nothing"""
+    try:
+        cpus = os.sched_getaffinity(0)
+    except (AttributeError, OSError):
+        return None
+    others = sorted(cpus - {ui_cpu})
+    return others if others and len(others) < len(cpus) else None
+
+
+def pin_ui_thread(ui_cpu=UI_CPU):
+    """Keep the calling thread, the Tk main loop, on UI_CPU; True when it was pinned.
+
+    Threads inherit the affinity of the thread that starts them, so this is
+    called after the engine and registry threads are running. Nothing is
+    pinned when worker_cpus() would leave the children no core of their own.
+    """
+    if worker_cpus(ui_cpu) is None:
+        return False
+    try:
+        os.sched_setaffinity(0, {ui_cpu})
+    except (AttributeError, OSError) as e:
+        print(f"Error pinning the UI to CPU {ui_cpu}: {e}")
+        return False
+    return True
+
+
+def default_policies(ui_cpu=UI_CPU):
+    """Captures first for disk I/O so no frames are dropped, attacks behind everything, tool commands as they are.
+
+    Captures keep the default nice: they have the worker cores to themselves
+    and a negative value is refused without root anyway.
+    """
+    cpus = worker_cpus(ui_cpu)
+    return {
+        ROLE_CAPTURE: ProcessPolicy(nice=0, io_class=IO_BEST_EFFORT, io_level=0, cpus=cpus),
+        ROLE_ATTACK: ProcessPolicy(nice=5, io_class=IO_IDLE, io_level=None, cpus=cpus),
+        ROLE_CONTROL: None,
+    }
+
+
+def policy_prefix(policy):
+    """nice/ionice/taskset argv that runs a command with a policy.
+
+    Each of them execs the next, so the child keeps the pid and process group
+    the engine started, and everything sudo forks inherits the settings. A
+    wrapper that is not installed is left out; ionice -t carries on when the
+    class is not permitted and nice does when a negative value is not.
+    """
+    if policy is None or os.name != "posix":
+        return []
+    prefix = []
+    if policy.nice and shutil.which("nice"):
+        prefix += ["nice", "-n", str(policy.nice)]
+    if policy.io_class and shutil.which("ionice"):
+        prefix += ["ionice", "-t", "-c", str(policy.io_class)]
+        if policy.io_level is not None and policy.io_class == IO_BEST_EFFORT:
+            prefix += ["-n", str(policy.io_level)]
+    if policy.cpus and shutil.which("taskset"):
+        prefix += ["taskset", "-c", ",".join(str(cpu) for cpu in policy.cpus)]
+    return prefix
+
+
+def _read_stat(path):
+    """(pgrp, utime + stime in ticks, rss in pages) of one /proc/<pid>/stat"""
+    with open(path, "rb") as f:
+        data = f.read()
+    # The command name may hold spaces and parentheses, the fields start after the last ")"
+    fields = data[data.rindex(b")") + 2:].split()
+    return int(fields[2]), int(fields[11]) + int(fields[12]), int(fields[21])
+
+
+def format_stats(stats):
+    """One line with every child's CPU and memory"""
+    return ", ".join(f"{s.name} {s.cpu_percent:.0f}% CPU {s.rss / 1e6:.1f} MB"
+                     + (f" ({s.restarts} restarts)" if s.restarts else "") for s in stats)
+
+
+class SupervisedProcess:
+    """A capture that is started again with backoff whenever it exits on its own.
+
+    before_restart runs ahead of every restart, to clear the old output so the
+    readers follow the new file; on_restart gets the new ManagedProcess.
+    """
+
+    def __init__(self, supervisor, argv, role=ROLE_CAPTURE, name=None, output=OUTPUT_DISCARD,
+                 before_restart=None, on_restart=None, backoff=RESTART_BACKOFF,
+                 max_backoff=MAX_RESTART_BACKOFF, stable_after=STABLE_AFTER, max_restarts=None):
+        self.supervisor = supervisor
+        self.argv = argv
+        self.role = role
+        self.name = name or os.path.basename(argv[1] if argv[0] == "sudo" else argv[0])
+        self.output = output
+        self.before_restart = before_restart
+        self.on_restart = on_restart
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.max_restarts = max_restarts
+        self.process = None
+        self.restarts = 0
+        self.stopped = False
+        self._task = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    @property
+    def running(self):
+        """True while the process is alive or waiting to be restarted"""
+        if self.stopped or self.process is None:
+            return False
+        return self.process.running or (self._task is not None and not self._task.done())
+
+    @property
+    def returncode(self):
+        return self.process.returncode if self.process is not None else None
+
+    async def start(self):
+        self.process = await self.supervisor.spawn(self.argv, self.role, self.output, self.name)
+        self._task = asyncio.ensure_future(self._watch())
+        return self
+
+    async def wait_for_file(self, path, timeout=10.0, interval=0.1):
+        """Wait until path exists, returns False on timeout or if the process died first"""
+        return await self.process.wait_for_file(path, timeout, interval)
+
+    async def _watch(self):
+        delay = self.backoff
+        while True:
+            code = await self.process.wait()
+            if self.stopped:
+                return
+            if time.monotonic() - self.process.started_at >= self.stable_after:
+                delay = self.backoff
+            if self.max_restarts is not None and self.restarts >= self.max_restarts:
+                print(f"Error: {self.name} exited with {code}, giving up after {self.restarts} restarts")
+                return
+            print(f"Error: {self.name} exited with {code}, restarting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+            if self.stopped:
+                return
+            self.supervisor.forget(self.process)
+            try:
+                if self.before_restart is not None:
+                    self.before_restart()
+                self.process = await self.supervisor.spawn(self.argv, self.role, self.output, self.name)
+            except Exception as e:
+                print(f"Error restarting {self.name}: {e}")
+                continue
+            self.restarts += 1
+            if self.on_restart is not None:
+                self.on_restart(self.process)
+
+    async def stop(self, timeout=2.0):
+        """Stop restarting and tear down the process group"""
+        self.stopped = True
+        if self._task is not None:
+            self._task.cancel()
+        code = await self.supervisor.engine.terminate(self.process, timeout)
+        self.supervisor.forget(self)
+        return code
+
+
+class Supervisor:
+    """Starts every external tool with the scheduling policy of its role.
+
+    Children run in their own process group (the engine's spawn) under
+    nice/ionice/taskset: captures first for I/O, attacks at a lower
+    priority, both pinned off UI_CPU where pin_ui_thread() keeps the Tk loop.
+    Captures started with supervise() come back after a crash with
+    exponential backoff. stats() sums CPU and RSS over each child's process
+    group from /proc, so the tool behind sudo is counted too.
+    """
+
+    def __init__(self, engine, policies=None, proc="/proc"):
+        self.engine = engine
+        self.policies = policies if policies is not None else default_policies()
+        self.proc = proc
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        # Running children by process group id: (name, ManagedProcess)
+        self._children = {}
+        # SupervisedProcesses that have not been stopped
+        self._supervised = set()
+        # Process group id -> (CPU ticks, monotonic time) of the previous stats()
+        self._samples = {}
+        # stats() runs in the executor while spawn() and forget() run on the loop
+        self._lock = threading.Lock()
+
+    def command(self, argv, role):
+        return policy_prefix(self.policies.get(role)) + list(argv)
+
+    async def spawn(self, argv, role=ROLE_CONTROL, output=OUTPUT_DISCARD, name=None):
+        """Start argv under its role's policy in a new process group, returns a ManagedProcess"""
+        process = await self.engine.spawn(self.command(argv, role), output)
+        # The policy wrappers are not what the tool is called
+        process.argv = list(argv)
+        name = name or os.path.basename(argv[1] if argv[0] == "sudo" else argv[0])
+        with self._lock:
+            self._children[process.pid] = (name, process)
+        return process
+
+    async def supervise(self, argv, role=ROLE_CAPTURE, name=None, output=OUTPUT_DISCARD, **kwargs):
+        """Start argv and keep it running until stopped, returns a SupervisedProcess"""
+        supervised = SupervisedProcess(self, argv, role, name, output, **kwargs)
+        self._supervised.add(supervised)
+        await supervised.start()
+        return supervised
+
+    async def terminate(self, process, timeout=2.0):
+        """Tear down a ManagedProcess or SupervisedProcess and its process group"""
+        if process is None:
+            return None
+        if isinstance(process, SupervisedProcess):
+            return await process.stop(timeout)
+        code = await self.engine.terminate(process, timeout)
+        self.forget(process)
+        return code
+
+    async def terminate_all(self, timeout=2.0):
+        """Stop the supervised captures first, so none is restarted while the rest goes down"""
+        await asyncio.gather(*(p.stop(timeout) for p in list(self._supervised)), return_exceptions=True)
+        await asyncio.gather(*(self.terminate(p, timeout) for _, p in list(self._children.values())),
+                             return_exceptions=True)
+
+    def forget(self, process):
+        if isinstance(process, SupervisedProcess):
+            self._supervised.discard(process)
+            process = process.process
+        if process is not None:
+            with self._lock:
+                self._children.pop(process.pid, None)
+                self._samples.pop(process.pid, None)
+
+    def stats(self):
+        """ChildStats of every running child, CPU as percent of one core since the previous call"""
+        with self._lock:
+            children = dict(self._children)
+        groups = {pgid: [name, 0, 0, 0] for pgid, (name, process) in children.items() if process.running}
+        if not groups:
+            return []
+        try:
+            pids = [entry for entry in os.listdir(self.proc) if entry.isdigit()]
+        except OSError:
+            return []
+        for pid in pids:
+            try:
+                pgrp, ticks, rss = _read_stat(os.path.join(self.proc, pid, "stat"))
+            except (OSError, ValueError, IndexError):
+                # Exited between listdir and open
+                continue
+            group = groups.get(pgrp)
+            if group is not None:
+                group[1] += 1
+                group[2] += ticks
+                group[3] += rss
+
+        restarts = {p.pid: p.restarts for p in list(self._supervised)}
+        now = time.monotonic()
+        stats = []
+        for pgid, (name, processes, ticks, rss) in groups.items():
+            with self._lock:
+                if pgid not in self._children:
+                    # Forgotten while /proc was read, a sample now would outlive it
+                    continue
+                # The first sample averages over the child's whole run
+                previous = self._samples.get(pgid) or (0, children[pgid][1].started_at)
+                self._samples[pgid] = (ticks, now)
+            elapsed = now - previous[1]
+            cpu = (ticks - previous[0]) / self.clock_ticks / elapsed * 100 if elapsed > 0 else 0.0
+            stats.append(ChildStats(name, pgid, processes, max(0.0, cpu), rss * self.page_size,
+                                    restarts.get(pgid, 0)))
+        return stats
+
+    async def report(self):
+        """Print every child's usage, read off the loop"""
+        stats = await asyncio.get_running_loop().run_in_executor(None, self.stats)
+        if stats:
+            print(f"Children: {format_stats(stats)}")
+        return stats
@@ -0,0 +1,291 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from .compact import NOT_ASSOCIATED
+
+# Surveys are kept across sessions here; MELRO_SURVEY_DB points the store elsewhere
+SURVEY_DB = os.path.join(os.path.expanduser("~"), ".melro", "survey.db")
+SURVEY_DB_ENV = "MELRO_SURVEY_DB"
+
+# Pending records are written once per tick, in a single transaction
+FLUSH_INTERVAL = 1.0
+
+# observations.kind
+KIND_AP = 0
+KIND_STATION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS surveys (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL,
+    targets TEXT
+);
+CREATE TABLE IF NOT EXISTS access_points (
+    bssid INTEGER PRIMARY KEY,
+    essid TEXT,
+    channel INTEGER,
+    privacy TEXT,
+    first_seen REAL,
+    last_seen REAL
+);
+CREATE TABLE IF NOT EXISTS stations (
+    mac INTEGER PRIMARY KEY,
+    bssid INTEGER,
+    first_seen REAL,
+    last_seen REAL
+);
+CREATE TABLE IF NOT EXISTS probes (
+    mac INTEGER NOT NULL,
+    essid TEXT NOT NULL,
+    first_seen REAL,
+    last_seen REAL,
+    PRIMARY KEY (mac, essid)
+);
+CREATE TABLE IF NOT EXISTS observations (
+    time REAL NOT NULL,
+    survey INTEGER,
+    kind INTEGER NOT NULL,
+    mac INTEGER NOT NULL,
+    bssid INTEGER,
+    channel INTEGER,
+    power INTEGER,
+    packets INTEGER
+);
+-- Covers clients_of(), which then never touches the table itself
+CREATE INDEX IF NOT EXISTS observations_bssid_time ON observations (bssid, kind, time, mac, power);
+CREATE INDEX IF NOT EXISTS observations_mac_time ON observations (mac, time);
+CREATE INDEX IF NOT EXISTS observations_time ON observations (time);
+CREATE INDEX IF NOT EXISTS stations_bssid ON stations (bssid);
+"""
+
+_INSERT_SURVEY = "INSERT INTO surveys (id, started, targets) VALUES (?, ?, ?)"
+_END_SURVEY = "UPDATE surveys SET ended = ? WHERE id = ?"
+_UPSERT_AP = """
+INSERT INTO access_points VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (bssid) DO UPDATE SET
+    essid = coalesce(excluded.essid, essid), channel = coalesce(excluded.channel, channel),
+    privacy = coalesce(excluded.privacy, privacy), first_seen = min(first_seen, excluded.first_seen),
+    last_seen = max(last_seen, excluded.last_seen)
+"""
+_UPSERT_STATION = """
+INSERT INTO stations VALUES (?, ?, ?, ?) ON CONFLICT (mac) DO UPDATE SET
+    bssid = coalesce(excluded.bssid, bssid), first_seen = min(first_seen, excluded.first_seen),
+    last_seen = max(last_seen, excluded.last_seen)
+"""
+_UPSERT_PROBE = """
+INSERT INTO probes VALUES (?, ?, ?, ?) ON CONFLICT (mac, essid) DO UPDATE SET
+    last_seen = max(last_seen, excluded.last_seen)
+"""
+_INSERT_OBSERVATION = "INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+# Statements in the order a batch runs them, so surveys exist before their rows
+# and an end lands after the last observation of the tick
+_BATCH_ORDER = (("survey", _INSERT_SURVEY), ("ap", _UPSERT_AP), ("station", _UPSERT_STATION),
+                ("probe", _UPSERT_PROBE), ("observation", _INSERT_OBSERVATION), ("end", _END_SURVEY))
+
+# One client seen on a BSSID: first and last observation, strongest signal and number of observations
+ClientSighting = namedtuple("ClientSighting", ["mac", "first_seen", "last_seen", "best_power", "observations"])
+# One observation of a device
+Observation = namedtuple("Observation", ["time", "survey", "kind", "mac", "bssid", "channel", "power", "packets"])
+Survey = namedtuple("Survey", ["id", "started", "ended", "targets"])
+
+
+def _bssid_or_none(bssid_id):
+    return None if bssid_id is None or bssid_id == NOT_ASSOCIATED else bssid_id
+
+
+def _power_or_none(power):
+    # airodump-ng's -1 means no reading; NULL keeps it out of max() and avg()
+    return None if power is None or power == -1 else power
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    # WAL lets queries read while the writer commits; NORMAL syncs only at checkpoints
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class SurveyStore:
+    """Persistent survey database: SQLite in WAL mode with a batched writer thread.
+
+    record() only turns a capture delta into row tuples and queues them; the
+    writer thread commits everything queued once per flush_interval in one
+    transaction, so the engine loop and the Tk thread never wait for the SD
+    card. Queries run on their own connection and read the last committed
+    state while the writer works.
+    """
+
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL):
+        self.path = path or os.environ.get(SURVEY_DB_ENV) or SURVEY_DB
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._reader = _connect(self.path)
+        self._reader.executescript(SCHEMA)
+        self._reader.commit()
+        self._read_lock = threading.Lock()
+        self._next_survey = self._reader.execute("SELECT coalesce(max(id), 0) FROM surveys").fetchone()[0] + 1
+
+        self._pending = {name: [] for name, _ in _BATCH_ORDER}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Notified after every committed batch, for flush()
+        self._written = threading.Condition()
+        self._thread = None
+        self.batches = 0
+        self.rows_written = 0
+        self.last_batch_time = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the writer thread, returns self"""
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="survey-store", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=5.0):
+        """Write what is still queued, stop the writer and close the database"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._read_lock:
+            self._reader.close()
+
+    # --- Writes, from any thread ---
+
+    def begin_survey(self, targets="", now=None):
+        """Open a survey and return its id for record()"""
+        with self._lock:
+            survey = self._next_survey
+            self._next_survey += 1
+            self._pending["survey"].append((survey, time.time() if now is None else now, targets))
+        return survey
+
+    def end_survey(self, survey, now=None):
+        with self._lock:
+            self._pending["end"].append((time.time() if now is None else now, survey))
+
+    def record(self, delta, survey=None, now=None):
+        """Queue the added and updated records of a capture delta for the next batch"""
+        now = time.time() if now is None else now
+        aps, stations, probes, observations = [], [], [], []
+        for ap in list(delta.aps.added.values()) + list(delta.aps.updated.values()):
+            aps.append((ap.bssid_id, ap.essid or None, ap.channel, ap.privacy or None,
+                        ap.first_seen_ts or now, ap.last_seen_ts or now))
+            observations.append((now, survey, KIND_AP, ap.bssid_id, ap.bssid_id, ap.channel,
+                                 _power_or_none(ap.power), ap.beacons))
+        for station in list(delta.stations.added.values()) + list(delta.stations.updated.values()):
+            bssid = _bssid_or_none(station.bssid_id)
+            stations.append((station.mac_id, bssid, station.first_seen_ts or now, station.last_seen_ts or now))
+            probes += [(station.mac_id, essid, now, now) for essid in station.probes or ()]
+            observations.append((now, survey, KIND_STATION, station.mac_id, bssid, None,
+                                 _power_or_none(station.power), station.packets))
+        with self._lock:
+            self._pending["ap"] += aps
+            self._pending["station"] += stations
+            self._pending["probe"] += probes
+            self._pending["observation"] += observations
+
+    def flush(self, timeout=None):
+        """Commit what is queued now instead of at the next tick, returns False on timeout"""
+        with self._written:
+            batches = self.batches
+            self._wake.set()
+            return self._written.wait_for(lambda: self.batches > batches or not self.running, timeout)
+
+    def _run(self):
+        writer = _connect(self.path)
+        try:
+            while not self._stop.is_set():
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._write(writer)
+            self._write(writer)
+        finally:
+            writer.close()
+            with self._written:
+                self._written.notify_all()
+
+    def _write(self, writer):
+        with self._lock:
+            pending = self._pending
+            self._pending = {name: [] for name, _ in _BATCH_ORDER}
+        rows = sum(len(batch) for batch in pending.values())
+        started = time.monotonic()
+        if rows:
+            try:
+                with writer:
+                    for name, statement in _BATCH_ORDER:
+                        if pending[name]:
+                            writer.executemany(statement, pending[name])
+                self.rows_written += rows
+            except sqlite3.Error as e:
+                print(f"Error writing survey batch of {rows} rows: {e}")
+        self.last_batch_time = time.monotonic() - started
+        with self._written:
+            self.batches += 1
+            self._written.notify_all()
+
+    # --- Queries, from any thread ---
+
+    def _query(self, sql, params=()):
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def clients_of(self, bssid_id, since=None, until=None):
+        """ClientSightings of every station observed on a BSSID, most recent first"""
+        rows = self._query(
+            "SELECT mac, min(time), max(time), max(power), count(*) FROM observations "
+            "WHERE bssid = ? AND kind = ? AND time >= ? AND time <= ? GROUP BY mac ORDER BY max(time) DESC",
+            (bssid_id, KIND_STATION, since or 0, until or float("inf")),
+        )
+        return [ClientSighting(*row) for row in rows]
+
+    def history(self, mac_id, since=None, until=None):
+        """Observations of one device, oldest first"""
+        rows = self._query(
+            "SELECT * FROM observations WHERE mac = ? AND time >= ? AND time <= ? ORDER BY time",
+            (mac_id, since or 0, until or float("inf")),
+        )
+        return [Observation(*row) for row in rows]
+
+    def networks(self, since=None):
+        """(bssid, essid, channel, privacy, first_seen, last_seen) of every AP seen since a time"""
+        return self._query("SELECT * FROM access_points WHERE last_seen >= ? ORDER BY last_seen DESC",
+                           (since or 0,))
+
+    def probes_of(self, mac_id):
+        """ESSIDs a station probed for, most recent first"""
+        return [row[0] for row in self._query(
+            "SELECT essid FROM probes WHERE mac = ? ORDER BY last_seen DESC", (mac_id,))]
+
+    def surveys(self):
+        return [Survey(*row) for row in self._query("SELECT * FROM surveys ORDER BY id")]
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_survey_store():
+    """Return the shared SurveyStore, opening it on first use"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SurveyStore().start()
+        return _default_store
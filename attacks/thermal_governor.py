@@ -0,0 +1,181 @@
+import json
+import os
+import time
+from collections import deque, namedtuple
+
+# The SoC temperature main already shows, and the first CPU's frequency
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+CPUFREQ_DIR = "/sys/devices/system/cpu/cpu0/cpufreq"
+
+# Every level change is appended here as a JSON line; MELRO_THERMAL_LOG points it elsewhere
+THERMAL_LOG = os.path.join(os.path.expanduser("~"), ".melro", "thermal.jsonl")
+THERMAL_LOG_ENV = "MELRO_THERMAL_LOG"
+
+# The Raspberry Pi firmware starts throttling the ARM cores at 80 °C
+THROTTLE_TEMP = 80.0
+# Predicted temperature at which warm, hot and critical start, so load is shed before the firmware steps in
+LEVEL_TEMPS = (THROTTLE_TEMP - 12, THROTTLE_TEMP - 6, THROTTLE_TEMP - 2)
+# A level is left once the prediction is this far below where it starts and it was held MIN_HOLD seconds
+HYSTERESIS = 3.0
+MIN_HOLD = 30.0
+# The trend is a least-squares slope over the last TREND_WINDOW readings, projected TREND_HORIZON seconds ahead
+TREND_WINDOW = 30
+TREND_HORIZON = 60.0
+# Readings needed before the slope is trusted
+MIN_TREND_SAMPLES = 5
+# Below this share of the maximum frequency while warm, the firmware is throttling already
+THROTTLED_FREQ_SHARE = 0.9
+
+# What each level runs at: UI redraws per second, parser tick and channel dwell multipliers
+LoadLevel = namedtuple("LoadLevel", ["name", "ui_rate", "parse_scale", "dwell_scale"])
+LEVELS = (
+    LoadLevel("normal", 2.0, 1.0, 1.0),
+    LoadLevel("warm", 1.0, 1.5, 1.5),
+    LoadLevel("hot", 0.5, 2.0, 2.0),
+    LoadLevel("critical", 0.25, 4.0, 3.0),
+)
+
+# One governor decision: the readings it was based on and the level it chose
+ThermalDecision = namedtuple("ThermalDecision", ["time", "temp", "slope", "predicted", "freq", "max_freq",
+                                                 "level", "previous", "reason"])
+
+
+def read_temperature(path=THERMAL_ZONE):
+    """SoC temperature in °C, None without a thermal zone"""
+    try:
+        with open(path) as f:
+            return int(f.read()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+def read_cpufreq(directory=CPUFREQ_DIR):
+    """(current, maximum) frequency of the first CPU in kHz, None for what is not there"""
+    values = []
+    for name in ("scaling_cur_freq", "cpuinfo_max_freq"):
+        try:
+            with open(os.path.join(directory, name)) as f:
+                values.append(int(f.read()))
+        except (OSError, ValueError):
+            values.append(None)
+    return tuple(values)
+
+
+def _slope(samples):
+    """Least-squares °C per second over (time, temp) samples"""
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_temp = sum(temp for _, temp in samples) / n
+    variance = sum((t - mean_t) ** 2 for t, _ in samples)
+    if variance == 0:
+        return 0.0
+    return sum((t - mean_t) * (temp - mean_temp) for t, temp in samples) / variance
+
+
+class ThermalGovernor:
+    """Sheds load ahead of thermal throttling from the temperature trend.
+
+    observe() takes one reading a second. The slope of the last TREND_WINDOW
+    readings projects the temperature TREND_HORIZON seconds ahead, and the
+    projection picks a LoadLevel; a CPU already running below its maximum
+    frequency while warm counts as one level hotter. Levels go up at once and
+    come down only with HYSTERESIS and after MIN_HOLD seconds, so the knobs do
+    not flap. Every change is printed, written to the JSON-lines log and
+    passed to the listeners as (decision, LoadLevel).
+    """
+
+    def __init__(self, log_path=None, cpufreq_dir=CPUFREQ_DIR, window=TREND_WINDOW, horizon=TREND_HORIZON,
+                 level_temps=LEVEL_TEMPS, hysteresis=HYSTERESIS, min_hold=MIN_HOLD, clock=time.monotonic):
+        self.cpufreq_dir = cpufreq_dir
+        self.horizon = horizon
+        self.level_temps = level_temps
+        self.hysteresis = hysteresis
+        self.min_hold = min_hold
+        self.clock = clock
+        self.samples = deque(maxlen=window)
+        self.level = 0
+        self.changed_at = None
+        # The latest level changes, newest last
+        self.decisions = deque(maxlen=256)
+        self.last_decision = None
+        self._listeners = []
+        self._log = None
+        path = log_path or os.environ.get(THERMAL_LOG_ENV) or THERMAL_LOG
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._log = open(path, "a", buffering=1)
+        except OSError as e:
+            print(f"Error opening thermal log: {e}")
+
+    @property
+    def load(self):
+        return LEVELS[self.level]
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _target(self, predicted, throttled):
+        level = sum(1 for threshold in self.level_temps if predicted >= threshold)
+        if throttled:
+            level = min(level + 1, len(LEVELS) - 1)
+        return level
+
+    def observe(self, temp, now=None):
+        """Take one temperature reading; returns the ThermalDecision when the level changed"""
+        now = self.clock() if now is None else now
+        self.samples.append((now, temp))
+        slope = _slope(self.samples) if len(self.samples) >= MIN_TREND_SAMPLES else 0.0
+        # Only a rising trend is projected: a cooling CPU is judged on where it is now
+        predicted = temp + max(0.0, slope) * self.horizon
+        freq, max_freq = read_cpufreq(self.cpufreq_dir)
+        throttled = (freq is not None and max_freq and freq < max_freq * THROTTLED_FREQ_SHARE
+                     and temp >= self.level_temps[0])
+
+        target = self._target(predicted, throttled)
+        if target > self.level:
+            reason = "throttled" if throttled and target > self._target(predicted, False) else "rising"
+        elif target < self.level:
+            held = self.changed_at is None or now - self.changed_at >= self.min_hold
+            # Leaving the current level needs the prediction clearly below where it starts
+            if not held or predicted > self.level_temps[self.level - 1] - self.hysteresis:
+                return None
+            target = self._target(predicted + self.hysteresis, throttled)
+            if target >= self.level:
+                return None
+            reason = "cooling"
+        else:
+            return None
+
+        decision = ThermalDecision(now, temp, slope, predicted, freq, max_freq, target, self.level, reason)
+        self.level = target
+        self.changed_at = now
+        self.last_decision = decision
+        self.decisions.append(decision)
+        self._write(decision)
+        for callback in list(self._listeners):
+            try:
+                callback(decision, LEVELS[target])
+            except Exception as e:
+                print(f"Error in thermal listener: {e}")
+        return decision
+
+    def _write(self, decision):
+        load = LEVELS[decision.level]
+        print(f"Thermal: {LEVELS[decision.previous].name} -> {load.name} ({decision.reason}), "
+              f"{decision.temp:.1f}°C, trend {decision.slope * 60:+.1f}°C/min, {decision.predicted:.1f}°C predicted")
+        if self._log is None:
+            return
+        record = {"t": round(time.time(), 3), "temp": decision.temp, "slope": round(decision.slope, 4),
+                  "predicted": round(decision.predicted, 2), "freq": decision.freq, "max_freq": decision.max_freq,
+                  "level": load.name, "previous": LEVELS[decision.previous].name, "reason": decision.reason,
+                  "ui_rate": load.ui_rate, "parse_scale": load.parse_scale, "dwell_scale": load.dwell_scale}
+        self._log.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
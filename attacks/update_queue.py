@@ -0,0 +1,79 @@
+import threading
+from collections import deque
+
+
+class CoalescingQueue:
+    """Bounded hand-off from a worker to the UI where only the newest item matters.
+
+    Workers put complete snapshots; when the UI falls behind, older snapshots
+    are dropped instead of piling up, so the UI only ever renders the latest one.
+    """
+
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        # Snapshots that were replaced before the UI got to them
+        self.coalesced = 0
+
+    def put(self, item):
+        """Add a snapshot, dropping the oldest one if the queue is full"""
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.coalesced += 1
+            self._items.append(item)
+
+    def get_latest(self):
+        """Return the newest snapshot and discard the rest, or None if empty"""
+        with self._lock:
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.coalesced += len(self._items)
+            self._items.clear()
+            return item
+
+    def clear(self):
+        """Drop everything that is still queued"""
+        with self._lock:
+            self._items.clear()
+
+
+class UiUpdater:
+    """Pump a CoalescingQueue into a render callback on the Tk thread at a capped rate"""
+
+    def __init__(self, root, queue, render, max_rate=2.0):
+        self.root = root
+        self.queue = queue
+        self.render = render
+        self.max_rate = max_rate
+        self._after_id = None
+
+    @property
+    def interval_ms(self):
+        """Delay between two renders for the current maximum rate"""
+        return max(1, int(1000 / self.max_rate))
+
+    def set_max_rate(self, rate):
+        """Change the maximum number of renders per second"""
+        self.max_rate = max(0.1, float(rate))
+
+    def start(self):
+        """Start pumping; must be called on the Tk thread"""
+        if self._after_id is None:
+            self._after_id = self.root.after(0, self._pump)
+
+    def stop(self):
+        """Stop pumping and drop queued snapshots; must be called on the Tk thread"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.queue.clear()
+
+    def _pump(self):
+        item = self.queue.get_latest()
+        if item is not None:
+            try:
+                self.render(item)
+            except Exception as e:
+                print(f"Error rendering update: {e}")
+        self._after_id = self.root.after(self.interval_ms, self._pump)
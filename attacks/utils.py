@@ -2,6 +2,8 @@ import tkinter as tk
 import os
 import subprocess
 
+from .interfaces import get_registry
+
 # Colors and styles
 DARK_BG = "#0f0e0e"
 DARKER_BG = "#080808"
@@ -61,14 +63,9 @@ def create_button(parent, text, command, bg=PANEL_BG, fg=ACCENT_GOLD):
 def get_wifi_interfaces():
     """Get list of wireless interfaces"""
     try:
-        # For Linux systems
+        # For Linux systems, from the interface registry instead of parsing iwconfig
         if os.name == 'posix':
-            result = subprocess.check_output(['iwconfig'], stderr=subprocess.STDOUT, text=True)
-            interfaces = []
-            for line in result.split('\n'):
-                if ' IEEE ' in line:  # This is a wireless interface
-                    interfaces.append(line.split()[0])
-            return interfaces
+            return [interface.name for interface in get_registry().wireless()]
         # For Windows systems (simplified version)
         elif os.name == 'nt':
             result = subprocess.check_output(['netsh', 'wlan', 'show', 'interfaces'], text=True)
@@ -83,8 +80,7 @@ def is_in_monitor_mode(interface):
     """Check if interface is in monitor mode"""
     try:
         if os.name == 'posix':
-            result = subprocess.check_output(['iwconfig', interface], stderr=subprocess.STDOUT, text=True)
-            return 'Mode:Monitor' in result
+            return get_registry().is_monitor(interface)
         return False
     except Exception:
         return False
@@ -0,0 +1,254 @@
+import atexit
+import ctypes
+import errno
+import mmap
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+
+# tmpfs first: capture output and handoff files stay in RAM, off the SD card.
+# MELRO_WORKSPACE picks another parent directory
+WORKSPACE_ROOTS = ("/dev/shm", tempfile.gettempdir())
+WORKSPACE_ENV = "MELRO_WORKSPACE"
+WORKSPACE_PREFIX = "melro_"
+
+# Everything a session keeps in its workspace; on tmpfs this is RAM
+WORKSPACE_MAX_BYTES = 256 * 1024 * 1024
+# A followed capture file hands back what was already read beyond this
+CAPTURE_MAX_BYTES = 32 * 1024 * 1024
+
+# linux/falloc.h
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+
+# Signals that end the app without running atexit handlers on their own
+CLEANUP_SIGNALS = (signal.SIGTERM, signal.SIGHUP)
+
+
+def _libc_fallocate():
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        # fallocate64 takes 64-bit offsets on 32-bit Raspberry Pi OS as well
+        function = getattr(libc, "fallocate64", None) or libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    function.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    function.restype = ctypes.c_int
+    return function
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def allocated_bytes(path):
+    """Bytes a file or directory tree really occupies, holes not counted"""
+    if os.path.isfile(path):
+        return os.stat(path).st_blocks * 512
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_blocks * 512
+            except OSError:
+                pass
+    return total
+
+
+class Workspace:
+    """Per-session directory on tmpfs for capture output and handoff files.
+
+    Every capture gets a fresh empty directory, so airodump-ng always writes
+    <prefix>-01.* and nothing stale can be picked up, and handoff files are
+    created with mkstemp instead of guessed names. The workspace is capped at
+    max_bytes, a followed capture file gives back the pages already read once
+    it passes CAPTURE_MAX_BYTES (see rotate()), and the whole directory goes
+    on exit, on SIGTERM/SIGHUP, and at the next start when a previous session
+    was killed outright.
+    """
+
+    def __init__(self, root=None, max_bytes=WORKSPACE_MAX_BYTES, prefix=WORKSPACE_PREFIX):
+        self.root = root or os.environ.get(WORKSPACE_ENV) or next(
+            (r for r in WORKSPACE_ROOTS if os.path.isdir(r) and os.access(r, os.W_OK)), tempfile.gettempdir())
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.remove_stale()
+        self.path = tempfile.mkdtemp(prefix=f"{prefix}{os.getpid()}_", dir=self.root)
+        self._fallocate = _libc_fallocate()
+        self._lock = threading.Lock()
+
+    def remove_stale(self):
+        """Delete the workspaces of sessions whose process is gone"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            if not name.startswith(self.prefix):
+                continue
+            pid = name[len(self.prefix):].split("_", 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def usage(self):
+        return allocated_bytes(self.path)
+
+    def check(self, extra=0):
+        """Raise RuntimeError when extra more bytes would not fit under max_bytes"""
+        used = self.usage()
+        if self.max_bytes is not None and used + extra > self.max_bytes:
+            raise RuntimeError(f"workspace full: {used / 1e6:.1f} of {self.max_bytes / 1e6:.0f} MB in {self.path}")
+
+    def directory(self, name):
+        """A new empty directory for one capture or job"""
+        self.check()
+        return tempfile.mkdtemp(prefix=f"{name}_", dir=self.path)
+
+    def capture_prefix(self, name):
+        """airodump-ng -w prefix in a new empty directory, so its files are always <prefix>-01.*"""
+        return os.path.join(self.directory(name), name)
+
+    def file(self, name, text=None, suffix=".txt"):
+        """Create a new file with a unique name, optionally holding text, and return its path"""
+        data = text.encode() if text is not None else b""
+        self.check(len(data))
+        fd, path = tempfile.mkstemp(prefix=f"{name}_", suffix=suffix, dir=self.path)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return path
+
+    def remove(self, path):
+        """Delete a file or directory of this workspace, missing ones are fine"""
+        if path is None or not os.path.abspath(path).startswith(self.path + os.sep):
+            return
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def remove_capture(self, prefix):
+        """Delete every <prefix>-NN.* file, so a restarted airodump-ng writes -01 again"""
+        directory, name = os.path.split(prefix)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        for entry in names:
+            if entry.startswith(f"{name}-"):
+                self.remove(os.path.join(directory, entry))
+
+    def rotate(self, path, consumed, max_bytes=CAPTURE_MAX_BYTES):
+        """Free the part of a growing capture file that was read already, returns the bytes freed.
+
+        airodump-ng keeps appending to one file and the reader follows it by
+        offset, so the file cannot be renamed or truncated under either of
+        them. Instead the pages before the reader's offset are punched out
+        (fallocate PUNCH_HOLE): the size and offsets stay, the memory goes.
+        The first page, with the pcap header, is kept. airodump-ng runs under
+        sudo and owns its files, so those are punched by "sudo -n fallocate";
+        when that is not possible either, rotation is turned off with one
+        warning.
+        """
+        if self._fallocate is None:
+            return 0
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return 0
+        if st.st_blocks * 512 <= max_bytes:
+            return 0
+        start = mmap.PAGESIZE
+        end = min(consumed, st.st_size) // mmap.PAGESIZE * mmap.PAGESIZE
+        if end <= start:
+            return 0
+        with self._lock:
+            if self._fallocate is None:
+                return 0
+            try:
+                fd = os.open(path, os.O_WRONLY)
+            except PermissionError:
+                # Created by airodump-ng as root
+                if not self._punch_privileged(path, start, end - start):
+                    return 0
+                return st.st_blocks * 512 - os.stat(path).st_blocks * 512
+            try:
+                if self._fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE, start, end - start) != 0:
+                    error = ctypes.get_errno()
+                    if error in (errno.EOPNOTSUPP, errno.ENOSYS):
+                        # Not on tmpfs or an old kernel: the file just keeps growing
+                        print(f"Capture rotation unavailable in {self.root}: {os.strerror(error)}")
+                        self._fallocate = None
+                        return 0
+                    raise OSError(error, os.strerror(error), path)
+            finally:
+                os.close(fd)
+        return st.st_blocks * 512 - os.stat(path).st_blocks * 512
+
+    def _punch_privileged(self, path, start, length):
+        """PUNCH_HOLE on a file the app may not write, through sudo; turns rotation off when that fails"""
+        try:
+            result = subprocess.run(["sudo", "-n", "fallocate", "--punch-hole", "--keep-size",
+                                     "--offset", str(start), "--length", str(length), path],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=5)
+            error = result.stderr.decode(errors="replace").strip() if result.returncode else None
+        except (OSError, subprocess.SubprocessError) as e:
+            error = str(e)
+        if error is None:
+            return True
+        print(f"Capture rotation unavailable for {os.path.basename(path)}: {error or 'fallocate failed'}")
+        self._fallocate = None
+        return False
+
+    def cleanup(self):
+        """Delete the whole workspace; safe to call more than once"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+_default_workspace = None
+_default_lock = threading.Lock()
+# Signal handlers that were there before ours, restored before re-raising
+_previous_handlers = {}
+
+
+def _cleanup_on_signal(signum, frame):
+    if _default_workspace is not None:
+        _default_workspace.cleanup()
+    # Then die of the signal as if nothing had been installed
+    signal.signal(signum, _previous_handlers.pop(signum, None) or signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+def get_workspace():
+    """Return the shared Workspace, creating it on first use.
+
+    The first call on the main thread also installs the cleanup: atexit, and
+    handlers for CLEANUP_SIGNALS that remove the workspace before the
+    default action. Signals that are ignored, like SIGHUP under nohup, stay
+    ignored.
+    """
+    global _default_workspace
+    with _default_lock:
+        if _default_workspace is None:
+            _default_workspace = Workspace()
+            atexit.register(_default_workspace.cleanup)
+        if not _previous_handlers and threading.current_thread() is threading.main_thread():
+            for signum in CLEANUP_SIGNALS:
+                previous = signal.getsignal(signum)
+                if previous == signal.SIG_IGN:
+                    # Under nohup SIGHUP must not end the session, nor take its workspace
+                    _previous_handlers[signum] = previous
+                    continue
+                _previous_handlers[signum] = signal.signal(signum, _cleanup_on_signal)
+        return _default_workspace
@@ -0,0 +1,101 @@
+"""
+Throughput benchmark for the airodump-ng CSV parser.
+
+Writes synthetic CSV files with 100, 1k, 10k and 100k rows and reports how fast
+the streaming parser and the incremental reader get through them, after
+checking that the incremental reader follows rewrites a stat() cannot tell apart.
+
+Run with "python3 benchmarks/bench_airodump_csv.py" from the project root.
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.airodump_csv import AccessPoint, Station, format_csv, iter_file
+from attacks.csv_reader import IncrementalCsvReader
+from attacks.replay import synthetic_survey
+
+ROW_COUNTS = [100, 1000, 10000, 100000]
+REPEATS = 3
+
+
+def write_synthetic_csv(path, rows, seed=1):
+    """Write a CSV with rows split 1:4 between APs and stations"""
+    ap_count = max(1, rows // 5)
+    synthetic_survey(ap_count, rows - ap_count, seed).write_csv(path)
+
+
+def best_of(func):
+    """Run func REPEATS times and return the fastest wall time"""
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_stream(path):
+    return sum(1 for _ in iter_file(path))
+
+
+def bench_incremental(path):
+    reader = IncrementalCsvReader(path)
+    full = best_of(lambda: (reader.reset(), reader.poll()))
+    # Unchanged file: only a stat() is needed
+    unchanged = best_of(reader.poll)
+    return full, unchanged
+
+
+def check_prefix_rewrite(path):
+    """A row rewritten to a byte-prefix of itself, in a file of the same size, is picked up"""
+    ap = AccessPoint("00:11:22:33:44:55", "2025-06-15 10:00:00", "2025-06-15 10:00:05", 6, 54, "WPA2",
+                     "CCMP", "PSK", -40, 10, 0, "0.  0.  0.  0", 7, "HomeNet", "")
+    first = Station("AA:BB:CC:DD:EE:01", "2025-06-15 10:00:00", "2025-06-15 10:00:05", -50, 3, ap.bssid,
+                    ("Cafe", "HomeNet5G"))
+    second = Station("AA:BB:CC:DD:EE:02", "2025-06-15 10:00:00", "2025-06-15 10:00:05", -60, 3, ap.bssid,
+                     ("Lab",))
+    reader = IncrementalCsvReader(path)
+    checks = []
+    # Bare newlines put the shortened row's newline exactly at the end of the shared prefix
+    for stations in ([first, second], [first._replace(probes=("Cafe", "HomeNet")),
+                                       second._replace(probes=("Lab5G",))]):
+        with open(path, "w", newline="") as f:
+            f.write(format_csv([ap], stations).replace("\r\n", "\n"))
+        reader.poll()
+        checks.append(os.path.getsize(path))
+    probes = reader.stations[first.mac].probes
+    ok = checks[0] == checks[1] and tuple(probes) == ("Cafe", "HomeNet")
+    return ok, f"{checks[0]} then {checks[1]} bytes, probes {probes}"
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="melro_bench_") as workdir:
+        ok, detail = check_prefix_rewrite(os.path.join(workdir, "rewrite.csv"))
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} prefix rewrite  {detail}")
+
+    print(f"{'rows':>8} {'size':>9} {'stream rows/s':>14} {'stream ms':>10} {'tail full ms':>13} {'tail idle us':>13}")
+    with tempfile.TemporaryDirectory(prefix="melro_bench_") as workdir:
+        for rows in ROW_COUNTS:
+            path = os.path.join(workdir, f"synthetic_{rows}.csv")
+            write_synthetic_csv(path, rows)
+
+            parsed = bench_stream(path)
+            stream = best_of(lambda: bench_stream(path))
+            full, unchanged = bench_incremental(path)
+
+            size_kb = os.path.getsize(path) / 1024
+            print(f"{parsed:>8} {size_kb:>7.0f}kB {parsed / stream:>14,.0f} {stream * 1000:>10.1f} "
+                  f"{full * 1000:>13.1f} {unchanged * 1e6:>13.1f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Adaptive channel dwell against fixed hopping on a simulated radio.
+
+A seeded survey is spread over 2.4 and 5 GHz the way a busy area looks: most
+APs on 1/6/11, some on the common 5 GHz channels, DFS channels empty. Stations
+send far fewer frames than APs beacon, so they are only heard with enough
+dwell time, and devices keep turning up during the capture. Both schedulers
+drive the same radio for the same capture time (including 5 ms per channel
+switch) and the unique devices found are compared. Each run's decision log is
+written as JSON lines for a closer look.
+
+Run with "python3 benchmarks/bench_channel_scheduler.py [SECONDS [LOG_DIR]]" from the project root.
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.channel_scheduler import ChannelScheduler, DecisionLog, FixedScheduler
+from attacks.channels import band_channels
+from attacks.compact import parse_time
+from attacks.replay import synthetic_survey
+
+AP_COUNT = 600
+STATION_COUNT = 2400
+SEED = 7
+SWITCH_TIME = 0.005
+CHECKPOINTS = (5, 10, 30, 60, 120)
+
+# Where the APs are: weight per channel, anything missing gets none
+CHANNEL_WEIGHTS = {1: 20, 6: 25, 11: 20, 2: 2, 3: 3, 4: 2, 5: 2, 7: 2, 8: 2, 9: 3, 10: 2, 12: 1, 13: 1,
+                   36: 6, 40: 3, 44: 4, 48: 3, 149: 4, 153: 2, 157: 3, 161: 2}
+
+
+class SimulatedRadio:
+    """Devices on channels that send frames at their own rate from the moment they appear"""
+
+    def __init__(self, seed=SEED, duration=60.0):
+        rng = random.Random(seed)
+        survey = synthetic_survey(AP_COUNT, STATION_COUNT, seed, duration=duration)
+        channels = list(CHANNEL_WEIGHTS)
+        weights = [CHANNEL_WEIGHTS[c] for c in channels]
+
+        self.devices = {}
+        ap_channel = {}
+        for ap in survey.access_points:
+            channel = rng.choices(channels, weights)[0]
+            ap_channel[ap.bssid] = channel
+            # Beacons at 10/s, some lost to weak signal
+            self._add(channel, rng.uniform(3, 10), parse_time(ap.first_seen) - survey.start)
+        for station in survey.stations:
+            # Unassociated stations probe now and then on whatever channel they are scanning
+            channel = ap_channel.get(station.bssid) or rng.choices(channels, weights)[0]
+            self._add(channel, rng.lognormvariate(-1.0, 1.0), parse_time(station.first_seen) - survey.start)
+        self.total = sum(len(devices) for devices in self.devices.values())
+        self.rng = random.Random(seed + 1)
+
+    def _add(self, channel, rate, appears):
+        self.devices.setdefault(channel, []).append([rate, appears, False])
+
+    def listen(self, channel, start, end):
+        """Listen on channel from start to end, returns (frames heard, devices heard for the first time)"""
+        frames = 0.0
+        new = 0
+        for device in self.devices.get(channel, ()):
+            rate, appears, found = device
+            heard = end - max(start, appears)
+            if heard <= 0:
+                continue
+            frames += rate * heard
+            if not found and self.rng.random() < 1 - math.exp(-rate * heard):
+                device[2] = True
+                new += 1
+        return int(frames), new
+
+
+def run(scheduler, seconds):
+    """Drive a scheduler on a fresh radio, returns (devices found at each checkpoint, hops)"""
+    radio = SimulatedRadio(duration=seconds / 2)
+    now = 0.0
+    found = 0
+    hops = 0
+    curve = {}
+    while now < seconds:
+        decision = scheduler.next(now)
+        end = now + SWITCH_TIME + decision.dwell
+        frames, new = radio.listen(decision.channel, now + SWITCH_TIME, end)
+        scheduler.record(decision, frames, new, now=end)
+        found += new
+        hops += 1
+        for checkpoint in CHECKPOINTS:
+            if now < checkpoint <= end:
+                curve[checkpoint] = found
+        now = end
+    return curve, found, radio.total, hops
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 120.0
+    log_dir = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp(prefix="melro_hops_")
+    channels = band_channels("abg")
+    checkpoints = [c for c in CHECKPOINTS if c <= seconds]
+
+    print(f"{len(channels)} channels, {seconds:.0f}s of capture")
+    print(f"{'scheduler':<10}" + "".join(f"{f'@{c}s':>8}" for c in checkpoints) + f"{'found':>8}{'of':>7}{'dev/s':>8}{'hops':>7}")
+    results = {}
+    for scheduler_class in (FixedScheduler, ChannelScheduler):
+        log = DecisionLog(os.path.join(log_dir, f"hops_{scheduler_class.name}.jsonl"))
+        scheduler = scheduler_class(channels, log=log, clock=lambda: 0.0)
+        curve, found, total, hops = run(scheduler, seconds)
+        log.write_summary(scheduler)
+        log.close()
+        results[scheduler.name] = found
+        print(f"{scheduler.name:<10}" + "".join(f"{curve.get(c, found):>8}" for c in checkpoints) +
+              f"{found:>8}{total:>7}{found / seconds:>8.1f}{hops:>7}")
+    print(f"adaptive/fixed: {results['adaptive'] / max(results['fixed'], 1):.2f}x, decision logs in {log_dir}")
+
+
+if __name__ == "__main__":
+    main()
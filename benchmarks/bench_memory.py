@@ -0,0 +1,84 @@
+"""
+Memory report for AP/station records.
+
+Builds station tables of 10k and 100k entries from a synthetic airodump-ng CSV
+and reports the bytes held per station with the plain string records and with
+the compact ones (int MACs, epoch times, interned probes, __slots__), both for a
+table of records and for a whole IncrementalCsvReader.
+
+Run with "python3 benchmarks/bench_memory.py" from the project root.
+"""
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.airodump_csv import Station, iter_file
+from attacks.compact import compact_record
+from attacks.csv_reader import IncrementalCsvReader
+from attacks.replay import synthetic_survey
+
+STATION_COUNTS = [10000, 100000]
+
+
+def measure(build):
+    """Bytes still allocated after build() returns, with its result kept alive"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def station_table(path, compact):
+    table = {}
+    for record in iter_file(path):
+        if not isinstance(record, Station):
+            continue
+        if compact:
+            record = compact_record(record)
+            table[record.mac_id] = record
+        else:
+            table[record.mac] = record
+    return table
+
+
+def reader_table(path, compact):
+    reader = IncrementalCsvReader(path, compact=compact)
+    reader.poll()
+    # The file contents are kept for prefix matching, which is not per-record state
+    reader._content = b""
+    return reader
+
+
+def main():
+    print(f"{'stations':>9} {'table before':>13} {'table after':>12} {'saved':>6} "
+          f"{'reader before':>14} {'reader after':>13} {'saved':>6}")
+    with tempfile.TemporaryDirectory(prefix="melro_bench_") as workdir:
+        for stations in STATION_COUNTS:
+            path = os.path.join(workdir, f"synthetic_{stations}.csv")
+            synthetic_survey(stations // 4, stations).write_csv(path)
+
+            results = []
+            for build in (station_table, reader_table):
+                before, kept = measure(lambda: build(path, False))
+                count = len(kept) if isinstance(kept, dict) else len(kept.stations)
+                del kept
+                after, kept = measure(lambda: build(path, True))
+                del kept
+                results.append((before / count, after / count))
+
+            (table_before, table_after), (reader_before, reader_after) = results
+            print(f"{stations:>9} {table_before:>11.0f} B {table_after:>10.0f} B "
+                  f"{1 - table_after / table_before:>6.0%} {reader_before:>12.0f} B "
+                  f"{reader_after:>11.0f} B {1 - reader_after / reader_before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
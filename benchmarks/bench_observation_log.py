@@ -0,0 +1,85 @@
+"""
+Observation log append rate and history query cost.
+
+A synthetic survey is replayed as six hours of recon deltas, one tick every
+TICK seconds with a share of the devices updated per tick, into an
+ObservationLog in a temporary directory. The append side is timed as the
+recon page pays it (record() per delta and one flush() per tick); then one
+device's signal over the six hours and the per-channel activity of the last
+hour are read back through the mapped segments, with NumPy when it is
+installed and the tuple fallback otherwise.
+
+Run with "python3 benchmarks/bench_observation_log.py [DEVICES [HOURS]]" from the project root.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.compact import CompactAccessPoint, CompactStation
+from attacks.csv_reader import CsvDelta, TableDelta
+from attacks.observation_log import RECORD, ObservationLog, np
+from attacks.replay import synthetic_survey
+
+STATION_COUNT = 2000
+TICK = 10.0
+ACTIVE_SHARE = 0.2
+# Small segments so a run spans several of them
+SEGMENT_RECORDS = 1 << 18
+SEED = 5
+
+
+def main():
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else STATION_COUNT
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 6.0
+    survey = synthetic_survey(devices // 4, devices, SEED)
+    rng = random.Random(SEED)
+    aps = [CompactAccessPoint.from_record(ap) for ap in survey.access_points]
+    stations = [CompactStation.from_record(s) for s in survey.stations]
+
+    with tempfile.TemporaryDirectory(prefix="melro_obslog_") as directory:
+        log = ObservationLog(directory, segment_records=SEGMENT_RECORDS, max_bytes=None)
+        start = time.time() - hours * 3600
+        ticks = int(hours * 3600 / TICK)
+        tick_ms = []
+        for tick in range(ticks):
+            changed = rng.sample(stations, int(len(stations) * ACTIVE_SHARE))
+            for station in changed:
+                station.packets = (station.packets or 0) + rng.randint(1, 50)
+                station.power = -rng.randint(30, 90)
+            delta = CsvDelta(TableDelta({}, {ap.bssid_id: ap for ap in aps} if tick == 0 else {}, []),
+                             TableDelta({}, {s.mac_id: s for s in changed}, []))
+            started = time.perf_counter()
+            log.record(delta, start + tick * TICK)
+            log.flush()
+            tick_ms.append((time.perf_counter() - started) * 1000)
+        log.close()
+
+        written = log.records_written
+        elapsed = sum(tick_ms) / 1000
+        segments = log.segment_paths()
+        size = sum(os.path.getsize(path) for path in segments) / 1e6
+        print(f"{written:,} records of {RECORD.size} bytes in {len(segments)} segments ({size:.0f} MB), "
+              f"{hours:g}h of {TICK:g}s ticks, reads with {'NumPy' if np is not None else 'tuples'}")
+        print(f"append    {written / elapsed:,.0f} records/s, p50 {statistics.median(tick_ms):.2f} ms, "
+              f"max {max(tick_ms):.2f} ms per tick")
+
+        mac = stations[0].mac_id
+        started = time.perf_counter()
+        series = log.series(mac, start, start + hours * 3600)
+        print(f"series    {len(series)} records of one device over {hours:g}h in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+        started = time.perf_counter()
+        activity = log.channel_activity(start + (hours - 1) * 3600)
+        print(f"channels  {len(activity)} channels, {sum(activity.values()):,} packets in the last hour in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Throughput benchmark for the mmap pcap ingestion path.
+
+Decodes synthetic radiotap captures (beacons, probe requests and data frames)
+of 10k and 100k frames, or the pcap files given on the command line, and
+reports frames per second for the raw source and for the full model update.
+
+Run with "python3 benchmarks/bench_pcap.py [capture.cap ...]" from the project root.
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.capture import CaptureReader, PcapFileSource
+from attacks.replay import synthetic_survey
+
+FRAME_COUNTS = [10000, 100000]
+REPEATS = 3
+
+
+def write_synthetic_pcap(path, frames, seed=1):
+    """Write a capture with 1 AP per 50 frames, 4 stations per AP and 10 frames per device"""
+    ap_count = max(1, frames // 50)
+    synthetic_survey(ap_count, ap_count * 4, seed).write_pcap(path, frames_per_device=10, seed=seed)
+
+
+def best_of(func):
+    """Run func REPEATS times and return the fastest wall time and the last result"""
+    best = result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_source(path):
+    with PcapFileSource(path) as source:
+        return len(source.read())
+
+
+def bench_reader(path):
+    reader = CaptureReader(PcapFileSource(path))
+    reader.poll()
+    reader.close()
+    return len(reader.access_points), len(reader.stations)
+
+
+def report(path):
+    decode, frames = best_of(lambda: bench_source(path))
+    ingest, (aps, stations) = best_of(lambda: bench_reader(path))
+    size_kb = os.path.getsize(path) / 1024
+    print(f"{frames:>8} {size_kb:>7.0f}kB {frames / decode:>13,.0f} {frames / ingest:>13,.0f} {aps:>6} {stations:>9}")
+
+
+def main():
+    print(f"{'frames':>8} {'size':>9} {'decode fr/s':>13} {'ingest fr/s':>13} {'aps':>6} {'stations':>9}")
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            report(path)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="melro_bench_") as workdir:
+        for frames in FRAME_COUNTS:
+            path = os.path.join(workdir, f"synthetic_{frames}.cap")
+            write_synthetic_pcap(path, frames)
+            report(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+End-to-end pipeline benchmark on the fake toolchain.
+
+Runs the real spawn -> capture -> parse -> render-rows path against the
+stand-in tools in benchmarks/fake_tools, so it needs no radio, root or
+aircrack-ng, and checks how the app copes with slow starts, crashes and huge
+outputs. Exits non-zero when a scenario fails, so it doubles as a regression
+test on any Linux box.
+
+Run with "python3 benchmarks/bench_pipeline.py" from the project root.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.capture import CaptureReader, PcapFileSource
+from attacks.channels import format_channels
+from attacks.interfaces import InterfaceRegistry
+from attacks.monitor_mode import MonitorMode, format_result
+from attacks.network_model import NetworkTable, StationTable, format_network
+from attacks.process_engine import OUTPUT_DRAIN, ProcessEngine
+from attacks.recon_targets import ReconTargets, target_channels
+from attacks.replay import synthetic_survey
+from attacks.scanner import BackgroundScanner
+from attacks.supervisor import Supervisor, format_stats
+from attacks.csv_reader import IncrementalCsvReader
+from attacks.workspace import Workspace
+from fake_toolchain import FakeToolchain
+
+AP_COUNT = 2000
+STATION_COUNT = 8000
+SEED = 1
+SPEED = 10
+
+
+async def scenario_scan(engine, tools, workdir):
+    """Shared scanner: spawn airodump-ng, first CSV data, convergence, network rows"""
+    scanner = BackgroundScanner("wlan1mon", poll_interval=0.2, engine=engine)
+    started = time.monotonic()
+    await scanner.start_async()
+    try:
+        if not await scanner.wait_for_data(timeout=10):
+            return False, "no data"
+        first_data = time.monotonic() - started
+        report = await scanner.wait_for_convergence(max_time=30, confidence=0.95)
+
+        render = time.monotonic()
+        table = NetworkTable("bssid", sort_field="power", reverse=True)
+        table.load(scanner.networks())
+        table.rows(format_network)
+        render = time.monotonic() - render
+        return report.converged, (f"first data {first_data:.2f}s, {report.total} BSSIDs, stable after "
+                      f"{report.duration:.1f}s, rows {render * 1000:.0f}ms")
+    finally:
+        await scanner.stop_async()
+
+
+async def scenario_sweep(engine, tools, workdir):
+    """95% of the BSSIDs with one adapter hopping all channels, then with two splitting them"""
+    timings = []
+    for interfaces in (["wlan1mon"], ["wlan1mon", "wlan2mon"]):
+        scanner = BackgroundScanner(interfaces, poll_interval=0.2, engine=engine)
+        started = time.monotonic()
+        await scanner.start_async()
+        try:
+            found = await engine.wait_until(lambda: len(scanner.snapshot()) >= 0.95 * AP_COUNT, timeout=60)
+            timings.append(time.monotonic() - started if found else None)
+            coverage = scanner.coverage()
+        finally:
+            await scanner.stop_async()
+    if None in timings:
+        return False, "sweep did not find 95% of the BSSIDs"
+    single, split = timings
+    detail = "; ".join(f"{c.interface} {len(c.channels)} ch {c.aps} BSSIDs" for c in coverage)
+    return split < single * 0.75, f"1 adapter {single:.1f}s, 2 adapters {split:.1f}s ({detail})"
+
+
+async def scenario_recon(engine, tools, workdir):
+    """Recon on one BSSID through the pcap path until every client is listed"""
+    survey = synthetic_survey(AP_COUNT, STATION_COUNT, SEED)
+    clients = {}
+    for station in survey.stations:
+        clients.setdefault(station.bssid, []).append(station)
+    bssid = max((b for b in clients if b != "(not associated)"), key=lambda b: len(clients[b]))
+    ap = next(ap for ap in survey.access_points if ap.bssid == bssid)
+    expected = len(clients[bssid])
+
+    prefix = os.path.join(workdir, "recon")
+    started = time.monotonic()
+    process = await engine.spawn(["sudo", "airodump-ng", "--bssid", bssid, "-c", str(ap.channel),
+                                  "--output-format", "pcap", "-w", prefix, "wlan1mon"])
+    try:
+        if not await process.wait_for_file(f"{prefix}-01.cap", timeout=10):
+            return False, "no capture file"
+        reader = CaptureReader(PcapFileSource(f"{prefix}-01.cap"))
+        stations = StationTable("mac_id", max_size=None, stale_after=None)
+        latencies = []
+        deadline = time.monotonic() + 30
+        while len(stations) < expected and time.monotonic() < deadline:
+            polled = time.monotonic()
+            delta = reader.poll()
+            if delta is not None:
+                stations.update(list(delta.stations.added.values()) + list(delta.stations.updated.values()))
+                [f"{s.mac} (Signal: {s.power}, Packets: {s.packets})" for s in stations]
+                latencies.append(time.monotonic() - polled)
+            await asyncio.sleep(0.1)
+        reader.close()
+        elapsed = time.monotonic() - started
+        worst = max(latencies) * 1000 if latencies else 0
+        ok = len(stations) >= expected
+        return ok, f"{len(stations)}/{expected} clients in {elapsed:.1f}s, worst poll {worst:.1f}ms"
+    finally:
+        await engine.terminate(process)
+
+
+async def scenario_multi_recon(engine, tools, workdir):
+    """Recon on three BSSIDs on different channels from one capture, clients split per BSSID"""
+    survey = synthetic_survey(AP_COUNT, STATION_COUNT, SEED)
+    clients = {}
+    for station in survey.stations:
+        clients.setdefault(station.bssid, []).append(station)
+    targets = []
+    for ap in sorted(survey.access_points, key=lambda ap: -len(clients.get(ap.bssid, ()))):
+        if ap.channel not in (t.channel for t in targets):
+            targets.append(ap)
+        if len(targets) == 3:
+            break
+    expected = {t.bssid: len(clients[t.bssid]) for t in targets}
+
+    prefix = os.path.join(workdir, "multi_recon")
+    started = time.monotonic()
+    process = await engine.spawn(["sudo", "airodump-ng", "-c", format_channels(target_channels(targets)),
+                                  "--output-format", "pcap", "-w", prefix, "wlan1mon"])
+    try:
+        if not await process.wait_for_file(f"{prefix}-01.cap", timeout=10):
+            return False, "no capture file"
+        reader = CaptureReader(PcapFileSource(f"{prefix}-01.cap"))
+        recon = ReconTargets(targets, max_stations=None, stale_after=None)
+        deadline = time.monotonic() + 30
+        while recon.station_count < sum(expected.values()) and time.monotonic() < deadline:
+            delta = reader.poll()
+            if delta is not None:
+                recon.apply(delta)
+                recon.rows()
+            await asyncio.sleep(0.1)
+        reader.close()
+        elapsed = time.monotonic() - started
+        # Every client has to be in its own network's table and nowhere else
+        misplaced = sum(1 for t in recon for s in t.stations if s.bssid_id != t.bssid_id)
+        found = {t.bssid: len(t.stations) for t in recon}
+        ok = found == expected and not misplaced
+        detail = ", ".join(f"ch {t.channel} {found[t.bssid]}/{expected[t.bssid]}" for t in recon)
+        return ok, f"{detail} clients in {elapsed:.1f}s, {misplaced} misplaced"
+    finally:
+        await engine.terminate(process)
+
+
+async def scenario_slow_start(engine, tools, workdir):
+    """airodump-ng that takes 3s to create its file"""
+    tools.configure("airodump-ng", start_delay=3.0)
+    prefix = os.path.join(workdir, "slow")
+    started = time.monotonic()
+    process = await engine.spawn(["sudo", "airodump-ng", "wlan1mon", "--output-format", "csv", "-w", prefix])
+    try:
+        ok = await process.wait_for_file(f"{prefix}-01.csv", timeout=10)
+        return ok, f"file after {time.monotonic() - started:.2f}s"
+    finally:
+        await engine.terminate(process)
+        tools.configure("airodump-ng", start_delay=0)
+
+
+async def scenario_crash(engine, tools, workdir):
+    """mdk4 dying after a second is seen as exited, and teardown does not hang"""
+    tools.configure("mdk4", crash_after=1.0, exit_code=3)
+    process = await engine.spawn(["sudo", "mdk4", "wlan1mon", "b", "-c", "6", "-s", "50"], output=OUTPUT_DRAIN)
+    try:
+        code = await asyncio.wait_for(process.wait(), 5)
+        started = time.monotonic()
+        await engine.terminate(process)
+        return code == 3, f"exit {code}, teardown {(time.monotonic() - started) * 1000:.0f}ms"
+    finally:
+        tools.configure("mdk4", crash_after=None)
+
+
+async def scenario_restart(engine, tools, workdir):
+    """Supervised airodump-ng crashing every second comes back, its CSV is followed again and stop leaves no orphan"""
+    tools.configure("airodump-ng", crash_after=1.0, exit_code=1)
+    workspace = Workspace(root=workdir)
+    supervisor = Supervisor(engine)
+    prefix = workspace.capture_prefix("restart")
+    reader = IncrementalCsvReader(f"{prefix}-01.csv", compact=True)
+    process = await supervisor.supervise(
+        ["sudo", "airodump-ng", "wlan1mon", "--output-format", "csv", "-w", prefix],
+        backoff=0.2, before_restart=lambda: workspace.remove_capture(prefix))
+    try:
+        started = time.monotonic()
+        seen = 0
+        while process.restarts < 2 and time.monotonic() - started < 10:
+            delta = await asyncio.get_running_loop().run_in_executor(None, reader.poll)
+            if delta is not None and process.restarts:
+                # Rows parsed from a file written after a restart
+                seen += len(delta.aps.added) + len(delta.aps.updated)
+            await asyncio.sleep(0.1)
+        tools.configure("airodump-ng", crash_after=None)
+        # Read the output of the last restart as well
+        await asyncio.sleep(1.0)
+        delta = await asyncio.get_running_loop().run_in_executor(None, reader.poll)
+        if delta is not None:
+            seen += len(delta.aps.added) + len(delta.aps.updated)
+        stats = supervisor.stats()
+        pgid = process.pid
+        await supervisor.terminate(process)
+        try:
+            os.killpg(pgid, 0)
+            orphan = True
+        except ProcessLookupError:
+            orphan = False
+        ok = process.restarts >= 2 and seen > 0 and not orphan and not process.running
+        return ok, (f"{process.restarts} restarts in {time.monotonic() - started:.1f}s, {seen} rows after restart, "
+                    f"orphans {orphan}, {format_stats(stats) or 'no stats'}")
+    finally:
+        tools.configure("airodump-ng", crash_after=None)
+        workspace.cleanup()
+
+
+async def scenario_huge_output(engine, tools, workdir):
+    """mdk4 writing 20 MB/s to a drained pipe stays alive and stops promptly"""
+    tools.configure("mdk4", output_rate=20_000_000)
+    process = await engine.spawn(["sudo", "mdk4", "wlan1mon", "b", "-a", "-s", "100"], output=OUTPUT_DRAIN)
+    try:
+        cpu = time.process_time()
+        await asyncio.sleep(2)
+        cpu = time.process_time() - cpu
+        alive = process.running
+        started = time.monotonic()
+        await engine.terminate(process)
+        return alive and bool(process.output_tail), (
+            f"alive {alive}, drain CPU {cpu / 2:.0%}, stop {(time.monotonic() - started) * 1000:.0f}ms")
+    finally:
+        tools.configure("mdk4", output_rate=0)
+
+
+async def scenario_monitor_toggle(engine, tools, workdir):
+    """airmon-ng stop/start with a 1s delay, finished by the interface registry"""
+    tools.configure("airmon-ng", delay=1.0)
+    registry = InterfaceRegistry(tools.sysfs_root).start()
+    try:
+        monitor = MonitorMode(engine, registry)
+        results = await monitor.disable_all() + await monitor.enable_all()
+        ok = bool(results) and all(r.ok for r in results)
+        return ok, ", ".join(format_result(r) for r in results)
+    finally:
+        registry.stop()
+        tools.configure("airmon-ng", delay=0)
+
+
+async def scenario_toggle_rollback(engine, tools, workdir):
+    """airmon-ng that reports success but never switches is timed out and rolled back"""
+    tools.configure("airmon-ng", no_change=True)
+    registry = InterfaceRegistry(tools.sysfs_root).start()
+    try:
+        monitor = MonitorMode(engine, registry, timeout=1.0)
+        results = await monitor.disable_all()
+        ok = bool(results) and all(not r.ok and r.rolled_back for r in results) and monitor.active
+        return ok, ", ".join(format_result(r) for r in results)
+    finally:
+        registry.stop()
+        tools.configure("airmon-ng", no_change=False)
+
+
+SCENARIOS = [
+    ("scan", scenario_scan),
+    ("sweep", scenario_sweep),
+    ("recon", scenario_recon),
+    ("multi recon", scenario_multi_recon),
+    ("slow start", scenario_slow_start),
+    ("crash", scenario_crash),
+    ("restart", scenario_restart),
+    ("huge output", scenario_huge_output),
+    # Last: these switch wlan1mon, which the others capture on
+    ("monitor toggle", scenario_monitor_toggle),
+    ("toggle rollback", scenario_toggle_rollback),
+]
+
+
+def main():
+    script = {"airodump-ng": {"aps": AP_COUNT, "stations": STATION_COUNT, "seed": SEED, "speed": SPEED}}
+    interfaces = {
+        "lo": {"wireless": False, "up": True},
+        "wlan0": {"wireless": True, "phy": "phy0", "mode": "Managed", "up": True},
+        "wlan1mon": {"wireless": True, "phy": "phy1", "mode": "Monitor", "up": True},
+        "wlan2mon": {"wireless": True, "phy": "phy2", "mode": "Monitor", "up": True},
+    }
+    failures = 0
+    engine = ProcessEngine().start()
+    try:
+        with FakeToolchain(script, interfaces) as tools, tempfile.TemporaryDirectory(prefix="melro_bench_") as workdir:
+            for name, scenario in SCENARIOS:
+                try:
+                    ok, detail = engine.submit(scenario(engine, tools, workdir)).result(timeout=120)
+                except Exception as e:
+                    ok, detail = False, f"{type(e).__name__}: {e}"
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {name:<15} {detail}")
+            print(f"{len(tools.calls())} tool invocations")
+    finally:
+        engine.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
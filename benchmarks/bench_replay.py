@@ -0,0 +1,119 @@
+"""
+Load test for the scan and recon paths on a replayed capture.
+
+Scan path: a synthetic survey (10k APs and 40k stations by default) is
+replayed into a CSV on airodump-ng's one-second schedule while the incremental
+reader, the network table and the list rows are refreshed as the scanner and
+the scan pages do. UI latency is the time from a CSV write to rows ready for
+the ListView.
+
+Recon path: the same survey is replayed as radiotap frames through a
+CaptureReader into a StationTable and recon-style rows, with the per-client
+rate/RSSI metrics ticked and ranked on every poll.
+
+Run with "python3 benchmarks/bench_replay.py [APS STATIONS [SPEED]]" from the
+project root, SPEED being 1x, 10x (default) or max.
+"""
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.capture import CaptureReader
+from attacks.client_metrics import ClientMetrics, format_activity, np
+from attacks.csv_reader import IncrementalCsvReader
+from attacks.network_model import NetworkTable, StationTable, format_network
+from attacks.replay import CsvReplay, ReplaySource, parse_speed, synthetic_survey
+
+AP_COUNT = 10000
+STATION_COUNT = 40000
+POLL_INTERVAL = 0.1
+RECON_BATCH = 5000
+
+
+def max_rss_mb():
+    # ru_maxrss is in kB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(name, latencies, count, unit, elapsed):
+    latencies = sorted(latencies) or [0.0]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name:<6} {len(latencies):>7} {count / elapsed:>12,.0f} {unit:<8} "
+          f"{latencies[len(latencies) // 2] * 1000:>9.1f} {p95 * 1000:>9.1f} {latencies[-1] * 1000:>9.1f} "
+          f"{max_rss_mb():>8.0f}")
+
+
+async def bench_scan(survey, path, speed):
+    replay = CsvReplay(survey, path, speed)
+    task = asyncio.ensure_future(replay.run())
+    reader = IncrementalCsvReader(path, compact=True)
+    table = NetworkTable("bssid_id", sort_field="power", reverse=True)
+    latencies = []
+    rows = 0
+    started = time.perf_counter()
+
+    while True:
+        finished = task.done()
+        delta = reader.poll()
+        if delta is not None:
+            table.remove(delta.aps.removed)
+            table.update(list(delta.aps.added.values()) + list(delta.aps.updated.values()))
+            rows += len(delta.aps.added) + len(delta.aps.updated) + len(delta.stations.added) + \
+                len(delta.stations.updated)
+            table.rows(format_network)
+            latencies.append(time.monotonic() - replay.last_write)
+        if finished:
+            break
+        await asyncio.sleep(POLL_INTERVAL)
+
+    summarize("scan", latencies, rows, "rows/s", time.perf_counter() - started)
+
+
+async def bench_recon(survey, speed):
+    source = ReplaySource.from_survey(survey, speed)
+    reader = CaptureReader(source, max_frames=RECON_BATCH)
+    stations = StationTable("mac_id", max_size=None, stale_after=None)
+    metrics = ClientMetrics()
+    latencies = []
+    started = time.perf_counter()
+
+    while not source.exhausted:
+        polled = time.monotonic()
+        delta = reader.poll()
+        if delta is not None:
+            stations.update(list(delta.stations.added.values()) + list(delta.stations.updated.values()))
+            metrics.apply(delta)
+        metrics.tick()
+        if delta is not None:
+            [format_activity(a) for a in metrics.top()]
+            [f"{s.mac} (Signal: {s.power}, Packets: {s.packets})" for s in stations]
+            latencies.append(time.monotonic() - polled)
+        await asyncio.sleep(0 if speed is None else POLL_INTERVAL)
+
+    summarize("recon", latencies, source.frames_read, "frames/s", time.perf_counter() - started)
+    print(f"client metrics for {len(metrics)} stations on {'NumPy' if np is not None else 'plain lists'}")
+
+
+def main():
+    ap_count = int(sys.argv[1]) if len(sys.argv) > 1 else AP_COUNT
+    station_count = int(sys.argv[2]) if len(sys.argv) > 2 else STATION_COUNT
+    speed = parse_speed(sys.argv[3] if len(sys.argv) > 3 else "10x")
+
+    survey = synthetic_survey(ap_count, station_count)
+    print(f"{ap_count} APs, {station_count} stations over {survey.duration}s of capture, "
+          f"speed {'max' if speed is None else f'{speed:g}x'}")
+    print(f"{'path':<6} {'updates':>7} {'throughput':>12} {'':<8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'rss MB':>8}")
+
+    with tempfile.TemporaryDirectory(prefix="melro_bench_") as workdir:
+        asyncio.run(bench_scan(survey, os.path.join(workdir, "replay-01.csv"), speed))
+    asyncio.run(bench_recon(survey, speed))
+
+
+if __name__ == "__main__":
+    main()
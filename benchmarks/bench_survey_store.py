@@ -0,0 +1,112 @@
+"""
+Survey database write and query cost over weeks of recon sessions.
+
+A synthetic survey is replayed as recon deltas into a SurveyStore: one
+session a day of SESSION_TICKS one-second ticks, with every tick's updated
+records queued by record() and committed by the writer thread in one
+transaction. record() time is what the engine loop pays per tick; the batch
+time is the writer's. The finished database is then queried for the
+clients of busy BSSIDs over the last hour and the whole span, and for one
+station's history.
+
+Run with "python3 benchmarks/bench_survey_store.py [DAYS [DB_PATH]]" from the project root.
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.compact import CompactAccessPoint, CompactStation, mac_to_int
+from attacks.csv_reader import CsvDelta, TableDelta
+from attacks.replay import synthetic_survey
+from attacks.survey_store import SurveyStore
+
+AP_COUNT = 300
+STATION_COUNT = 1500
+SESSION_TICKS = 600
+# Share of the stations whose record changes in a tick
+ACTIVE_SHARE = 0.2
+SEED = 3
+QUERIES = 50
+
+
+def deltas(survey, rng):
+    """One CsvDelta per tick with a random share of the stations and APs updated"""
+    aps = [CompactAccessPoint.from_record(ap) for ap in survey.access_points]
+    stations = [CompactStation.from_record(s) for s in survey.stations]
+    while True:
+        changed_aps = rng.sample(aps, len(aps) // 10)
+        changed = rng.sample(stations, int(len(stations) * ACTIVE_SHARE))
+        for station in changed:
+            station.packets = (station.packets or 0) + rng.randint(1, 20)
+            station.power = -rng.randint(30, 90)
+        yield CsvDelta(TableDelta({}, {ap.bssid_id: ap for ap in changed_aps}, []),
+                       TableDelta({}, {s.mac_id: s for s in changed}, []))
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.mkdtemp(prefix="melro_survey_"), "survey.db")
+    survey = synthetic_survey(AP_COUNT, STATION_COUNT, SEED)
+    rng = random.Random(SEED)
+    store = SurveyStore(path, flush_interval=3600).start()
+
+    record_ms, batch_ms = [], []
+    stream = deltas(survey, rng)
+    start = time.time() - days * 86400
+    for day in range(days):
+        survey_id = store.begin_survey("bench", now=start + day * 86400)
+        for tick in range(SESSION_TICKS):
+            _, elapsed = timed(store.record, next(stream), survey_id, start + day * 86400 + tick)
+            record_ms.append(elapsed)
+            # One commit per tick, as the writer's flush interval would give
+            store.flush()
+            batch_ms.append(store.last_batch_time * 1000)
+        store.end_survey(survey_id, now=start + day * 86400 + SESSION_TICKS)
+    store.flush()
+
+    with sqlite3.connect(path) as db:
+        observations = db.execute("SELECT count(*) FROM observations").fetchone()[0]
+    size = os.path.getsize(path) / 1e6
+    print(f"{days} days x {SESSION_TICKS} ticks, {observations:,} observations, {size:.0f} MB at {path}")
+    print(f"record()  p50 {statistics.median(record_ms):.2f} ms, max {max(record_ms):.2f} ms per tick")
+    print(f"batch     p50 {statistics.median(batch_ms):.2f} ms, max {max(batch_ms):.2f} ms per tick (writer thread)")
+
+    # Busy BSSIDs, the ones a recon would target
+    clients = {}
+    for station in survey.stations:
+        if station.bssid and station.bssid != "(not associated)":
+            clients.setdefault(station.bssid, 0)
+            clients[station.bssid] += 1
+    targets = [mac_to_int(b) for b in sorted(clients, key=clients.get, reverse=True)[:QUERIES]]
+    last_session = start + (days - 1) * 86400
+    for label, since in (("last hour", last_session + SESSION_TICKS - 3600), ("all days", None)):
+        times = []
+        found = 0
+        for bssid in targets:
+            rows, elapsed = timed(store.clients_of, bssid, since)
+            times.append(elapsed)
+            found += len(rows)
+        print(f"clients_of ({label:<9}) p50 {statistics.median(times):.2f} ms, max {max(times):.2f} ms, "
+              f"{found / len(targets):.1f} clients per BSSID")
+
+    mac = mac_to_int(survey.stations[0].mac)
+    rows, elapsed = timed(store.history, mac)
+    print(f"history of one station: {len(rows)} observations in {elapsed:.2f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
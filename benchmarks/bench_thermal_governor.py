@@ -0,0 +1,88 @@
+"""
+Sustained throughput of a long session on a simulated enclosed Pi, with and without the thermal governor.
+
+The SoC is a first-order thermal model: it heads for AMBIENT plus a rise
+proportional to CPU load with a THERMAL_TIME constant. Past THROTTLE_TEMP the
+simulated firmware cuts the clock to THROTTLED_FREQ of the maximum and lets it
+back up below THROTTLE_TEMP - 5, as the Pi's does. The app's load comes from
+parsing and hopping, which the governor's parse and dwell scales stretch; the
+capture itself keeps running, and the work done per second is what the
+parsers get through at the current clock. Both runs feed one reading a second
+and write the current frequency to a fake cpufreq directory the governor reads.
+
+Run with "python3 benchmarks/bench_thermal_governor.py [MINUTES]" from the project root.
+"""
+import os
+import statistics
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attacks.thermal_governor import LEVELS, THROTTLE_TEMP, ThermalGovernor
+
+AMBIENT = 45.0
+# °C above ambient at full load in the enclosure, and how fast the SoC gets there
+FULL_LOAD_RISE = 45.0
+THERMAL_TIME = 240.0
+# Share of the CPU taken by the capture itself, the rest is parsing, hopping and redraws
+CAPTURE_LOAD = 0.35
+APP_LOAD = 0.6
+MAX_FREQ = 1500000
+THROTTLED_FREQ = 0.6
+
+
+def simulate(minutes, governed, directory):
+    """(work done per second over the session, seconds throttled, seconds over each level, decisions)"""
+    governor = ThermalGovernor(log_path=os.path.join(directory, f"thermal_{governed}.jsonl"),
+                               cpufreq_dir=directory, clock=lambda: now) if governed else None
+    temp, throttled, now = AMBIENT + 10, False, 0.0
+    work, throttled_seconds = [], 0
+    for second in range(minutes * 60):
+        now = float(second)
+        freq = MAX_FREQ * (THROTTLED_FREQ if throttled else 1.0)
+        for name, value in (("scaling_cur_freq", int(freq)), ("cpuinfo_max_freq", MAX_FREQ)):
+            with open(os.path.join(directory, name), "w") as f:
+                f.write(f"{value}\n")
+        load = LEVELS[governor.level] if governor else LEVELS[0]
+        # Parsing less often does the same work in fewer, larger batches; hopping less saves switches
+        app = APP_LOAD * (0.6 / load.parse_scale + 0.4 / load.dwell_scale)
+        demand = CAPTURE_LOAD + app
+        speed = freq / MAX_FREQ
+        busy = min(1.0, demand / speed)
+        # Work is the capture's frames parsed: all of them unless the CPU runs out
+        work.append(min(1.0, speed / demand))
+        temp += (AMBIENT + FULL_LOAD_RISE * busy * speed - temp) / THERMAL_TIME
+        if temp >= THROTTLE_TEMP:
+            throttled = True
+        elif temp < THROTTLE_TEMP - 5:
+            throttled = False
+        throttled_seconds += throttled
+        if governor:
+            governor.observe(round(temp, 1), now)
+    decisions = list(governor.decisions) if governor else []
+    if governor:
+        governor.close()
+    return work, throttled_seconds, temp, decisions
+
+
+def main():
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    with tempfile.TemporaryDirectory(prefix="melro_thermal_") as directory:
+        for governed in (False, True):
+            work, throttled, temp, decisions = simulate(minutes, governed, directory)
+            label = "governor" if governed else "no governor"
+            # Throughput over the second half, once the enclosure has heated up
+            late = work[len(work) // 2:]
+            print(f"{label:<12} throttled {throttled / 60:5.1f} of {minutes} min, work mean {statistics.mean(late):.0%} "
+                  f"min {min(late):.0%} over the last {minutes // 2} min, end {temp:.1f}°C, "
+                  f"{len(decisions)} level changes")
+            for decision in decisions[:6]:
+                print(f"    {decision.time:8.0f}  {LEVELS[decision.previous].name:>8} -> "
+                      f"{LEVELS[decision.level].name:<8} {decision.reason:<9} {decision.temp:.1f}°C "
+                      f"predicted {decision.predicted:.1f}°C")
+
+
+if __name__ == "__main__":
+    main()
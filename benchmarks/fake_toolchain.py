@@ -0,0 +1,95 @@
+"""
+Put the stand-in tools from benchmarks/fake_tools first on PATH.
+
+    with FakeToolchain({"airodump-ng": {"speed": 10}}) as tools:
+        ...  # anything that runs sudo/airodump-ng/mdk4/airmon-ng/iwconfig/iw/ip
+        tools.calls("airodump-ng")
+
+The script (see fake_tools/_fake.py for the settings) can be changed while the
+block runs with tools.configure(); each tool reads it when it starts. The fake
+interfaces are mirrored to a sysfs tree at tools.sysfs_root, and
+MELRO_SYSFS_NET points InterfaceRegistry instances created inside the block
+at it.
+"""
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+
+FAKE_TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_tools")
+SCRIPT_ENV = "MELRO_FAKE_SCRIPT"
+STATE_ENV = "MELRO_FAKE_STATE"
+SYSFS_ENV = "MELRO_SYSFS_NET"
+
+
+def _fake_module():
+    spec = importlib.util.spec_from_file_location("_fake", os.path.join(FAKE_TOOLS_DIR, "_fake.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeToolchain:
+    """Context manager that installs the fake tools for this process and its children"""
+
+    def __init__(self, script=None, interfaces=None):
+        self.script = dict(script or {})
+        self.interfaces = interfaces
+        self.state_dir = None
+        self.sysfs_root = None
+        self._saved_env = {}
+
+    @property
+    def script_path(self):
+        return os.path.join(self.state_dir, "script.json")
+
+    def __enter__(self):
+        self.state_dir = tempfile.mkdtemp(prefix="melro_fake_")
+        self._write_script()
+
+        for name in ("PATH", SCRIPT_ENV, STATE_ENV, SYSFS_ENV):
+            self._saved_env[name] = os.environ.get(name)
+        os.environ["PATH"] = FAKE_TOOLS_DIR + os.pathsep + os.environ.get("PATH", "")
+        os.environ[SCRIPT_ENV] = self.script_path
+        os.environ[STATE_ENV] = self.state_dir
+
+        fake = _fake_module()
+        fake.save_interfaces(self.interfaces if self.interfaces is not None else fake.DEFAULT_INTERFACES)
+        self.sysfs_root = fake.sysfs_dir()
+        os.environ[SYSFS_ENV] = self.sysfs_root
+        return self
+
+    def __exit__(self, *exc):
+        for name, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def configure(self, tool, **settings):
+        """Change a tool's settings; takes effect the next time the tool starts"""
+        self.script.setdefault(tool, {}).update(settings)
+        self._write_script()
+
+    def calls(self, tool=None):
+        """Logged invocations as dicts with tool, argv, time and pid"""
+        path = os.path.join(self.state_dir, "calls.log")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            calls = [json.loads(line) for line in f if line.strip()]
+        return [c for c in calls if tool is None or c["tool"] == tool]
+
+    def interface_state(self):
+        path = os.path.join(self.state_dir, "interfaces.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_script(self):
+        with open(self.script_path + ".tmp", "w") as f:
+            json.dump(self.script, f)
+        os.replace(self.script_path + ".tmp", self.script_path)
@@ -0,0 +1,194 @@
+"""
+Shared behaviour of the stand-in tools in this directory.
+
+Each tool reads its settings from the JSON file named by MELRO_FAKE_SCRIPT,
+keyed by tool name ("*" applies to all of them):
+
+    {"airodump-ng": {"start_delay": 2.0, "aps": 2000, "stations": 8000, "speed": 10},
+     "mdk4": {"crash_after": 5, "exit_code": 1, "output_rate": 1000000},
+     "airmon-ng": {"delay": 1.5}}
+
+Common settings:
+    start_delay   seconds to wait before doing anything
+    crash_after   seconds after which a long-running tool dies
+    exit_code     exit status for crashes and for one-shot tools
+    output_rate   bytes per second written to stdout, to emulate huge outputs
+
+Interface state (names, mode, up/down, channel) lives in MELRO_FAKE_STATE, a
+directory that also collects a JSON line per invocation in calls.log. Every
+change is mirrored to a sysfs-like tree in sys/class/net under it, which the
+interface registry follows when MELRO_SYSFS_NET points there.
+"""
+import fcntl
+import json
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+SCRIPT_ENV = "MELRO_FAKE_SCRIPT"
+STATE_ENV = "MELRO_FAKE_STATE"
+
+DEFAULT_INTERFACES = {
+    "lo": {"wireless": False, "up": True},
+    "eth0": {"wireless": False, "up": True},
+    "wlan0": {"wireless": True, "phy": "phy0", "mode": "Managed", "up": True},
+    "wlan1": {"wireless": True, "phy": "phy1", "mode": "Managed", "up": True},
+}
+
+# Make the project importable for the tools that reuse the replay engine
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def settings(tool):
+    """Settings for a tool from the script file, merged over the "*" entry"""
+    path = os.environ.get(SCRIPT_ENV)
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        script = json.load(f)
+    merged = dict(script.get("*", {}))
+    merged.update(script.get(tool, {}))
+    return merged
+
+
+def state_dir():
+    path = os.environ.get(STATE_ENV) or os.path.join("/tmp", f"melro_fake_{os.getuid()}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def log_call(tool, argv):
+    with open(os.path.join(state_dir(), "calls.log"), "a") as f:
+        f.write(json.dumps({"tool": tool, "argv": argv, "time": time.time(), "pid": os.getpid()}) + "\n")
+
+
+def load_interfaces():
+    path = os.path.join(state_dir(), "interfaces.json")
+    if not os.path.exists(path):
+        return {name: dict(info) for name, info in DEFAULT_INTERFACES.items()}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_interfaces(interfaces):
+    # Replace atomically, several tools may run at once
+    path = os.path.join(state_dir(), "interfaces.json")
+    # Each wireless interface keeps its phy across renames
+    used = {info["phy"] for info in interfaces.values() if info.get("phy")}
+    for info in interfaces.values():
+        if info.get("wireless") and not info.get("phy"):
+            info["phy"] = next(f"phy{n}" for n in range(len(used) + 1) if f"phy{n}" not in used)
+            used.add(info["phy"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(interfaces, f)
+    os.replace(path + ".tmp", path)
+    write_sysfs(interfaces)
+
+
+@contextmanager
+def edit_interfaces():
+    """Load, change and save the interfaces under a lock, as concurrent tools would race"""
+    with open(os.path.join(state_dir(), "interfaces.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        interfaces = load_interfaces()
+        yield interfaces
+        save_interfaces(interfaces)
+
+
+def sysfs_dir():
+    return os.path.join(state_dir(), "sys", "class", "net")
+
+
+def _write_atomic(path, text):
+    """Replace a file in one step, like a sysfs attribute; readers never see it half written"""
+    try:
+        with open(path) as f:
+            if f.read() == text:
+                return
+    except FileNotFoundError:
+        pass
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "w") as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+def write_sysfs(interfaces):
+    """Mirror the interfaces as /sys/class/net entries: ifindex, type, operstate, phy80211"""
+    root = sysfs_dir()
+    os.makedirs(root, exist_ok=True)
+    for name in os.listdir(root):
+        if name not in interfaces:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    for index, (name, info) in enumerate(interfaces.items(), 1):
+        path = os.path.join(root, name)
+        os.makedirs(path, exist_ok=True)
+        if name == "lo":
+            arphrd = 772
+        elif info.get("mode") == "Monitor":
+            arphrd = 803
+        else:
+            arphrd = 1
+        files = {"ifindex": index, "type": arphrd, "operstate": "up" if info.get("up") else "down"}
+        for filename, value in files.items():
+            _write_atomic(os.path.join(path, filename), f"{value}\n")
+        phy = os.path.join(path, "phy80211")
+        if info.get("wireless"):
+            os.makedirs(phy, exist_ok=True)
+            _write_atomic(os.path.join(phy, "name"), f"{info['phy']}\n")
+        else:
+            shutil.rmtree(phy, ignore_errors=True)
+
+
+def begin(tool, argv):
+    """Log the call, apply start_delay and arm crash_after; returns the settings"""
+    log_call(tool, argv)
+    config = settings(tool)
+    if config.get("start_delay"):
+        time.sleep(config["start_delay"])
+    if config.get("crash_after") is not None:
+        code = config.get("exit_code", 1)
+
+        def crash():
+            sys.stderr.write(f"{tool}: simulated crash\n")
+            sys.stderr.flush()
+            os._exit(code)
+
+        timer = threading.Timer(config["crash_after"], crash)
+        timer.daemon = True
+        timer.start()
+    return config
+
+
+def exit_on_term():
+    """Exit cleanly on SIGTERM/SIGINT like the real tools do"""
+    def handler(signum, frame):
+        sys.exit(0)
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+
+def flood_stdout(rate, line_source):
+    """Write lines from line_source() to stdout at about rate bytes per second, forever"""
+    chunk_interval = 0.05
+    budget = rate * chunk_interval
+    while True:
+        written = 0
+        started = time.monotonic()
+        while written < budget:
+            line = line_source()
+            sys.stdout.write(line)
+            written += len(line)
+        sys.stdout.flush()
+        time.sleep(max(0.0, chunk_interval - (time.monotonic() - started)))
+
+
+def fail(tool, message, code=1):
+    sys.stderr.write(f"{tool}: {message}\n")
+    sys.exit(code)
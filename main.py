@@ -2,9 +2,7 @@ import tkinter as tk
 from tkinter import ttk, font
 import time
 import os
-import subprocess
 import sys
-import threading
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,7 +10,16 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Import attack modules
 from attacks.beacon_flooding import BeaconFloodingAttack
 from attacks.passive_recon import PassiveRecon
-from attacks.utils import is_in_monitor_mode, set_monitor_mode
+from attacks.scanner import BackgroundScanner
+from attacks.process_engine import ProcessEngine
+from attacks.replay import replay_config
+from attacks.interfaces import get_registry, is_wireless
+from attacks.monitor_mode import MonitorMode, format_result
+from attacks.survey_store import get_survey_store
+from attacks.observation_log import get_observation_log
+from attacks.workspace import get_workspace
+from attacks.supervisor import Supervisor, pin_ui_thread
+from attacks.thermal_governor import ThermalGovernor
 
 # Colors and styles
 DARK_BG = "#0f0e0e"
@@ -25,6 +32,9 @@ TITLE_COLOR = "#FFFFFF"
 TEXT_COLOR = "#E0E0E0"
 WARNING_COLOR = "#FF5252"
 
+# Seconds between the CPU and memory reports of the running tools
+CHILD_REPORT_INTERVAL = 30
+
 # Custom button class with hover effect
 class HoverButton(tk.Button):
     def __init__(self, master, **kw):
@@ -62,81 +72,147 @@ class MelroApp:
         self.time_labels = []
         self.cpu_temp_labels = []
         
-        # Monitor mode state and interface names
+        # Monitor mode state and interface names, taken from the registry and from each toggle's result
         self.monitor_mode_active = False
-        self.normal_interface = "wlan1"
-        self.monitor_interface = "wlan1mon"
+        self.normal_interface = None
+        self.monitor_interface = None
+        
+        # Interface table kept current by kernel link events, no ip/iwconfig forks
+        self.interfaces = get_registry()
+        
+        # asyncio loop that runs every external tool next to the Tk loop
+        self.engine = ProcessEngine().start()
+        
+        # Runs captures and attacks with their priority and CPUs, off the core the Tk loop uses
+        self.supervisor = Supervisor(self.engine)
+        
+        # Switches every external adapter, finishing when the kernel reports the change
+        self.monitor = MonitorMode(self.engine, self.interfaces)
         
         # Check initial monitor mode state
         self.check_monitor_mode_state()
         
+        # Session workspace on tmpfs for capture output and handoff files, created here on the
+        # main thread so it is removed on SIGTERM/SIGHUP as well as on exit
+        self.workspace = get_workspace()
+        
+        # MELRO_REPLAY feeds a recorded or synthetic capture instead of the radio
+        self.replay = replay_config()
+        
+        # Shared capture that keeps the AP table warm for both pages, split over every monitor adapter
+        self.scanner = BackgroundScanner(self.scan_interfaces(), engine=self.engine, replay=self.replay,
+                                         workspace=self.workspace, supervisor=self.supervisor)
+        if self.replay is not None or (self.monitor_mode_active and os.name == 'posix'):
+            self.scanner.start()
+        
+        # Recon results are kept across sessions, in a SQLite database and a binary RSSI/activity log
+        try:
+            self.survey_store = get_survey_store()
+        except Exception as e:
+            print(f"Error opening survey database: {e}")
+            self.survey_store = None
+        try:
+            self.observation_log = get_observation_log()
+        except Exception as e:
+            print(f"Error opening observation log: {e}")
+            self.observation_log = None
+        
         # Create page frames
         self.main_frame = tk.Frame(root, bg=DARK_BG)
         self.beacon_flooding_page = tk.Frame(root, bg=DARK_BG)
         self.passive_recon_page = tk.Frame(root, bg=DARK_BG)
         
         # Initialize attack modules
-        self.beacon_flooding_attack = BeaconFloodingAttack(root, lambda: self.show_frame(self.main_frame))
-        self.passive_recon = PassiveRecon(root, lambda: self.show_frame(self.main_frame))
+        # Both capture and inject on the monitor interface the last toggle or the registry picked
+        self.beacon_flooding_attack = BeaconFloodingAttack(root, lambda: self.show_frame(self.main_frame),
+                                                           self.scanner, self.engine, self.replay,
+                                                           self.interfaces, self.workspace, self.supervisor,
+                                                           lambda: self.monitor_interface)
+        self.passive_recon = PassiveRecon(root, lambda: self.show_frame(self.main_frame),
+                                          self.scanner, self.engine, self.replay, self.survey_store,
+                                          self.observation_log, self.workspace, self.supervisor,
+                                          lambda: self.monitor_interface)
+        
+        # Slows the UI, parsing and channel hopping down as the temperature trend heads for throttling
+        self.governor = ThermalGovernor()
+        self.governor.add_listener(self.apply_thermal_load)
         
         self.setup_ui()
         
+        # Follow monitor mode changes made outside the app too
+        self.interfaces.add_listener(self.on_interface_change)
+        
         # Start update loops
         self.update_time()
         self.update_cpu_temp()
+        self.root.after(CHILD_REPORT_INTERVAL * 1000, self.report_children)
         
         # Show initial frame
         self.show_frame(self.main_frame)
+        
+        # The Tk loop keeps UI_CPU to itself; the threads started above keep every core
+        pin_ui_thread()
     
-    # Check if monitor mode is active by looking for wlan1mon interface
+    # Check if monitor mode is active on any external adapter
     def check_monitor_mode_state(self):
-        """Check if monitor mode is active by detecting wlan1mon interface"""
-        try:
-            # Use 'ip link' to list interfaces
-            result = subprocess.run(['ip', 'link'], capture_output=True, text=True)
-            output = result.stdout
+        """Check if monitor mode is active from the interface registry"""
+        # On non-Linux systems, simulate behavior
+        monitors = self.monitor.monitor_interfaces() if os.name == 'posix' else []
+        self.monitor_mode_active = bool(monitors)
+        if self.monitor_interface not in monitors:
+            # The first monitor interface carries the attacks until it goes away
+            self.monitor_interface = monitors[0] if monitors else None
+        managed = self.monitor.managed_interfaces()
+        if self.normal_interface not in managed:
+            self.normal_interface = managed[0] if managed else None
+    
+    def scan_interfaces(self):
+        """Monitor interfaces the shared scan sweeps with"""
+        return self.monitor.monitor_interfaces()
+    
+    def on_interface_change(self, name, old, new):
+        """Registry listener, runs on the registry thread"""
+        if is_wireless(old) or is_wireless(new):
+            self.root.after(0, self.refresh_monitor_state)
+    
+    def refresh_monitor_state(self):
+        """Update the button when the monitor interface changed outside a toggle"""
+        if str(self.monitor_btn["state"]) == tk.DISABLED:
+            # A toggle is running and will update the state when it finishes
+            return
+        was_active = self.monitor_mode_active
+        self.check_monitor_mode_state()
+        if self.monitor_mode_active != was_active:
+            self.update_monitor_button()
+    
+    # Run a coroutine on the process engine and update UI when done
+    def run_command_async(self, coro, on_complete=None):
+        """Run a coroutine asynchronously and call on_complete when done"""
+        # Disable button while command is running
+        self.monitor_btn.config(state=tk.DISABLED)
+        
+        def finished(result):
+            # Re-enable button
+            self.monitor_btn.config(state=tk.NORMAL)
             
-            # Check if monitor mode interface exists
-            if self.monitor_interface in output:
-                self.monitor_mode_active = True
-            else:
-                self.monitor_mode_active = False
-                
-            # On non-Linux systems, simulate behavior
-            if os.name != 'posix':
-                self.monitor_mode_active = False
-                
-        except Exception as e:
-            print(f"Error checking monitor mode: {e}")
-            self.monitor_mode_active = False
+            # Call the callback with the result
+            if on_complete:
+                on_complete(result)
+        
+        def failed(error):
+            print(f"Error running command: {error}")
+            # Re-enable button
+            self.monitor_btn.config(state=tk.NORMAL)
+        
+        self.engine.submit_to_tk(self.root, coro, finished, failed)
     
-    # Run a command in background thread and update UI when done
-    def run_command_async(self, command, on_complete=None):
-        """Run a command asynchronously and call on_complete when done"""
-        def run_in_thread():
-            try:
-                # Disable button while command is running
-                self.monitor_btn.config(state=tk.DISABLED)
-                result = subprocess.run(command, capture_output=True, text=True)
-                
-                # Wait a moment for interface changes to register
-                time.sleep(1)
-                
-                # Re-enable button
-                self.monitor_btn.config(state=tk.NORMAL)
-                
-                # Call the callback with the result
-                if on_complete:
-                    self.root.after(0, lambda: on_complete(result))
-            except Exception as e:
-                print(f"Error running command: {e}")
-                # Re-enable button
-                self.root.after(0, lambda: self.monitor_btn.config(state=tk.NORMAL))
-        
-        # Start the command in a separate thread
-        thread = threading.Thread(target=run_in_thread)
-        thread.daemon = True
-        thread.start()
+    async def switch_monitor_mode(self, enable):
+        """Switch every external adapter, returns a ToggleResult per adapter"""
+        if enable:
+            return await self.monitor.enable_all()
+        # The scanner holds the monitor interface, release it first
+        await self.scanner.stop_async()
+        return await self.monitor.disable_all()
     
     # Navigation function
     def show_frame(self, frame):
@@ -179,24 +255,39 @@ class MelroApp:
         if not self.monitor_mode_active:
             # Start monitor mode
             self.run_command_async(
-                ['sudo', 'airmon-ng', 'start', self.normal_interface],
-                on_complete=lambda result: self.handle_monitor_toggle_result(True)
+                self.switch_monitor_mode(True),
+                on_complete=lambda results: self.handle_monitor_toggle_result(True, results)
             )
         else:
             # Stop monitor mode
             self.run_command_async(
-                ['sudo', 'airmon-ng', 'stop', self.monitor_interface],
-                on_complete=lambda result: self.handle_monitor_toggle_result(False)
+                self.switch_monitor_mode(False),
+                on_complete=lambda results: self.handle_monitor_toggle_result(False, results)
             )
     
-    def handle_monitor_toggle_result(self, trying_to_enable):
+    def handle_monitor_toggle_result(self, trying_to_enable, results=()):
         """Handle the result of toggling monitor mode"""
-        # Check the actual state after the command
+        # The adapter this toggle switched carries the attacks, then check the actual state
+        switched = [r.interface for r in results if r.ok and r.enabled and r.interface]
+        if switched:
+            self.monitor_interface = switched[0]
         self.check_monitor_mode_state()
         
         # Update the button appearance
         self.update_monitor_button()
         
+        for result in results:
+            print(format_result(result))
+        if not results and os.name == 'posix':
+            print("No adapter to switch")
+        
+        # Keep the shared scanner in step with the interface; a replay needs no interface
+        self.scanner.interfaces = self.scan_interfaces()
+        if self.monitor_mode_active or self.replay is not None:
+            self.scanner.start()
+        else:
+            self.scanner.stop()
+        
         # Log the result for debugging
         state_text = "enabled" if self.monitor_mode_active else "disabled"
         intended_text = "enable" if trying_to_enable else "disable"
@@ -318,7 +409,7 @@ class MelroApp:
         exit_left_accent.pack(side=tk.LEFT, fill=tk.Y)
         exit_btn = HoverButton(exit_frame, text="EXIT", font=self.cyberfont, 
                            fg=WARNING_COLOR, bg=PANEL_BG, bd=0, pady=15,
-                            command=lambda: self.root.quit())
+                            command=self.exit_app)
         exit_btn.pack(fill=tk.BOTH, expand=True, padx=10)
         exit_right_accent = tk.Frame(exit_frame, width=5, bg=ACCENT_ORANGE)
         exit_right_accent.pack(side=tk.RIGHT, fill=tk.Y)
@@ -332,6 +423,27 @@ class MelroApp:
         self.beacon_flooding_attack.setup_ui(beacon_content)
         self.passive_recon.setup_ui(passive_recon_content)
     
+    def exit_app(self):
+        """Stop background captures and close the application"""
+        try:
+            self.scanner.stop().result(timeout=5)
+        except Exception as e:
+            print(f"Error stopping scanner: {e}")
+        self.interfaces.remove_listener(self.on_interface_change)
+        if self.survey_store is not None:
+            self.survey_store.close()
+        if self.observation_log is not None:
+            self.observation_log.close()
+        # Stop the supervised captures so none is restarted, then tear down every process group still running
+        try:
+            self.engine.submit(self.supervisor.terminate_all()).result(timeout=5)
+        except Exception as e:
+            print(f"Error stopping processes: {e}")
+        self.engine.stop()
+        self.workspace.cleanup()
+        self.governor.close()
+        self.root.quit()
+    
     def update_time(self):
         current_time = time.strftime("%H:%M:%S")
         for label in self.time_labels:
@@ -344,8 +456,10 @@ class MelroApp:
             if os.path.exists(temp_file_path):
                 with open(temp_file_path, "r") as temp_file:
                     temp = int(temp_file.read()) / 1000
+                self.governor.observe(temp)
+                level = self.governor.load.name
                 for label in self.cpu_temp_labels:
-                    label.config(text=f"CPU Temp: {temp}°C")
+                    label.config(text=f"CPU Temp: {temp}°C" + (f" ({level})" if self.governor.level else ""))
                     # Change color based on temperature
                     if temp > 70:
                         label.config(fg=WARNING_COLOR)
@@ -363,6 +477,17 @@ class MelroApp:
                 label.config(fg=ACCENT_ORANGE)
             print(f"Error reading CPU temperature: {e}")
         self.root.after(1000, self.update_cpu_temp)
+    
+    def apply_thermal_load(self, decision, load):
+        """Scale the recon redraw rate, the parser and scanner ticks and the hop dwell to a thermal level"""
+        self.passive_recon.set_max_ui_rate(load.ui_rate)
+        self.passive_recon.set_load_scale(load.parse_scale, load.dwell_scale)
+        self.scanner.set_load_scale(load.parse_scale, load.dwell_scale)
+    
+    def report_children(self):
+        """Print the CPU and RSS of every running tool's process group, read on the engine loop"""
+        self.engine.submit(self.supervisor.report())
+        self.root.after(CHILD_REPORT_INTERVAL * 1000, self.report_children)
 
 # Run the application
 if __name__ == "__main__":